@@ -34,7 +34,7 @@ def create_app(config_name=None):
     migrate.init_app(app, db)
     
     # Настройка CORS (разрешаем запросы с фронтенда к /api/*)
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=['X-Next-Cursor', 'ETag'])
 
     # 4. Контекст приложения
     with app.app_context():
@@ -42,6 +42,14 @@ def create_app(config_name=None):
         # но не вызывали ошибок импорта при старте
         from app import models
 
+        # Кэш ответов (бэкенд из RESPONSE_CACHE_BACKEND)
+        from app.services.response_cache import response_cache
+        response_cache.init_app(app)
+
+        # Кэш файлов экспорта (каталог EXPORT_CACHE_DIR)
+        from app.services.export_cache import export_cache
+        export_cache.init_app(app)
+
         # Регистрация Blueprint'ов (Маршрутов)
         # Если ты разобьешь routes.py на части, здесь нужно будет импортировать их все
         from app.api.routes import api_bp
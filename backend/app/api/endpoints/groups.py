@@ -1,13 +1,34 @@
 from flask import Blueprint, request, jsonify
 from app import db
-from app.models import Group, GroupSubject, LessonTypeLoad 
+from app.models import Group, GroupSubject, LessonTypeLoad, Room
+from app.services.reference_loaders import group_subjects_map, group_hours_map
+from app.services.response_cache import cached_response, reference_version
+from app.api.pagination import parse_limit, parse_fields, select_fields, wants, apply_filters, keyset_page, page_response
 
 groups_bp = Blueprint('groups', __name__)
 
 @groups_bp.route('/groups', methods=['GET'])
+@cached_response(reference_version)
 def get_groups():
-    groups = Group.query.all()
-    return jsonify([g.to_dict(include_details=True) for g in groups])
+    """
+    Список групп.
+    ?is_active=, ?course= — фильтры; ?limit=, ?cursor= — страница; ?fields=id,name — только нужные поля
+    """
+    fields = parse_fields(request.args)
+    try:
+        query = apply_filters(Group.query, Group, request.args, ['is_active', 'course'])
+        groups, next_cursor = keyset_page(query, [Group.id], parse_limit(request.args), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Предметы, нагрузки и суммарные часы всех групп — фиксированным числом запросов
+    ids = [g.id for g in groups]
+    subjects = group_subjects_map(ids) if wants(fields, 'subjects') else {}
+    hours = group_hours_map(ids) if wants(fields, 'total_hours_per_week') else {}
+    return page_response([
+        select_fields(g.to_dict(include_details=True, subjects=subjects.get(g.id, []),
+                                total_hours_per_week=hours.get(g.id, 0)), fields)
+        for g in groups
+    ], next_cursor)
 
 @groups_bp.route('/groups', methods=['POST'])
 def create_group():
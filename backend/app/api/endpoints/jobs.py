@@ -0,0 +1,57 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from app.services.jobs import jobs
+import json
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Статус задачи генерации"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Задача не найдена'}), 404
+    return jsonify(job.to_dict())
+
+@jobs_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Остановить генерацию; расписание сохранится с лучшим найденным результатом"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Задача не найдена'}), 404
+    if not job.cancel():
+        return jsonify({'error': f'Задача уже завершена ({job.status})'}), 409
+    return jsonify({'success': True, 'status': job.status}), 202
+
+@jobs_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Поток событий прогресса генерации (Server-Sent Events)"""
+    try:
+        job = jobs.get_or_create(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # При переподключении EventSource сам присылает номер последнего события
+    start_seq = request.headers.get('Last-Event-ID', type=int) or 0
+
+    def event_stream():
+        last_seq = start_seq
+        while True:
+            events = job.events_since(last_seq)
+            if not events:
+                # Завершена или так и не запущена за TTL реестра — поток больше не нужен
+                if job.finished or jobs.is_stale(job):
+                    return
+                # Комментарий-heartbeat, чтобы прокси не закрывали соединение
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                last_seq = event['seq']
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if job.finished:
+                return
+
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,210 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from app.models import Lesson, Schedule, Week, Teacher, Room
+from app.services.occupancy import occupancy_cache, DAYS, SLOTS
+from app.services.schedule_ops import SERIES_TARGET_FIELDS, series_lessons, move_lesson_series
+
+lessons_bp = Blueprint('lessons', __name__)
+
+# Поля положения занятия, которые можно менять вручную
+PLACEMENT_FIELDS = ('week_id', 'day_of_week', 'time_slot', 'room_id', 'teacher_id')
+
+
+def _placement(lesson):
+    return {'week_id': lesson.week_id, 'day_of_week': lesson.day_of_week, 'time_slot': lesson.time_slot,
+            'room_id': lesson.room_id, 'teacher_id': lesson.teacher_id, 'group_id': lesson.group_id}
+
+
+def _editable_schedule(lesson):
+    """Расписание занятия или (ответ с ошибкой, код) для компактного хранения"""
+    schedule = db.session.get(Schedule, lesson.schedule_id)
+    if schedule.is_compact:
+        return None, (jsonify({'error': 'Расписание хранится шаблонами; сначала разверните его '
+                                        '(POST /schedules/<id>/materialize)'}), 409)
+    return schedule, None
+
+
+def _apply_moves(schedule, moves, force):
+    """
+    Проверить новые положения по индексу занятости, применить и сохранить.
+    Args:
+        moves: [(lesson, новое положение)]
+    Returns:
+        (конфликты, применено ли)
+    """
+    index = occupancy_cache.get(schedule)
+    changes = [(_placement(lesson), new) for lesson, new in moves]
+    with index.lock:
+        clashes = index.move(changes, force=force)
+        if clashes and not force:
+            return clashes, False
+        for lesson, new in moves:
+            for field in PLACEMENT_FIELDS:
+                setattr(lesson, field, new[field])
+        schedule.conflicts_count = index.conflicts_count
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            index.move([(new, old) for old, new in changes], force=True)
+            raise
+        # Индекс уже отражает правку — переносим его на новую версию расписания без пересборки
+        occupancy_cache.put(schedule, index)
+    return clashes, True
+
+
+def _clashes_response(clashes):
+    return jsonify({
+        'error': 'Новое положение конфликтует с другими занятиями; ?force=true — сохранить все равно',
+        'clashes': clashes,
+    }), 409
+
+
+@lessons_bp.route('/lessons/<int:lesson_id>', methods=['PATCH'])
+def update_lesson(lesson_id):
+    """
+    Перенести занятие или сменить аудиторию/преподавателя.
+    Тело: любые из week_id | week_number, day_of_week, time_slot, room_id, teacher_id, is_online.
+    Пересечения проверяются по индексу занятости расписания за O(1);
+    при конфликте — 409 со списком, если не передан ?force=true.
+    """
+    lesson = Lesson.query.get_or_404(lesson_id)
+    schedule, error = _editable_schedule(lesson)
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+
+    new = _placement(lesson)
+    try:
+        for field in PLACEMENT_FIELDS:
+            if field in data:
+                new[field] = int(data[field])
+        if 'week_number' in data:
+            week = Week.query.filter_by(semester_id=schedule.semester_id,
+                                        week_number=int(data['week_number'])).first()
+            if week is None:
+                return jsonify({'error': f"Неделя {data['week_number']} не найдена в семестре расписания"}), 400
+            new['week_id'] = week.id
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Поля положения занятия должны быть целыми числами'}), 400
+
+    if not (0 <= new['day_of_week'] < DAYS and 0 <= new['time_slot'] < SLOTS):
+        return jsonify({'error': f'day_of_week: 0..{DAYS - 1}, time_slot: 0..{SLOTS - 1}'}), 400
+    if new['room_id'] != lesson.room_id and db.session.get(Room, new['room_id']) is None:
+        return jsonify({'error': 'Аудитория не найдена'}), 400
+    if new['teacher_id'] != lesson.teacher_id and db.session.get(Teacher, new['teacher_id']) is None:
+        return jsonify({'error': 'Преподаватель не найден'}), 400
+    if new['week_id'] != lesson.week_id:
+        week = db.session.get(Week, new['week_id'])
+        if week is None or (schedule.semester_id and week.semester_id != schedule.semester_id):
+            return jsonify({'error': 'Неделя не относится к семестру расписания'}), 400
+
+    if 'is_online' in data:
+        lesson.is_online = bool(data['is_online'])
+    clashes, applied = _apply_moves(schedule, [(lesson, new)], force)
+    if not applied:
+        db.session.rollback()
+        return _clashes_response(clashes)
+    return jsonify({
+        'lesson': lesson.to_dict(),
+        'clashes': clashes,
+        'conflicts_count': schedule.conflicts_count,
+    })
+
+
+@lessons_bp.route('/lessons/swap', methods=['POST'])
+def swap_lessons():
+    """
+    Поменять два занятия одного расписания местами (неделя, день, пара).
+    Тело: {"lesson_id": 1, "other_id": 2, "swap_rooms": false}
+    swap_rooms=true — обменять и аудитории (занятия меняются ячейками целиком).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        first = Lesson.query.get_or_404(int(data['lesson_id']))
+        second = Lesson.query.get_or_404(int(data['other_id']))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Укажите lesson_id и other_id'}), 400
+    if first.id == second.id:
+        return jsonify({'error': 'Нужны два разных занятия'}), 400
+    if first.schedule_id != second.schedule_id:
+        return jsonify({'error': 'Занятия из разных расписаний'}), 400
+    schedule, error = _editable_schedule(first)
+    if error:
+        return error
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+
+    position = ('week_id', 'day_of_week', 'time_slot') + (('room_id',) if data.get('swap_rooms') else ())
+    new_first, new_second = _placement(first), _placement(second)
+    for field in position:
+        new_first[field], new_second[field] = new_second[field], new_first[field]
+
+    clashes, applied = _apply_moves(schedule, [(first, new_first), (second, new_second)], force)
+    if not applied:
+        return _clashes_response(clashes)
+    return jsonify({
+        'lessons': [first.to_dict(), second.to_dict()],
+        'clashes': clashes,
+        'conflicts_count': schedule.conflicts_count,
+    })
+
+
+@lessons_bp.route('/lessons/series/move', methods=['POST'])
+def move_series():
+    """
+    Перенести серию занятий (группа + предмет [+ тип]) на всех выбранных неделях.
+    Тело:
+        {"schedule_id": 1, "group_id": 2, "subject_id": 3, "lesson_type_id": 1,
+         "week_from": 3, "week_to": 18, "day_of_week": 0, "time_slot": 2,
+         "to": {"day_of_week": 2, "time_slot": 4, "room_id": 7}}
+    day_of_week / time_slot в корне — текущее положение серии (если у группы
+    по предмету несколько занятий в неделю). Конфликты — 409 со списком недель;
+    ?force=true — перенести все равно, ?skip_clashes=true — только свободные недели.
+    """
+    data = request.get_json(silent=True) or {}
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    skip_clashes = request.args.get('skip_clashes', '').lower() in ('1', 'true', 'yes')
+    try:
+        schedule = db.session.get(Schedule, int(data['schedule_id']))
+        group_id, subject_id = int(data['group_id']), int(data['subject_id'])
+        filters = {name: int(data[name]) for name in
+                   ('lesson_type_id', 'week_from', 'week_to', 'day_of_week', 'time_slot')
+                   if data.get(name) is not None}
+        target = {name: int(value) for name, value in (data.get('to') or {}).items()
+                  if name in SERIES_TARGET_FIELDS and value is not None}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Укажите schedule_id, group_id, subject_id и новое положение в "to"'}), 400
+    if schedule is None:
+        return jsonify({'error': 'Расписание не найдено'}), 404
+    if schedule.is_compact:
+        return jsonify({'error': 'Расписание хранится шаблонами; сначала разверните его '
+                                 '(POST /schedules/<id>/materialize)'}), 409
+    if not target:
+        return jsonify({'error': f'В "to" нужно хотя бы одно из: {", ".join(SERIES_TARGET_FIELDS)}'}), 400
+    if not (0 <= target.get('day_of_week', 0) < DAYS and 0 <= target.get('time_slot', 0) < SLOTS):
+        return jsonify({'error': f'day_of_week: 0..{DAYS - 1}, time_slot: 0..{SLOTS - 1}'}), 400
+    if 'room_id' in target and db.session.get(Room, target['room_id']) is None:
+        return jsonify({'error': 'Аудитория не найдена'}), 400
+    if 'teacher_id' in target and db.session.get(Teacher, target['teacher_id']) is None:
+        return jsonify({'error': 'Преподаватель не найден'}), 400
+
+    rows = series_lessons(schedule.id, group_id, subject_id, **filters)
+    if not rows:
+        return jsonify({'error': 'Занятия серии не найдены'}), 404
+
+    result = move_lesson_series(schedule, rows, target, force=force, skip_clashes=skip_clashes)
+    if not result['applied']:
+        return jsonify({
+            'error': 'Перенос конфликтует с другими занятиями; ?force=true — перенести все равно, '
+                     '?skip_clashes=true — только недели без конфликтов',
+            'clash_weeks': sorted({clash['week_number'] for clash in result['clashes']}),
+            'clashes': result['clashes'],
+        }), 409
+    return jsonify({
+        'moved': result['moved'],
+        'weeks': sorted({row['week_number'] for row in rows} - set(result['skipped_weeks'])),
+        'skipped_weeks': result['skipped_weeks'],
+        'clashes': result['clashes'],
+        'conflicts_count': result['conflicts_count'],
+    })
@@ -0,0 +1,110 @@
+from flask import Blueprint, request, jsonify
+from time import perf_counter
+from app import db
+from app.models import Schedule, Room
+from app.services.occupancy import occupancy_cache, DAYS, SLOTS
+
+occupancy_bp = Blueprint('occupancy', __name__)
+
+
+def _int_list(name):
+    """?teacher_id=1&teacher_id=2 или ?teacher_id=1,2"""
+    values = []
+    for raw in request.args.getlist(name):
+        for part in raw.split(','):
+            if part.strip():
+                values.append(int(part))
+    return values
+
+
+def _week_numbers():
+    """week=7 | week_from=3&week_to=9 | ничего (весь семестр)"""
+    week = request.args.get('week', type=int)
+    if week is not None:
+        return [week]
+    week_from = request.args.get('week_from', type=int)
+    week_to = request.args.get('week_to', type=int)
+    if week_from is None and week_to is None:
+        return None
+    return range(week_from or 1, (week_to or 10 ** 4) + 1)
+
+
+@occupancy_bp.route('/schedules/<int:schedule_id>/free-rooms', methods=['GET'])
+def get_free_rooms(schedule_id):
+    """Свободные аудитории в слоте: ?week=7&day=2&slot=3[&min_capacity=&building=&room_type=]"""
+    schedule = db.session.get(Schedule, schedule_id)
+    if schedule is None:
+        return jsonify({'error': 'Расписание не найдено'}), 404
+
+    week = request.args.get('week', type=int)
+    day = request.args.get('day', type=int)
+    slot = request.args.get('slot', type=int)
+    if week is None or day is None or slot is None:
+        return jsonify({'error': 'Параметры week, day и slot обязательны'}), 400
+    if not (0 <= day < DAYS and 0 <= slot < SLOTS):
+        return jsonify({'error': f'day: 0..{DAYS - 1}, slot: 0..{SLOTS - 1}'}), 400
+
+    started = perf_counter()
+    index = occupancy_cache.get(schedule)
+    pos = index.pos_by_number.get(week)
+    if pos is None:
+        return jsonify({'error': f'Неделя {week} не входит в семестр расписания'}), 404
+    bit = index.bit(index.week_ids[pos], day, slot)
+
+    query = Room.query.filter(Room.is_active.is_(True))
+    min_capacity = request.args.get('min_capacity', type=int)
+    if min_capacity is not None:
+        query = query.filter(Room.capacity >= min_capacity)
+    if request.args.get('building'):
+        query = query.filter(Room.building == request.args['building'])
+    if request.args.get('room_type'):
+        query = query.filter(Room.room_type == request.args['room_type'])
+
+    rooms = [
+        {'id': room.id, 'name': room.name, 'building': room.building,
+         'capacity': room.capacity, 'room_type': room.room_type}
+        for room in query.order_by(Room.capacity, Room.id)
+        if not index.is_busy('room', room.id, bit)
+    ]
+    return jsonify({
+        'week_number': week,
+        'day_of_week': day,
+        'time_slot': slot,
+        'rooms': rooms,
+        'count': len(rooms),
+        'time_ms': round((perf_counter() - started) * 1000, 2),
+    })
+
+
+@occupancy_bp.route('/schedules/<int:schedule_id>/free-slots', methods=['GET'])
+def get_free_slots(schedule_id):
+    """
+    Слоты, где свободны все перечисленные сущности:
+    ?teacher_id=1,2&group_id=3&room_id=5[&week=|week_from=&week_to=][&day=][&slot=]
+    """
+    schedule = db.session.get(Schedule, schedule_id)
+    if schedule is None:
+        return jsonify({'error': 'Расписание не найдено'}), 404
+
+    try:
+        entities = [(kind, entity_id)
+                    for kind in ('teacher', 'group', 'room')
+                    for entity_id in _int_list(f'{kind}_id')]
+        days = _int_list('day') or None
+        slots = _int_list('slot') or None
+    except ValueError:
+        return jsonify({'error': 'ID и номера должны быть целыми числами'}), 400
+    if not entities:
+        return jsonify({'error': 'Укажите хотя бы один teacher_id, group_id или room_id'}), 400
+
+    started = perf_counter()
+    index = occupancy_cache.get(schedule)
+    window = index.window(_week_numbers(), days, slots)
+    free = index.free_for_all(entities, window)
+    result = [index.decode(bit) for bit in index.iter_bits(free)]
+    return jsonify({
+        'entities': [{'type': kind, 'id': entity_id} for kind, entity_id in entities],
+        'slots': result,
+        'count': len(result),
+        'time_ms': round((perf_counter() - started) * 1000, 2),
+    })
@@ -1,13 +1,29 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Room
+from app.services.reference_loaders import room_equipment_map
+from app.services.response_cache import cached_response, reference_version
+from app.api.pagination import parse_limit, parse_fields, select_fields, wants, apply_filters, keyset_page, page_response
 
 rooms_bp = Blueprint('rooms', __name__)
 
 @rooms_bp.route('/rooms', methods=['GET'])
+@cached_response(reference_version)
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([r.to_dict() for r in rooms])
+    """
+    Список аудиторий.
+    ?is_active=, ?building= — фильтры; ?limit=, ?cursor= — страница; ?fields=id,name — только нужные поля
+    """
+    fields = parse_fields(request.args)
+    try:
+        query = apply_filters(Room.query, Room, request.args, ['is_active', 'building'])
+        rooms, next_cursor = keyset_page(query, [Room.id], parse_limit(request.args), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    equipment = room_equipment_map(r.id for r in rooms) if wants(fields, 'equipment') else {}
+    return page_response([
+        select_fields(r.to_dict(equipment=equipment.get(r.id, [])), fields) for r in rooms
+    ], next_cursor)
 
 @rooms_bp.route('/rooms', methods=['POST'])
 def create_room():
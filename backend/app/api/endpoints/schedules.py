@@ -1,21 +1,51 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app, Response, stream_with_context
 from app import db
-from app.models import Schedule, Lesson, Teacher, Room, Group, Semester, AcademicYear, Week, SemesterEnum
+from app.models import Schedule, Week
 from app.schedulers.csp import CSPScheduler
-from app.exporter import ExcelExporter
-import tempfile
-import os
+from app.services.jobs import jobs
+from app.services.lesson_writer import bulk_insert_lessons
+from app.services.lesson_patterns import store_compact, expand_patterns, compact_schedule, materialize_schedule
+from app.services.lesson_serializer import (
+    ReferenceMaps, lesson_rows, iter_lesson_rows, stream_weeks_json, entity_lesson_rows, serialize_lesson
+)
+from app.services.columnar import requested_format, columnar_payload, columnar_response
+from app.services.schedule_ops import delete_schedule as delete_schedule_rows, clone_schedule, lessons_counts
+from app.services.timetable_read_model import rebuild_timetable, get_week_payload
+from app.services.response_cache import cached_response, schedule_version
+from app.services.export_cache import open_schedule_export
+from app.services.export_bundle import BUNDLE_KINDS, bundle_tasks, stream_bundle, export_pool
+from app.services.conflicts import CONFLICT_KINDS, conflicts_query, conflict_counts, describe_conflicts
+from app.api.pagination import parse_limit, parse_fields, select_fields, wants, apply_filters, keyset_page, page_response
 import traceback
+from datetime import date, timedelta
 
 schedules_bp = Blueprint('schedules', __name__)
 
 @schedules_bp.route('/schedules', methods=['GET'])
 def get_schedules():
-    """Получить список всех расписаний"""
-    schedules = Schedule.query.order_by(Schedule.created_at.desc()).all()
-    return jsonify([s.to_dict() for s in schedules])
+    """
+    Получить список расписаний (новые сверху).
+    ?limit=N — страница из N записей, следующая по ?cursor= из заголовка X-Next-Cursor.
+    ?status= — фильтр; ?fields=id,name — только нужные поля.
+    """
+    fields = parse_fields(request.args)
+    try:
+        query = apply_filters(Schedule.query, Schedule, request.args, ['status'])
+        schedules, next_cursor = keyset_page(
+            query, [Schedule.created_at, Schedule.id],
+            limit=parse_limit(request.args), cursor=request.args.get('cursor'),
+            descending=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Количество занятий — одним сгруппированным запросом на всю страницу
+    counts = lessons_counts(schedules) if wants(fields, 'lessons_count') else {}
+    return page_response([
+        select_fields(s.to_dict(lessons_count=counts.get(s.id, 0)), fields) for s in schedules
+    ], next_cursor)
 
 @schedules_bp.route('/schedules/<int:schedule_id>', methods=['GET'])
+@cached_response(schedule_version)
 def get_schedule(schedule_id):
     """Получить одно расписание (базовая информация)"""
     schedule = Schedule.query.get_or_404(schedule_id)
@@ -24,8 +54,24 @@ def get_schedule(schedule_id):
 @schedules_bp.route('/schedules/generate-semester', methods=['POST'])
 def generate_semester_schedule():
     """Генерация расписания с использованием CSP"""
+    data = request.json
+    # Лимит времени из запроса: число секунд > 0, не больше GENERATION_TIME_LIMIT
+    max_time_limit = current_app.config['GENERATION_TIME_LIMIT']
+    try:
+        time_limit = float(data.get('time_limit', max_time_limit))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_limit должен быть числом секунд'}), 400
+    if not 0 < time_limit < float('inf'):
+        return jsonify({'error': 'time_limit должен быть больше 0'}), 400
+    time_limit = min(time_limit, max_time_limit)
+    
+    try:
+        # Задача генерации: клиент может заранее подписаться на /jobs/<job_id>/events
+        job = jobs.create(data.get('job_id'), time_limit=time_limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    
     try:
-        data = request.json
         print(f"🚀 Запуск генерации CSP для семестра {data.get('semester_id')}")
         
         # 1. Создаем запись расписания
@@ -33,6 +79,7 @@ def generate_semester_schedule():
             name=data.get('name', 'Новое семестровое расписание'),
             semester=data.get('semester_label'),
             academic_year=data.get('academic_year'),
+            semester_id=data['semester_id'],
             generation_method='csp_backtracking'
         )
         db.session.add(schedule)
@@ -43,16 +90,20 @@ def generate_semester_schedule():
             semester_id=data['semester_id'],
             max_iterations=data.get('max_iterations', 500000),
             max_lessons_per_day=data.get('max_lessons_per_day', 5),
+            progress_callback=job.publish,
+            cancel_token=job.token,
         )
         result = scheduler.generate()
         
-        # 3. Сохраняем результаты
-        for lesson_data in result['lessons']:
-            lesson = Lesson(
-                schedule_id=schedule.id,
-                **lesson_data
+        # 3. Сохраняем результаты (чанками, в обход unit of work ORM)
+        if data.get('storage') == 'compact':
+            persist = store_compact(schedule.id, result['lessons'])
+            schedule.storage_mode = 'compact'
+        else:
+            persist = bulk_insert_lessons(
+                schedule.id, result['lessons'],
+                chunk_size=current_app.config['LESSON_BULK_CHUNK_SIZE']
             )
-            db.session.add(lesson)
             
         schedule.fitness_score = result.get('fitness', 0.0)
         schedule.conflicts_count = len(result.get('conflicts', []))
@@ -60,136 +111,375 @@ def generate_semester_schedule():
         
         db.session.commit()
         
-        return jsonify({
+        # 4. Готовые недельные сетки для чтения
+        read_model = rebuild_timetable(schedule)
+        print(f"📅 Сетки недель: {read_model['rows']} за {read_model['time']:.2f} сек")
+        
+        response = {
             'success': True,
+            'job_id': job.id,
             'schedule_id': schedule.id,
             'lessons_count': len(result['lessons']),
             'conflicts': result.get('conflicts', []),
             'fitness': result.get('fitness', 0.0),
-            'time': result.get('time', 0.0)
-        })
+            'time': result.get('time', 0.0),
+            'iterations': result.get('iterations', 0),
+            'stop_reason': result.get('stop_reason'),
+            'persist_time': persist['time'],
+            'lessons_per_sec': persist['lessons_per_sec']
+        }
+        status = 'cancelled' if result.get('stop_reason') == 'cancelled' else 'completed'
+        job.finish(status, {k: v for k, v in response.items() if k != 'conflicts'})
+        return jsonify(response)
         
     except Exception as e:
         print(f"❌ Ошибка генерации: {e}")
         traceback.print_exc()
         db.session.rollback()
+        job.finish('failed', {'error': str(e)})
         return jsonify({'error': str(e)}), 500
 
 @schedules_bp.route('/schedules/<int:schedule_id>/extended', methods=['GET'])
+@cached_response(schedule_version)
 def get_extended_schedule(schedule_id):
-    """Получение расписания с разбивкой по неделям"""
-    try:
-        schedule = Schedule.query.get_or_404(schedule_id)
-        lessons = Lesson.query.filter_by(schedule_id=schedule_id).all()
-        
-        weeks_data = {}
-        for lesson in lessons:
-            if not lesson.week: continue
-            week_num = lesson.week.week_number
-            
-            if week_num not in weeks_data:
-                weeks_data[week_num] = {
-                    'week_number': week_num,
-                    'start_date': lesson.week.start_date.isoformat(),
-                    'end_date': lesson.week.end_date.isoformat(),
-                    'lessons': []
-                }
-            weeks_data[week_num]['lessons'].append(lesson.to_dict())
-            
-        return jsonify({
-            **schedule.to_dict(),
-            'weeks': sorted(weeks_data.values(), key=lambda x: x['week_number'])
-        })
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    """
+    Получение расписания с разбивкой по неделям.
+    Ответ пишется потоком: занятия читаются с серверного курсора по порядку
+    недель и сериализуются частями — память не растет с размером расписания.
+    ?format=compact / ?format=msgpack — колоночный формат (см. services/columnar.py).
+    """
+    schedule = Schedule.query.get_or_404(schedule_id)
+    header = schedule.to_dict()
+    refs = ReferenceMaps(semester_id=schedule.semester_id)
+    
+    if schedule.is_compact:
+        # Шаблоны разворачиваются по одной неделе
+        week_numbers = sorted({w.week_number for w in refs.weeks.values()})
+        rows = (row for n in week_numbers for row in expand_patterns(schedule_id, week_numbers=[n]))
+    else:
+        rows = iter_lesson_rows(schedule_id)
+    
+    fmt = requested_format()
+    if fmt:
+        return columnar_response({**header, **columnar_payload(rows, refs)}, fmt)
+    
+    chunks = stream_weeks_json(header, rows, refs, current_app.json.dumps)
+    return Response(stream_with_context(chunks), mimetype='application/json')
 
 
 @schedules_bp.route('/schedules/<int:schedule_id>/week/<int:week_number>', methods=['GET'])
+@cached_response(schedule_version)
 def get_schedule_week(schedule_id, week_number):
-    """Получить расписание на конкретную неделю (исправленная версия)"""
+    """
+    Получить расписание на конкретную неделю (сетка день -> пара -> занятия).
+    ?group_id= / ?teacher_id= / ?room_id= — сетка одной группы, преподавателя или аудитории.
+    ?format=compact / ?format=msgpack — колоночный формат вместо сетки.
+    """
     try:
         schedule = Schedule.query.get_or_404(schedule_id)
 
-        # 1. Находим семестр, к которому относится расписание
-        academic_year = AcademicYear.query.filter_by(name=schedule.academic_year).first()
-        if not academic_year:
-            academic_year = AcademicYear.query.filter_by(is_current=True).first()
-        
-        if not academic_year:
-            return jsonify({'error': f'Учебный год "{schedule.academic_year}" не найден'}), 404
-        
-        semester_type_str = schedule.semester.lower()
-        if 'осенний' in semester_type_str or 'fall' in semester_type_str:
-            semester_type = SemesterEnum.FALL
-        else:
-            semester_type = SemesterEnum.SPRING
-
-        # 2. Находим нужную неделю внутри правильного семестра и года
-        week = Week.query.join(Semester).filter(
-            Semester.academic_year_id == academic_year.id,
-            Semester.type == semester_type,
-            Week.week_number == week_number
-        ).first()
+        # 1-2. Неделя семестра расписания — по индексу (semester_id, week_number)
+        if not schedule.semester_id:
+            return jsonify({'error': 'Для расписания не указан семестр'}), 404
+        week = Week.query.filter_by(semester_id=schedule.semester_id, week_number=week_number).first()
 
         if not week:
             return jsonify({'error': f'Неделя {week_number} для семестра "{schedule.semester}" не найдена'}), 404
         
-        # 3. Получаем занятия для этой недели и этого расписания
-        lessons = Lesson.query.filter_by(
-            schedule_id=schedule_id,
-            week_id=week.id
-        ).all()
-        
-        # 4. Группируем по дням и времени
-        timetable = {day: {slot: [] for slot in range(7)} for day in range(5)}
+        # 3. Готовая сетка из read model (одна выборка по индексу)
+        for entity_type in ('group', 'teacher', 'room'):
+            entity_id = request.args.get(f'{entity_type}_id', type=int)
+            if entity_id is not None:
+                break
+        else:
+            entity_type, entity_id = 'schedule', 0
         
-        for lesson in lessons:
-            day = lesson.day_of_week
-            slot = lesson.time_slot
-            if day in timetable and slot in timetable[day]:
-                timetable[day][slot].append(lesson.to_dict())
+        fmt = requested_format()
+        if fmt:
+            if schedule.is_compact:
+                rows = [r for r in expand_patterns(schedule_id, week_numbers=[week_number]) if r['week_id'] == week.id]
+            else:
+                rows = lesson_rows(schedule_id, week_id=week.id)
+            if entity_type != 'schedule':
+                rows = [r for r in rows if r[f'{entity_type}_id'] == entity_id]
+            return columnar_response({
+                'week_number': week.week_number,
+                'start_date': week.start_date.isoformat(),
+                'end_date': week.end_date.isoformat(),
+                **columnar_payload(rows, ReferenceMaps(week_ids=[week.id])),
+            }, fmt)
         
-        return jsonify({
-            'week_number': week_number,
-            'start_date': week.start_date.isoformat(),
-            'end_date': week.end_date.isoformat(),
-            'timetable': timetable
-        })
+        payload = get_week_payload(schedule, week, entity_type, entity_id)
+        return Response(payload, mimetype='application/json')
         
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
+# сегмент URL -> (колонка lesson, атрибут ReferenceMaps)
+TIMETABLE_ENTITIES = {
+    'teachers': ('teacher_id', 'teachers'),
+    'groups': ('group_id', 'groups'),
+    'rooms': ('room_id', 'rooms'),
+}
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    return date.fromisoformat(value) if value else None
+
+
+def _week_range_args(schedule):
+    """
+    Фильтр недель из ?week=N | ?week_from=&week_to= и ?date_from=&date_to= (ISO).
+    Returns:
+        (week_ids или None — без фильтра, date_from, date_to)
+    Raises:
+        ValueError: неверный формат даты
+    """
+    date_from, date_to = _parse_date_arg('date_from'), _parse_date_arg('date_to')
+    
+    # Недели семестра по фильтрам (индекс ix_week_semester_number)
+    week_filters = []
+    week = request.args.get('week', type=int)
+    if week is not None:
+        week_filters.append(Week.week_number == week)
+    if request.args.get('week_from', type=int) is not None:
+        week_filters.append(Week.week_number >= request.args.get('week_from', type=int))
+    if request.args.get('week_to', type=int) is not None:
+        week_filters.append(Week.week_number <= request.args.get('week_to', type=int))
+    if date_from:
+        week_filters.append(Week.end_date >= date_from)
+    if date_to:
+        week_filters.append(Week.start_date <= date_to)
+    if not week_filters:
+        return None, date_from, date_to
+    week_ids = [w for (w,) in db.session.query(Week.id).filter(
+        Week.semester_id == schedule.semester_id, *week_filters
+    )]
+    return week_ids, date_from, date_to
+
+
+@schedules_bp.route('/schedules/<int:schedule_id>/<any(teachers, groups, rooms):entity>/<int:entity_id>/timetable',
+                    methods=['GET'])
+@cached_response(schedule_version)
+def get_entity_timetable(schedule_id, entity, entity_id):
+    """
+    Расписание одного преподавателя / группы / аудитории.
+    ?week=N или ?week_from=&week_to= — номера недель; ?date_from=&date_to= — даты (ISO).
+    ?format=compact / ?format=msgpack — колоночный формат.
+    """
+    schedule = Schedule.query.get_or_404(schedule_id)
+    column, ref_name = TIMETABLE_ENTITIES[entity]
+    try:
+        week_ids, date_from, date_to = _week_range_args(schedule)
+    except ValueError:
+        return jsonify({'error': 'Даты ожидаются в формате YYYY-MM-DD'}), 400
+    
+    refs = ReferenceMaps(week_ids=week_ids) if week_ids is not None else ReferenceMaps(semester_id=schedule.semester_id)
+    name = getattr(refs, ref_name).get(entity_id)
+    if name is None:
+        return jsonify({'error': 'Не найдено'}), 404
+    
+    if schedule.is_compact:
+        week_numbers = None if week_ids is None else [refs.weeks[w].week_number for w in week_ids]
+        rows = [
+            r for r in expand_patterns(schedule_id, week_numbers=week_numbers)
+            if r[column] == entity_id and r['week_id'] in refs.weeks
+        ]
+    else:
+        rows = entity_lesson_rows(schedule_id, column, entity_id, week_ids=week_ids)
+    
+    # Точные границы по датам (неделя может попасть в диапазон частично)
+    if date_from or date_to:
+        def lesson_date(row):
+            return refs.weeks[row['week_id']].start_date + timedelta(days=row['day_of_week'])
+        rows = [
+            r for r in rows
+            if (not date_from or lesson_date(r) >= date_from) and (not date_to or lesson_date(r) <= date_to)
+        ]
+    
+    header = {'schedule_id': schedule_id, 'entity_type': entity[:-1], 'entity_id': entity_id, 'name': name}
+    fmt = requested_format()
+    if fmt:
+        return columnar_response({**header, **columnar_payload(rows, refs)}, fmt)
+    
+    weeks = {}
+    for row in rows:
+        week_obj = refs.weeks.get(row['week_id'])
+        if not week_obj:
+            continue
+        weeks.setdefault(week_obj.week_number, {
+            'week_number': week_obj.week_number,
+            'start_date': week_obj.start_date.isoformat(),
+            'end_date': week_obj.end_date.isoformat(),
+            'lessons': []
+        })['lessons'].append(serialize_lesson(row, refs))
+    return jsonify({**header, 'weeks': [weeks[n] for n in sorted(weeks)]})
+
+
+@schedules_bp.route('/schedules/<int:schedule_id>/conflicts', methods=['GET'])
+@cached_response(schedule_version)
+def get_schedule_conflicts(schedule_id):
+    """
+    Конфликты расписания (преподаватель, аудитория или группа дважды в одном слоте).
+    Считаются агрегатами в БД; ?type=teacher|room|group — фильтр,
+    ?limit=N&cursor= — страницы (курсор следующей в X-Next-Cursor).
+    """
+    schedule = Schedule.query.get_or_404(schedule_id)
+    kind = request.args.get('type')
+    if kind is not None and kind not in CONFLICT_KINDS:
+        return jsonify({'error': f'type: {", ".join(CONFLICT_KINDS)}'}), 400
+    try:
+        query, columns = conflicts_query(schedule, kind)
+        rows, next_cursor = keyset_page(
+            query, columns, limit=parse_limit(request.args), cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    counts = conflict_counts(schedule)
+    response = jsonify({
+        'schedule_id': schedule_id,
+        'conflicts_count': sum(counts.values()),
+        'counts': counts,
+        'conflicts': describe_conflicts(rows),
+    })
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@schedules_bp.route('/schedules/<int:schedule_id>/compact', methods=['POST'])
+def compact_schedule_storage(schedule_id):
+    """Перевести расписание в компактный формат (шаблоны + исключения)"""
+    schedule = Schedule.query.get_or_404(schedule_id)
+    try:
+        stats = compact_schedule(schedule)
+        # id занятий в сетках меняются вместе с форматом хранения
+        rebuild_timetable(schedule)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        traceback.print_exc()
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'success': True, 'storage_mode': schedule.storage_mode, **stats})
+
+@schedules_bp.route('/schedules/<int:schedule_id>/materialize', methods=['POST'])
+def materialize_schedule_storage(schedule_id):
+    """Развернуть компактное расписание обратно в строки Lesson"""
+    schedule = Schedule.query.get_or_404(schedule_id)
+    try:
+        stats = materialize_schedule(schedule, chunk_size=current_app.config['LESSON_BULK_CHUNK_SIZE'])
+        rebuild_timetable(schedule)
+    except Exception as e:
+        traceback.print_exc()
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'success': True, 'storage_mode': schedule.storage_mode, **stats})
+
+@schedules_bp.route('/schedules/<int:schedule_id>/activate', methods=['POST'])
+def activate_schedule(schedule_id):
+    """Активировать расписание (остальные расписания семестра — в архив)"""
+    schedule = Schedule.query.get_or_404(schedule_id)
+    schedule.activate()
+    # Активное расписание читают все — сетки недель собираем заранее
+    rebuild_timetable(schedule)
+    return jsonify({'success': True, 'schedule': schedule.to_dict()})
+
 @schedules_bp.route('/schedules/<int:schedule_id>', methods=['DELETE'])
 def delete_schedule(schedule_id):
-    """Удалить расписание"""
+    """Удалить расписание (set-based, без загрузки занятий в ORM)"""
     schedule = Schedule.query.get_or_404(schedule_id)
-    db.session.delete(schedule)
-    db.session.commit()
+    db.session.expunge(schedule)
+    delete_schedule_rows(schedule_id)
     return jsonify({'success': True})
 
+@schedules_bp.route('/schedules/<int:schedule_id>/clone', methods=['POST'])
+def clone_schedule_endpoint(schedule_id):
+    """Копия расписания (черновик); занятия копируются внутри БД"""
+    source = Schedule.query.get_or_404(schedule_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        result = clone_schedule(source, name=data.get('name'))
+    except Exception as e:
+        traceback.print_exc()
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'success': True,
+        'schedule': result['schedule'].to_dict(),
+        'lessons_copied': result['lessons_copied'],
+        'patterns_copied': result['patterns_copied']
+    }), 201
+
 @schedules_bp.route('/schedules/<int:schedule_id>/export', methods=['GET'])
 def export_schedule(schedule_id):
-    """Экспорт в Excel"""
+    """
+    Экспорт в Excel.
+    ?type=group|teacher|room|consolidated; недели — ?week=N | ?week_from=&week_to=,
+    даты — ?date_from=&date_to= (каждая неделя выгружается отдельным блоком).
+    """
     try:
         schedule = Schedule.query.get_or_404(schedule_id)
         export_type = request.args.get('type', 'group')
+        try:
+            week_ids, date_from, date_to = _week_range_args(schedule)
+        except ValueError:
+            return jsonify({'error': 'Даты ожидаются в формате YYYY-MM-DD'}), 400
         
-        exporter = ExcelExporter()
-        
-        fd, path = tempfile.mkstemp(suffix='.xlsx')
-        os.close(fd)
-        
-        exporter.export_schedule(schedule, path, export_type=export_type)
+        handle, key, hit = open_schedule_export(schedule, export_type, week_ids, date_from, date_to)
+        if hit:
+            print(f"💾 Экспорт из кэша: расписание {schedule_id}, {export_type}")
         
         return send_file(
-            path,
+            handle,
             as_attachment=True,
             download_name=f'schedule_{schedule.id}_{export_type}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            etag=key,
         )
     except Exception as e:
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@schedules_bp.route('/schedules/<int:schedule_id>/export/bundle', methods=['GET'])
+def export_schedule_bundle(schedule_id):
+    """
+    ZIP с отдельной книгой Excel на каждую группу / преподавателя / аудиторию.
+    ?types=group,teacher,room (по умолчанию — виды из переданных id, иначе все три);
+    ?group_id=1&group_id=2 | ?teacher_id=1,2 | ?room_id=... — только эти сущности;
+    недели и даты — как у /export.
+    """
+    schedule = Schedule.query.get_or_404(schedule_id)
+    try:
+        entity_ids = {}
+        for kind in BUNDLE_KINDS:
+            ids = [int(part) for raw in request.args.getlist(f'{kind}_id') for part in raw.split(',') if part.strip()]
+            if ids:
+                entity_ids[kind] = ids
+        week_ids, date_from, date_to = _week_range_args(schedule)
+    except ValueError:
+        return jsonify({'error': 'id ожидаются целыми числами, даты — в формате YYYY-MM-DD'}), 400
+    
+    kinds = [k.strip() for k in request.args.get('types', '').split(',') if k.strip()] or list(entity_ids or BUNDLE_KINDS)
+    unknown = [k for k in kinds if k not in BUNDLE_KINDS]
+    if unknown:
+        return jsonify({'error': f'Неизвестные виды: {", ".join(unknown)}; допустимы: {", ".join(BUNDLE_KINDS)}'}), 400
+    
+    tasks = bundle_tasks(schedule, kinds, entity_ids, week_ids, date_from, date_to)
+    if not tasks:
+        return jsonify({'error': 'Нет занятий для выбранных сущностей'}), 404
+    
+    print(f"📦 Экспорт пакетом: расписание {schedule_id}, файлов {len(tasks)}")
+    # Пул создается здесь, в контексте приложения: генератор ответа выполняется уже после выхода из view
+    executor = export_pool.get()
+    return Response(
+        stream_bundle(tasks, executor),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=schedule_{schedule_id}_bundle.zip'},
+    )
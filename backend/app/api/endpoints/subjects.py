@@ -1,13 +1,25 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Subject
+from app.services.response_cache import cached_response, reference_version
+from app.api.pagination import parse_limit, parse_fields, select_fields, apply_filters, keyset_page, page_response
 
 subjects_bp = Blueprint('subjects', __name__)
 
 @subjects_bp.route('/subjects', methods=['GET'])
+@cached_response(reference_version)
 def get_subjects():
-    subjects = Subject.query.all()
-    return jsonify([s.to_dict() for s in subjects])
+    """
+    Список предметов.
+    ?is_active= — фильтр; ?limit=, ?cursor= — страница; ?fields=id,name — только нужные поля
+    """
+    fields = parse_fields(request.args)
+    try:
+        query = apply_filters(Subject.query, Subject, request.args, ['is_active'])
+        subjects, next_cursor = keyset_page(query, [Subject.id], parse_limit(request.args), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return page_response([select_fields(s.to_dict(), fields) for s in subjects], next_cursor)
 
 @subjects_bp.route('/subjects', methods=['POST'])
 def create_subject():
@@ -1,13 +1,33 @@
 from flask import Blueprint, request, jsonify
+from datetime import date
 from app import db
-from app.models import Teacher, Subject
+from app.models import Teacher, Subject, Schedule
+from app.services.reference_loaders import teacher_subjects_map
+from app.services.response_cache import cached_response, reference_version
+from app.services.substitutes import find_substitutes, active_schedule_for
+from app.api.pagination import parse_limit, parse_fields, select_fields, wants, apply_filters, keyset_page, page_response
 
 teachers_bp = Blueprint('teachers', __name__)
 
 @teachers_bp.route('/teachers', methods=['GET'])
+@cached_response(reference_version)
 def get_teachers():
-    teachers = Teacher.query.all()
-    return jsonify([t.to_dict(include_details=True) for t in teachers])
+    """
+    Список преподавателей.
+    ?is_active=, ?department= — фильтры; ?limit=, ?cursor= — страница; ?fields=id,name — только нужные поля
+    """
+    fields = parse_fields(request.args)
+    try:
+        query = apply_filters(Teacher.query, Teacher, request.args, ['is_active', 'department'])
+        teachers, next_cursor = keyset_page(query, [Teacher.id], parse_limit(request.args), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Предметы всех преподавателей страницы — одним запросом (и только если они нужны)
+    subjects = teacher_subjects_map(t.id for t in teachers) if wants(fields, 'subjects') else {}
+    return page_response([
+        select_fields(t.to_dict(include_details=True, subjects=subjects.get(t.id, [])), fields)
+        for t in teachers
+    ], next_cursor)
 
 @teachers_bp.route('/teachers', methods=['POST'])
 def create_teacher():
@@ -33,10 +53,38 @@ def create_teacher():
     return jsonify(teacher.to_dict()), 201
 
 @teachers_bp.route('/teachers/<int:teacher_id>', methods=['GET'])
+@cached_response(reference_version)
 def get_teacher(teacher_id):
     teacher = Teacher.query.get_or_404(teacher_id)
     return jsonify(teacher.to_dict(include_details=True))
 
+@teachers_bp.route('/teachers/<int:teacher_id>/substitutes', methods=['GET'])
+def get_substitutes(teacher_id):
+    """
+    Кто может заменить преподавателя в дни отсутствия.
+    ?date_from=2025-10-06&date_to=2025-10-10 (ISO, по умолчанию — один день date_from);
+    ?schedule_id= — расписание (по умолчанию активное на эти даты); ?limit=N — кандидатов на занятие.
+    """
+    teacher = Teacher.query.get_or_404(teacher_id)
+    try:
+        date_from = date.fromisoformat(request.args['date_from'])
+        date_to = date.fromisoformat(request.args.get('date_to') or request.args['date_from'])
+    except KeyError:
+        return jsonify({'error': 'Укажите date_from (и при необходимости date_to)'}), 400
+    except ValueError:
+        return jsonify({'error': 'Даты ожидаются в формате YYYY-MM-DD'}), 400
+    if date_to < date_from:
+        return jsonify({'error': 'date_to раньше date_from'}), 400
+
+    schedule_id = request.args.get('schedule_id', type=int)
+    schedule = db.session.get(Schedule, schedule_id) if schedule_id else active_schedule_for(date_from, date_to)
+    if schedule is None:
+        return jsonify({'error': 'Нет активного расписания на эти даты'}), 404
+
+    result = find_substitutes(schedule, teacher.id, date_from, date_to,
+                              limit=request.args.get('limit', type=int))
+    return jsonify({'teacher': teacher.name, **result})
+
 @teachers_bp.route('/teachers/<int:teacher_id>', methods=['PUT'])
 def update_teacher(teacher_id):
     teacher = Teacher.query.get_or_404(teacher_id)
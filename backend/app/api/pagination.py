@@ -0,0 +1,138 @@
+"""
+Пагинация, фильтры и выбор полей для списочных эндпоинтов.
+Keyset-пагинация: курсор — непрозрачная строка со значениями ключа сортировки последней
+записи страницы; следующая страница выбирается условием
+(col1, col2) < (v1, v2) по индексу, без OFFSET.
+Тело ответа остается списком, курсор следующей страницы — в заголовке X-Next-Cursor.
+"""
+
+import base64
+import json
+from datetime import datetime, date
+from typing import List, Optional, Tuple, Any
+
+from flask import jsonify
+from sqlalchemy import tuple_, DateTime, Date, Boolean, Integer
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_limit(args) -> Optional[int]:
+    """?limit=N -> int (None — без пагинации, весь список)"""
+    limit = args.get('limit', type=int)
+    if limit is None:
+        return None
+    if limit < 1:
+        raise ValueError('limit должен быть положительным')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Некорректный курсор')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Некорректный курсор')
+    result = []
+    for column, value in zip(columns, values):
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        result.append(value)
+    return result
+
+
+def keyset_page(query, columns, limit: Optional[int], cursor: Optional[str] = None,
+                descending: bool = False) -> Tuple[list, Optional[str]]:
+    """
+    Применить сортировку и keyset-пагинацию к запросу.
+    Args:
+        query: Query по модели
+        columns: Колонки ключа сортировки; последняя должна быть уникальной (id)
+        limit: Размер страницы (None — вернуть все)
+        cursor: Курсор из X-Next-Cursor предыдущей страницы
+        descending: Сортировка по убыванию
+    Returns:
+        (объекты страницы, курсор следующей страницы или None)
+    """
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if limit is None:
+        return query.all(), None
+    
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return items, next_cursor
+
+
+def parse_fields(args) -> Optional[List[str]]:
+    """?fields=id,name -> ['id', 'name'] (None — все поля)"""
+    raw = args.get('fields')
+    if not raw:
+        return None
+    return [f.strip() for f in raw.split(',') if f.strip()]
+
+
+def select_fields(item: dict, fields: Optional[List[str]]) -> dict:
+    """Оставить в словаре только запрошенные поля"""
+    if fields is None:
+        return item
+    return {f: item[f] for f in fields if f in item}
+
+
+def wants(fields: Optional[List[str]], name: str) -> bool:
+    """Нужно ли поле в ответе (чтобы не загружать связанные данные зря)"""
+    return fields is None or name in fields
+
+
+def _coerce(column, value: str):
+    if isinstance(column.type, Boolean):
+        lowered = value.lower()
+        if lowered in ('1', 'true', 'yes'):
+            return True
+        if lowered in ('0', 'false', 'no'):
+            return False
+        raise ValueError(f'Некорректное значение фильтра {column.key}: {value}')
+    if isinstance(column.type, Integer):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f'Некорректное значение фильтра {column.key}: {value}')
+    return value
+
+
+def apply_filters(query, model, args, names: List[str]):
+    """
+    Фильтры на равенство по индексированным колонкам: ?is_active=true&course=2
+    Args:
+        names: Разрешенные для фильтрации колонки модели
+    """
+    for name in names:
+        value = args.get(name)
+        if value is None or value == '':
+            continue
+        column = getattr(model, name)
+        query = query.filter(column == _coerce(column, value))
+    return query
+
+
+def page_response(items: list, next_cursor: Optional[str]):
+    """JSON-список + курсор следующей страницы в заголовке"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -5,6 +5,9 @@ from app.api.endpoints.rooms import rooms_bp
 from app.api.endpoints.subjects import subjects_bp
 from app.api.endpoints.schedules import schedules_bp
 from app.api.endpoints.semesters import semesters_bp
+from app.api.endpoints.jobs import jobs_bp
+from app.api.endpoints.occupancy import occupancy_bp
+from app.api.endpoints.lessons import lessons_bp
 
 # Создаем главный Blueprint API
 api_bp = Blueprint('api', __name__)
@@ -30,4 +33,7 @@ api_bp.register_blueprint(groups_bp)
 api_bp.register_blueprint(rooms_bp)
 api_bp.register_blueprint(subjects_bp)
 api_bp.register_blueprint(schedules_bp)
-api_bp.register_blueprint(semesters_bp)
\ No newline at end of file
+api_bp.register_blueprint(semesters_bp)
+api_bp.register_blueprint(jobs_bp)
+api_bp.register_blueprint(occupancy_bp)
+api_bp.register_blueprint(lessons_bp)
\ No newline at end of file
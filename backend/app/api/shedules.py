@@ -6,11 +6,10 @@ from app.models import Room
 from app.models import Group
 from backend.app import db
 from app.schedulers.genetic import GeneticScheduler
-from app.exporter import ExcelExporter
+from app.services.export_cache import open_schedule_export
 from app.services.shedule_services import ScheduleService
+from app.services.lesson_writer import bulk_insert_lessons
 import time
-import tempfile
-import os
 
 schedule_service = ScheduleService()
 
@@ -93,21 +92,11 @@ def generate_schedule():
         schedule.generation_time = generation_time
         schedule.conflicts_count = len(result['conflicts'])
         
-        # Сохраняем занятия
-        for lesson_data in result['lessons']:
-            lesson = Lesson(
-                schedule_id=schedule.id,
-                group_id=lesson_data['group_id'],
-                subject_id=lesson_data['subject_id'],
-                teacher_id=lesson_data['teacher_id'],
-                room_id=lesson_data['room_id'],
-                day=lesson_data['day'],
-                time_slot=lesson_data['time_slot']
-            )
-            db.session.add(lesson)
-        
         db.session.commit()
         
+        # Сохраняем занятия (чанками, в обход unit of work ORM)
+        bulk_insert_lessons(schedule.id, result['lessons'])
+        
         return jsonify({
             'success': True,
             'schedule': schedule.to_dict(),
@@ -128,39 +117,18 @@ def export_schedule(schedule_id):
         data = request.json
         
         export_type = data.get('type', 'group')  # group, teacher, room, consolidated
-        use_template = data.get('use_template', True)
-        
-        # Создаем временный файл
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.xlsx', delete=False) as tmp:
-            output_path = tmp.name
-        
-        # Экспортируем
-        exporter = ExcelExporter()
-        exporter.export_schedule(
-            schedule=schedule,
-            output_path=output_path,
-            export_type=export_type,
-            use_template=use_template
-        )
         
-        # Отправляем файл
-        response = send_file(
-            output_path,
+        # Файл из кэша экспорта (собирается при первом запросе для этой версии расписания)
+        handle, key, _ = open_schedule_export(schedule, export_type)
+        
+        return send_file(
+            handle,
             as_attachment=True,
             download_name=f'schedule_{schedule.id}_{export_type}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            etag=key,
         )
         
-        # Удаляем временный файл после отправки
-        @response.call_on_close
-        def cleanup():
-            try:
-                os.unlink(output_path)
-            except:
-                pass
-        
-        return response
-        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
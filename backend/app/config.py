@@ -25,6 +25,18 @@ class Config:
     GENETIC_MUTATION_RATE = 0.01
     GENETIC_CROSSOVER_RATE = 0.7
     GENETIC_ELITE_SIZE = 10
+    # Жесткий лимит времени генерации, сек (можно переопределить в запросе: time_limit)
+    GENERATION_TIME_LIMIT = int(os.environ.get('GENERATION_TIME_LIMIT') or 15 * 60)
+    
+    # Запись результатов генерации (строк занятий на одну транзакцию)
+    LESSON_BULK_CHUNK_SIZE = 5000
+    
+    # Кэш готовых файлов экспорта на диске (пустая строка — без кэша)
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'export_cache'))
+    EXPORT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    
+    # Экспорт пакетом: процессов в пуле сборки книг Excel (0 — по числу ядер)
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS') or 0)
     
     # Расписание
     DAYS_PER_WEEK = 5
@@ -37,6 +49,11 @@ class Config:
     # Redis (для кэширования)
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
+    # Кэш ответов GET: 'memory' (LRU в процессе), 'redis', 'fake' (для тестов), 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND') or 'memory'
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL = 24 * 60 * 60  # сек, только для Redis
+    
     # Celery (для фоновых задач)
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/1'
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/1'
@@ -59,6 +76,7 @@ class TestingConfig(Config):
     """Конфигурация для тестов"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///schedule_test.db'
+    RESPONSE_CACHE_BACKEND = 'fake'
 
 
 config = {
@@ -3,15 +3,104 @@
 """
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from collections import defaultdict
-from typing import List, Dict, Optional
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from collections import defaultdict, namedtuple
+from io import BytesIO
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_CENTER = Alignment(horizontal='center', vertical='center')
+_WRAP = Alignment(wrap_text=True, vertical='center', horizontal='center')
+
+
+def _fill(color: str) -> PatternFill:
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+# Именованные стили книги: создаются один раз на книгу, ячейки ссылаются на них по имени
+STYLES = {
+    'title': dict(font=Font(bold=True, size=14), alignment=_CENTER),
+    'week': dict(font=Font(bold=True, size=12), alignment=Alignment(horizontal='left', vertical='center')),
+    'big_title': dict(font=Font(bold=True, size=16), alignment=Alignment(horizontal='center')),
+    'info': dict(font=Font(size=10)),
+    'header': dict(font=Font(bold=True, color='FFFFFF', size=11), fill=_fill('366092'),
+                   border=_BORDER, alignment=_CENTER),
+    'time': dict(font=Font(bold=True, size=10), fill=_fill('F0F0F0'), border=_BORDER, alignment=_CENTER),
+    'slot': dict(border=_BORDER, alignment=_WRAP),
+    'group_lesson': dict(font=Font(size=10), fill=_fill('E3F2FD'), border=_BORDER, alignment=_WRAP),
+    'teacher_lesson': dict(fill=_fill('FFF3E0'), border=_BORDER, alignment=_WRAP),
+    'room_lesson': dict(fill=_fill('E8F5E9'), border=_BORDER, alignment=_WRAP),
+    'row': dict(border=_BORDER, alignment=Alignment(vertical='center')),
+}
+
+
+# Символы, запрещенные Excel в имени листа
+_SHEET_TITLE_INVALID = re.compile(r'[\\/*?:\[\]]')
+
+# Неделя и лист-сетка в виде простых кортежей (передаются в процессы пула при экспорте пакетом)
+ExportWeek = namedtuple('ExportWeek', 'week_number start_date end_date')
+GridSheet = namedtuple('GridSheet', 'entity_id name sheet_title title weeks info')
+
+
+def load_export_data(schedule, week_ids: Optional[Iterable[int]] = None,
+                     date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Данные для экспорта: плоские строки занятий одним запросом (или развернутые
+    шаблоны компактного расписания) и словари имен из ReferenceMaps.
+    Args:
+        week_ids: Только эти недели (None — все)
+        date_from, date_to: Точные границы по датам занятий
+    Returns:
+        (rows, refs)
+    """
+    from app.services.lesson_serializer import ReferenceMaps, lesson_rows
+
+    week_ids = None if week_ids is None else list(week_ids)
+    if schedule.is_compact:
+        from app.services.lesson_patterns import expand_patterns
+        from app.models import Week
+        from app import db
+        week_numbers = None
+        if week_ids is not None:
+            week_numbers = [n for (n,) in db.session.query(Week.week_number).filter(Week.id.in_(week_ids))]
+        rows = list(expand_patterns(schedule.id, week_numbers=week_numbers))
+    else:
+        rows = lesson_rows(schedule.id, week_ids=week_ids)
+    refs = ReferenceMaps(week_ids=week_ids if week_ids is not None else {r['week_id'] for r in rows})
+
+    def lesson_date(row):
+        return refs.weeks[row['week_id']].start_date + timedelta(days=row['day_of_week'])
+
+    rows = [
+        r for r in rows
+        if r['week_id'] in refs.weeks
+        and (date_from is None or lesson_date(r) >= date_from)
+        and (date_to is None or lesson_date(r) <= date_to)
+    ]
+    return rows, refs
 
 
 class ExcelExporter:
-    """Класс для экспорта расписания в Excel"""
-    
+    """
+    Класс для экспорта расписания в Excel.
+    Книга пишется в режиме write_only: строки листа уходят в файл по мере
+    добавления, а оформление задается именованными стилями, а не отдельными
+    объектами Font/PatternFill на каждую ячейку. Данные — плоские строки
+    занятий и словари имен (load_export_data), без ленивых связей ORM.
+    """
+
+    # вид листа -> (колонка занятия, словарь имен в ReferenceMaps, заголовок, имя листа, стиль ячейки)
+    GRID_KINDS = {
+        'group': ('group_id', 'groups', 'Расписание группы {name}', '{name}', 'group_lesson'),
+        'teacher': ('teacher_id', 'teachers', 'Расписание преподавателя: {name}', '{name}', 'teacher_lesson'),
+        'room': ('room_id', 'rooms', 'Расписание аудитории: {name}', 'Ауд. {name}', 'room_lesson'),
+    }
+
     def __init__(self):
         """Инициализация экспортера"""
         self.days = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
@@ -24,329 +113,190 @@ class ExcelExporter:
             "16:50-18:20",
             "18:30-20:00"
         ]
-        
-        # Стили
-        self.header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        self.header_font = Font(bold=True, color="FFFFFF", size=11)
-        self.title_font = Font(bold=True, size=14)
-        self.cell_font = Font(size=10)
-        self.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    
-    def export_schedule(self, schedule, output_path: str, export_type: str = 'group'):
+
+    def export_schedule(self, schedule, output_path: str, export_type: str = 'group',
+                        week_ids: Optional[Iterable[int]] = None,
+                        date_from: Optional[date] = None, date_to: Optional[date] = None):
         """
         Экспорт расписания в Excel
-        
+
         Args:
             schedule: Объект расписания из БД
             output_path: Путь для сохранения файла
             export_type: Тип экспорта ('group', 'teacher', 'room', 'consolidated')
+            week_ids: Только эти недели (None — весь семестр, каждая неделя отдельным блоком)
+            date_from, date_to: Только занятия в этом диапазоне дат
         """
-        if export_type == 'group':
-            self._export_by_groups(schedule, output_path)
-        elif export_type == 'teacher':
-            self._export_by_teachers(schedule, output_path)
-        elif export_type == 'room':
-            self._export_by_rooms(schedule, output_path)
-        elif export_type == 'consolidated':
-            self._export_consolidated(schedule, output_path)
+        rows, refs = load_export_data(schedule, week_ids, date_from, date_to)
+        if export_type == 'consolidated':
+            self._export_consolidated(schedule, rows, refs, output_path)
         else:
-            self._export_by_groups(schedule, output_path)
-    
-    def _export_by_groups(self, schedule, output_path: str):
-        """Экспорт по группам (отдельный лист для каждой группы)"""
-        wb = Workbook()
-        
-        # Группируем занятия по группам
-        groups_lessons = defaultdict(list)
-        for lesson in schedule.lessons:
-            groups_lessons[lesson.group.name].append(lesson)
-        
-        # Удаляем лист по умолчанию
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        # Создаем лист для каждой группы
-        for group_name, lessons in sorted(groups_lessons.items()):
-            ws = wb.create_sheet(title=group_name[:31])  # Excel ограничение 31 символ
-            self._fill_group_sheet(ws, lessons, group_name, schedule)
-        
-        wb.save(output_path)
-    
-    def _fill_group_sheet(self, ws, lessons: List, group_name: str, schedule):
-        """Заполнение листа для группы"""
-        
-        # Заголовок
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = f'Расписание группы {group_name}'
-        title_cell.font = self.title_font
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Дополнительная информация
-        ws['A2'] = f'Семестр: {schedule.semester or "Не указан"}'
-        ws['A2'].font = Font(size=10)
-        ws['D2'] = f'Учебный год: {schedule.academic_year or "Не указан"}'
-        ws['D2'].font = Font(size=10)
-        
-        # Шапка таблицы
-        headers = ['Время'] + self.days[:5]  # Только рабочие дни
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=4, column=col)
-            cell.value = header
-            cell.fill = self.header_fill
-            cell.font = self.header_font
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Временные слоты
-        for i, time in enumerate(self.times, start=5):
-            cell = ws.cell(row=i, column=1)
-            cell.value = time
-            cell.font = Font(bold=True, size=10)
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.fill = PatternFill(start_color="F0F0F0", end_color="F0F0F0", fill_type="solid")
-        
-        # Создаем матрицу расписания
-        schedule_matrix = {}
-        for lesson in lessons:
-            key = (lesson.day, lesson.time_slot)
-            schedule_matrix[key] = lesson
-        
-        # Заполняем занятия
-        for day in range(5):  # Только рабочие дни
-            for time_slot in range(7):  # 7 пар
-                row = 5 + time_slot
-                col = 2 + day
-                
-                cell = ws.cell(row=row, column=col)
-                cell.border = self.border
-                cell.alignment = Alignment(wrap_text=True, vertical='center', horizontal='center')
-                
-                if (day, time_slot) in schedule_matrix:
-                    lesson = schedule_matrix[(day, time_slot)]
-                    
-                    # Форматируем текст занятия
-                    cell_value = f"{lesson.subject.name}\n"
-                    cell_value += f"👨‍🏫 {lesson.teacher.name}\n"
-                    cell_value += f"🏫 ауд. {lesson.room.name}"
-                    
-                    cell.value = cell_value
-                    cell.font = self.cell_font
-                    cell.fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
-        
-        # Настройка ширины колонок
-        ws.column_dimensions['A'].width = 15
-        for col in ['B', 'C', 'D', 'E', 'F']:
-            ws.column_dimensions[col].width = 28
-        
-        # Высота строк
-        ws.row_dimensions[1].height = 30
-        ws.row_dimensions[2].height = 20
-        ws.row_dimensions[4].height = 25
-        for row in range(5, 12):
-            ws.row_dimensions[row].height = 65
-    
-    def _export_by_teachers(self, schedule, output_path: str):
-        """Экспорт по преподавателям"""
-        wb = Workbook()
-        
-        teachers_lessons = defaultdict(list)
-        for lesson in schedule.lessons:
-            teachers_lessons[lesson.teacher.name].append(lesson)
-        
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        for teacher_name, lessons in sorted(teachers_lessons.items()):
-            ws = wb.create_sheet(title=teacher_name[:31])
-            self._fill_teacher_sheet(ws, lessons, teacher_name, schedule)
-        
-        wb.save(output_path)
-    
-    def _fill_teacher_sheet(self, ws, lessons: List, teacher_name: str, schedule):
-        """Заполнение листа для преподавателя"""
-        # Аналогично группе, но с указанием групп
-        ws.merge_cells('A1:F1')
-        ws['A1'].value = f'Расписание преподавателя: {teacher_name}'
-        ws['A1'].font = self.title_font
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        # Шапка
-        headers = ['Время'] + self.days[:5]
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.fill = self.header_fill
-            cell.font = self.header_font
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Время
-        for i, time in enumerate(self.times, start=4):
-            cell = ws.cell(row=i, column=1)
-            cell.value = time
-            cell.font = Font(bold=True)
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Матрица
-        schedule_matrix = defaultdict(list)
-        for lesson in lessons:
-            key = (lesson.day, lesson.time_slot)
-            schedule_matrix[key].append(lesson)
-        
-        # Заполнение
-        for day in range(5):
-            for time_slot in range(7):
-                row = 4 + time_slot
-                col = 2 + day
-                cell = ws.cell(row=row, column=col)
-                cell.border = self.border
-                cell.alignment = Alignment(wrap_text=True, vertical='center', horizontal='center')
-                
-                if (day, time_slot) in schedule_matrix:
-                    lessons_list = schedule_matrix[(day, time_slot)]
-                    cell_value = ""
-                    for lesson in lessons_list:
-                        cell_value += f"{lesson.subject.name}\n"
-                        cell_value += f"Группа: {lesson.group.name}\n"
-                        cell_value += f"Ауд. {lesson.room.name}\n"
-                    
-                    cell.value = cell_value.strip()
-                    cell.fill = PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid")
-        
-        # Размеры
-        ws.column_dimensions['A'].width = 15
-        for col in ['B', 'C', 'D', 'E', 'F']:
-            ws.column_dimensions[col].width = 28
-        for row in range(4, 11):
-            ws.row_dimensions[row].height = 65
-    
-    def _export_by_rooms(self, schedule, output_path: str):
-        """Экспорт по аудиториям"""
-        wb = Workbook()
-        
-        rooms_lessons = defaultdict(list)
-        for lesson in schedule.lessons:
-            rooms_lessons[lesson.room.name].append(lesson)
-        
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb['Sheet'])
-        
-        for room_name, lessons in sorted(rooms_lessons.items()):
-            ws = wb.create_sheet(title=f"Ауд. {room_name}"[:31])
-            self._fill_room_sheet(ws, lessons, room_name, schedule)
-        
-        wb.save(output_path)
-    
-    def _fill_room_sheet(self, ws, lessons: List, room_name: str, schedule):
-        """Заполнение листа для аудитории"""
-        ws.merge_cells('A1:F1')
-        ws['A1'].value = f'Расписание аудитории: {room_name}'
-        ws['A1'].font = self.title_font
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        # Аналогично преподавателю
-        headers = ['Время'] + self.days[:5]
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.fill = self.header_fill
-            cell.font = self.header_font
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center')
-        
-        for i, time in enumerate(self.times, start=4):
-            cell = ws.cell(row=i, column=1)
-            cell.value = time
-            cell.font = Font(bold=True)
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center')
-        
-        schedule_matrix = {}
-        for lesson in lessons:
-            key = (lesson.day, lesson.time_slot)
-            schedule_matrix[key] = lesson
-        
-        for day in range(5):
-            for time_slot in range(7):
-                row = 4 + time_slot
-                col = 2 + day
-                cell = ws.cell(row=row, column=col)
-                cell.border = self.border
-                cell.alignment = Alignment(wrap_text=True, vertical='center', horizontal='center')
-                
-                if (day, time_slot) in schedule_matrix:
-                    lesson = schedule_matrix[(day, time_slot)]
-                    cell_value = f"{lesson.subject.name}\n"
-                    cell_value += f"Группа: {lesson.group.name}\n"
-                    cell_value += f"Преп.: {lesson.teacher.name}"
-                    cell.value = cell_value
-                    cell.fill = PatternFill(start_color="E8F5E9", end_color="E8F5E9", fill_type="solid")
-        
+            self._export_grids(schedule, rows, refs, output_path,
+                               export_type if export_type in self.GRID_KINDS else 'group')
+
+    # ---------- общие части ----------
+
+    def _workbook(self) -> Workbook:
+        """Пустая потоковая книга с зарегистрированными именованными стилями"""
+        wb = Workbook(write_only=True)
+        for name, attrs in STYLES.items():
+            wb.add_named_style(NamedStyle(name=name, **attrs))
+        return wb
+
+    def _cell(self, ws, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    @staticmethod
+    def _week_label(week) -> str:
+        return (f'Неделя {week.week_number} '
+                f'({week.start_date.strftime("%d.%m")} – {week.end_date.strftime("%d.%m.%Y")})')
+
+    def _lesson_text(self, kind: str, row: Mapping[str, Any], refs) -> str:
+        subject = refs.subjects.get(row['subject_id'])
+        if kind == 'group':
+            return f"{subject}\n👨‍🏫 {refs.teachers.get(row['teacher_id'])}\n🏫 ауд. {refs.rooms.get(row['room_id'])}"
+        if kind == 'teacher':
+            return f"{subject}\nГруппа: {refs.groups.get(row['group_id'])}\nАуд. {refs.rooms.get(row['room_id'])}"
+        return f"{subject}\nГруппа: {refs.groups.get(row['group_id'])}\nПреп.: {refs.teachers.get(row['teacher_id'])}"
+
+    def _write_grid_sheet(self, ws, title: str, weeks: List[Tuple[ExportWeek, Dict[tuple, str]]],
+                          lesson_style: str, info: Optional[List] = None):
+        """
+        Лист: заголовок и для каждой недели блок-сетка 5 дней × 7 пар.
+        Высоты строк и объединения задаются до записи строки — в режиме
+        write_only строка пишется в файл сразу.
+        Args:
+            weeks: [(ExportWeek, (день, пара) -> текст ячейки)]
+            info: Значения строки 2 (None — пустая строка)
+        """
         ws.column_dimensions['A'].width = 15
         for col in ['B', 'C', 'D', 'E', 'F']:
             ws.column_dimensions[col].width = 28
-        for row in range(4, 11):
-            ws.row_dimensions[row].height = 65
-    
-    def _export_consolidated(self, schedule, output_path: str):
-        """Сводное расписание (все занятия в одной таблице)"""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Сводное расписание"
-        
-        # Заголовок
-        ws.merge_cells('A1:F1')
-        ws['A1'] = f'СВОДНОЕ РАСПИСАНИЕ - {schedule.name}'
-        ws['A1'].font = Font(bold=True, size=16)
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        # Шапка таблицы
-        headers = ['Группа', 'День недели', 'Время', 'Предмет', 'Преподаватель', 'Аудитория']
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=3, column=col)
-            cell.value = header
-            cell.fill = self.header_fill
-            cell.font = self.header_font
-            cell.border = self.border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Сортируем занятия
-        sorted_lessons = sorted(
-            schedule.lessons,
-            key=lambda x: (x.group.name, x.day, x.time_slot)
-        )
-        
-        # Заполняем данные
-        for row_idx, lesson in enumerate(sorted_lessons, start=4):
-            cells_data = [
-                lesson.group.name,
-                self.days[lesson.day],
-                self.times[lesson.time_slot],
-                lesson.subject.name,
-                lesson.teacher.name,
-                lesson.room.name
+        row_idx = 0
+
+        def append(cells, height=None, merge=False):
+            nonlocal row_idx
+            row_idx += 1
+            if height:
+                ws.row_dimensions[row_idx].height = height
+            if merge:
+                ws.merged_cells.add(f'A{row_idx}:F{row_idx}')
+            ws.append(cells)
+
+        append([self._cell(ws, title, 'title')], height=30, merge=True)
+        append([self._cell(ws, value, 'info') if value is not None else None for value in info] if info else [],
+               height=20)
+        for week, matrix in weeks:
+            append([])
+            append([self._cell(ws, self._week_label(week), 'week')], height=20, merge=True)
+            headers = ['Время'] + [
+                f'{day}\n{(week.start_date + timedelta(days=i)).strftime("%d.%m")}'
+                for i, day in enumerate(self.days[:5])  # Только рабочие дни
             ]
-            
-            for col_idx, value in enumerate(cells_data, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                cell.value = value
-                cell.border = self.border
-                cell.alignment = Alignment(vertical='center')
-        
-        # Настройка ширины
-        ws.column_dimensions['A'].width = 12
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 15
-        ws.column_dimensions['D'].width = 30
-        ws.column_dimensions['E'].width = 25
-        ws.column_dimensions['F'].width = 12
-        
-        wb.save(output_path)
\ No newline at end of file
+            append([self._cell(ws, header, 'header') for header in headers], height=30)
+            for time_slot, time in enumerate(self.times):
+                cells = [self._cell(ws, time, 'time')]
+                for day in range(5):
+                    text = matrix.get((day, time_slot))
+                    cells.append(self._cell(ws, text, lesson_style) if text else self._cell(ws, None, 'slot'))
+                append(cells, height=65)
+
+    # ---------- по группам / преподавателям / аудиториям ----------
+
+    def grid_sheets(self, schedule, rows: List[Mapping[str, Any]], refs, kind: str,
+                    entity_ids: Optional[Iterable[int]] = None) -> List[GridSheet]:
+        """
+        Данные листов-сеток: по одному на группу / преподавателя / аудиторию, отсортированы по имени.
+        Только простые значения — листы можно передать в другой процесс (render_grid_workbook).
+        Args:
+            entity_ids: Только эти сущности (None — все, у которых есть занятия)
+        """
+        column, names_attr, title, sheet_title, _ = self.GRID_KINDS[kind]
+        names = getattr(refs, names_attr)
+        wanted = None if entity_ids is None else set(entity_ids)
+
+        # сущность -> неделя -> (день, пара) -> тексты занятий
+        cells = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        for row in rows:
+            if wanted is not None and row[column] not in wanted:
+                continue
+            cells[row[column]][row['week_id']][(row['day_of_week'], row['time_slot'])].append(
+                self._lesson_text(kind, row, refs)
+            )
+
+        info = None
+        if kind == 'group':
+            info = [f'Семестр: {schedule.semester or "Не указан"}', None, None,
+                    f'Учебный год: {schedule.academic_year or "Не указан"}']
+
+        sheets = []
+        for entity_id in sorted(cells, key=lambda i: str(names.get(i, i))):
+            name = names.get(entity_id, f'ID {entity_id}')
+            weeks = []
+            for week_id, matrix in sorted(cells[entity_id].items(), key=lambda item: refs.weeks[item[0]].week_number):
+                week = refs.weeks[week_id]
+                weeks.append((ExportWeek(week.week_number, week.start_date, week.end_date),
+                              {key: '\n'.join(texts) for key, texts in matrix.items()}))
+            sheet_name = _SHEET_TITLE_INVALID.sub('_', sheet_title.format(name=name))[:31]  # Excel ограничение 31 символ
+            sheets.append(GridSheet(entity_id, name, sheet_name,
+                                    title.format(name=name), weeks, info))
+        return sheets
+
+    def write_grid_workbook(self, sheets: List[GridSheet], kind: str, output):
+        """Книга из листов grid_sheets; output — путь или файловый объект"""
+        style = self.GRID_KINDS[kind][4]
+        wb = self._workbook()
+        for sheet in sheets:
+            ws = wb.create_sheet(title=sheet.sheet_title)
+            self._write_grid_sheet(ws, sheet.title, sheet.weeks, style, info=sheet.info)
+        if not sheets:
+            wb.create_sheet(title='Нет занятий')
+        wb.save(output)
+
+    def _export_grids(self, schedule, rows: List[Mapping[str, Any]], refs, output_path: str, kind: str):
+        """Лист на каждую группу / преподавателя / аудиторию, в листе — блок на каждую неделю"""
+        self.write_grid_workbook(self.grid_sheets(schedule, rows, refs, kind), kind, output_path)
+
+    # ---------- сводное ----------
+
+    def _export_consolidated(self, schedule, rows: List[Mapping[str, Any]], refs, output_path: str):
+        """Сводное расписание (все занятия в одной таблице, строки пишутся потоком)"""
+        wb = self._workbook()
+        ws = wb.create_sheet(title="Сводное расписание")
+
+        for col, width in zip('ABCDEFGH', (12, 8, 12, 15, 15, 30, 25, 12)):
+            ws.column_dimensions[col].width = width
+        ws.merged_cells.add('A1:H1')
+
+        ws.append([self._cell(ws, f'СВОДНОЕ РАСПИСАНИЕ - {schedule.name}', 'big_title')])
+        ws.append([])
+        headers = ['Группа', 'Неделя', 'Дата', 'День недели', 'Время', 'Предмет', 'Преподаватель', 'Аудитория']
+        ws.append([self._cell(ws, header, 'header') for header in headers])
+
+        groups, weeks = refs.groups, refs.weeks
+        sorted_rows = sorted(rows, key=lambda r: (
+            str(groups.get(r['group_id'], '')), weeks[r['week_id']].week_number, r['day_of_week'], r['time_slot']
+        ))
+        for row in sorted_rows:
+            week = weeks[row['week_id']]
+            ws.append([self._cell(ws, value, 'row') for value in (
+                groups.get(row['group_id']),
+                week.week_number,
+                (week.start_date + timedelta(days=row['day_of_week'])).strftime('%d.%m.%Y'),
+                self.days[row['day_of_week']],
+                self.times[row['time_slot']],
+                refs.subjects.get(row['subject_id']),
+                refs.teachers.get(row['teacher_id']),
+                refs.rooms.get(row['room_id']),
+            )])
+
+        wb.save(output_path)
+
+
+def render_grid_workbook(kind: str, sheets: List[GridSheet]) -> bytes:
+    """Собрать книгу из листов grid_sheets в памяти (функция для процессов пула экспорта)"""
+    buffer = BytesIO()
+    ExcelExporter().write_grid_workbook(sheets, kind, buffer)
+    return buffer.getvalue()
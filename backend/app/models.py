@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from sqlalchemy import event, UniqueConstraint, Enum
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
 import enum
 
 # ========== ВСПОМОГАТЕЛЬНЫЕ ТАБЛИЦЫ ==========
@@ -56,7 +58,7 @@ class Teacher(db.Model):
     max_hours_per_week = db.Column(db.Integer, default=20)
     min_hours_per_week = db.Column(db.Integer, default=0)
     
-    department = db.Column(db.String(100))
+    department = db.Column(db.String(100), index=True)
     position = db.Column(db.String(50))
     academic_degree = db.Column(db.String(50))
     
@@ -91,7 +93,11 @@ class Teacher(db.Model):
     def subject_list(self) -> List:
         return list(self.subjects.all())
     
-    def to_dict(self, include_details: bool = False) -> Dict[str, Any]:
+    def to_dict(self, include_details: bool = False, subjects: List[Dict] = None) -> Dict[str, Any]:
+        """
+        Args:
+            subjects: Заранее загруженные предметы (reference_loaders.teacher_subjects_map)
+        """
         result = {
             'id': self.id,
             'name': self.name,
@@ -102,7 +108,8 @@ class Teacher(db.Model):
             'department': self.department,
             'position': self.position,
             'is_active': self.is_active,
-            'subjects': [{'id': s.id, 'name': s.name, 'code': s.code} for s in self.subjects.all()],
+            'subjects': subjects if subjects is not None else
+                        [{'id': s.id, 'name': s.name, 'code': s.code} for s in self.subjects.all()],
         }
         if include_details:
             result['notes'] = self.notes
@@ -183,6 +190,10 @@ class Semester(db.Model):
 class Week(db.Model):
     """Неделя"""
     __tablename__ = 'week'
+    __table_args__ = (
+        # Поиск недели по номеру внутри семестра (get_schedule_week)
+        db.Index('ix_week_semester_number', 'semester_id', 'week_number'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     semester_id = db.Column(db.Integer, db.ForeignKey('semester.id'), nullable=False)
@@ -315,7 +326,7 @@ class Room(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True, index=True)
-    building = db.Column(db.String(50))
+    building = db.Column(db.String(50), index=True)
     floor = db.Column(db.Integer)
     capacity = db.Column(db.Integer, nullable=False)
     room_type = db.Column(db.String(50))
@@ -331,7 +342,11 @@ class Room(db.Model):
     def equipment_list(self) -> List[str]:
         return [eq.equipment_type for eq in self.equipment.all()]
     
-    def to_dict(self, include_details: bool = False) -> Dict[str, Any]:
+    def to_dict(self, include_details: bool = False, equipment: List[str] = None) -> Dict[str, Any]:
+        """
+        Args:
+            equipment: Заранее загруженное оборудование (reference_loaders.room_equipment_map)
+        """
         result = {
             'id': self.id,
             'name': self.name,
@@ -340,7 +355,7 @@ class Room(db.Model):
             'room_type': self.room_type,
             'is_special': self.is_special,
             'is_active': self.is_active,
-            'equipment': self.equipment_list
+            'equipment': self.equipment_list if equipment is None else equipment
         }
         if include_details:
             result['notes'] = self.notes
@@ -431,13 +446,19 @@ class Group(db.Model):
     
     @hybrid_property
     def total_hours_per_week(self) -> int:
-        total = 0
-        for gs in self.group_subjects.all():
-            for load in gs.lesson_type_loads.all():
-                total += load.hours_per_week
-        return total
-    
-    def to_dict(self, include_details: bool = False) -> Dict[str, Any]:
+        # Одним агрегатом в БД, без обхода связей
+        total = db.session.query(db.func.sum(LessonTypeLoad.hours_per_week)).join(
+            GroupSubject, GroupSubject.id == LessonTypeLoad.group_subject_id
+        ).filter(GroupSubject.group_id == self.id).scalar()
+        return int(total or 0)
+    
+    def to_dict(self, include_details: bool = False, subjects: List[Dict] = None,
+                total_hours_per_week: int = None) -> Dict[str, Any]:
+        """
+        Args:
+            subjects, total_hours_per_week: Заранее загруженные данные для списков
+                (reference_loaders.group_subjects_map / group_hours_map)
+        """
         result = {
             'id': self.id,
             'name': self.name,
@@ -446,8 +467,10 @@ class Group(db.Model):
             'is_active': self.is_active,
         }
         if include_details:
-            result['subjects'] = [gs.to_dict() for gs in self.group_subjects.all()]
-            result['total_hours_per_week'] = self.total_hours_per_week
+            result['subjects'] = subjects if subjects is not None else \
+                [gs.to_dict() for gs in self.group_subjects.all()]
+            result['total_hours_per_week'] = self.total_hours_per_week \
+                if total_hours_per_week is None else total_hours_per_week
         return result
     
     def __repr__(self):
@@ -492,8 +515,9 @@ class Schedule(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    semester = db.Column(db.String(20))
+    semester = db.Column(db.String(20))  # подпись для отображения; связь — semester_id
     academic_year = db.Column(db.String(20))
+    semester_id = db.Column(db.Integer, db.ForeignKey('semester.id'), index=True)
     status = db.Column(db.String(20), default='draft', index=True)
     
     fitness_score = db.Column(db.Float)
@@ -502,28 +526,52 @@ class Schedule(db.Model):
     generation_params = db.Column(db.JSON)
     conflicts_count = db.Column(db.Integer, default=0)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     activated_at = db.Column(db.DateTime)
     created_by = db.Column(db.String(100))
     notes = db.Column(db.Text)
-    
-    # Связь на новую единую модель Lesson
+    # 'rows' — по строке Lesson на каждое занятие каждой недели,
+    # 'compact' — шаблоны LessonPattern + исключения по неделям
+    storage_mode = db.Column(db.String(10), default='rows', server_default='rows', nullable=False)
+    # Счетчик изменений занятий (для ETag): увеличивается при правке Lesson/LessonPattern
+    data_version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    # Связь на новую единую модель Lesson.
+    # passive_deletes: строки удаляет БД (ON DELETE CASCADE), ORM их не загружает
     lessons = db.relationship(
         'Lesson',
         back_populates='schedule',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy='dynamic'
     )
     
+    patterns = db.relationship(
+        'LessonPattern',
+        back_populates='schedule',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='dynamic'
+    )
+    
+    @property
+    def is_compact(self) -> bool:
+        return self.storage_mode == 'compact'
+    
     @hybrid_property
     def lessons_count(self) -> int:
+        if self.is_compact:
+            from app.services.lesson_patterns import count_compact_lessons
+            return count_compact_lessons(self.id)
         return self.lessons.count()
     
     def activate(self):
+        same_semester = Schedule.semester_id == self.semester_id if self.semester_id \
+            else Schedule.semester == self.semester
         Schedule.query.filter(
             Schedule.id != self.id,
-            Schedule.semester == self.semester,
+            same_semester,
             Schedule.status == 'active'
         ).update({'status': 'archived'})
         
@@ -531,54 +579,39 @@ class Schedule(db.Model):
         self.activated_at = datetime.utcnow()
         db.session.commit()
     
-    def to_dict(self, include_lessons: bool = False) -> Dict[str, Any]:
+    def to_dict(self, include_lessons: bool = False, lessons_count: int = None) -> Dict[str, Any]:
+        """
+        Args:
+            lessons_count: Заранее посчитанное число занятий (для списков,
+                см. schedule_ops.lessons_counts) — иначе отдельный COUNT
+        """
         result = {
             'id': self.id,
             'name': self.name,
             'semester': self.semester,
+            'semester_id': self.semester_id,
             'academic_year': self.academic_year,
             'status': self.status,
             'fitness_score': self.fitness_score,
-            'lessons_count': self.lessons_count,
+            'lessons_count': self.lessons_count if lessons_count is None else lessons_count,
             'conflicts_count': self.conflicts_count,
             'generation_method': self.generation_method,
             'generation_time': self.generation_time,
+            'storage_mode': self.storage_mode,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
         if include_lessons:
-            result['lessons'] = [l.to_dict() for l in self.lessons.all()]
+            from app.services.lesson_patterns import expand_patterns
+            from app.services.lesson_serializer import lesson_rows, serialize_lessons
+            rows = expand_patterns(self.id) if self.is_compact else lesson_rows(self.id)
+            result['lessons'] = serialize_lessons(rows)
         return result
     
     def get_conflicts(self) -> List[Dict]:
-        """Базовая проверка конфликтов"""
-        from collections import defaultdict
-        conflicts = []
-        time_slots_map = defaultdict(list)
-        
-        for lesson in self.lessons.all():
-            key = (lesson.week_id, lesson.day_of_week, lesson.time_slot)
-            time_slots_map[key].append(lesson)
-        
-        for (week, day, slot), slot_lessons in time_slots_map.items():
-            if len(slot_lessons) <= 1:
-                continue
-                
-            # Проверка учителей
-            teachers = [l.teacher_id for l in slot_lessons]
-            if len(teachers) != len(set(teachers)):
-                conflicts.append({'type': 'teacher', 'week': week, 'day': day, 'slot': slot})
-                
-            # Проверка аудиторий
-            rooms = [l.room_id for l in slot_lessons]
-            if len(rooms) != len(set(rooms)):
-                conflicts.append({'type': 'room', 'week': week, 'day': day, 'slot': slot})
-                
-            # Проверка групп
-            groups = [l.group_id for l in slot_lessons]
-            if len(groups) != len(set(groups)):
-                conflicts.append({'type': 'group', 'week': week, 'day': day, 'slot': slot})
-                
-        return conflicts
+        """Все конфликты расписания (агрегаты GROUP BY ... HAVING count(*) > 1 в БД)"""
+        from app.services.conflicts import conflicts_query, describe_conflicts
+        query, columns = conflicts_query(self)
+        return describe_conflicts(query.order_by(*columns).all())
 
 
 class Lesson(db.Model):
@@ -587,9 +620,20 @@ class Lesson(db.Model):
     Умная модель с поддержкой недель, типов и точного времени.
     """
     __tablename__ = 'lesson'
+    __table_args__ = (
+        # Покрывает фильтры по schedule_id, (schedule_id, week_id) и группировку
+        # по слоту (schedule_id, week_id, day_of_week, time_slot) при поиске конфликтов
+        db.Index('ix_lesson_schedule_week_slot', 'schedule_id', 'week_id', 'day_of_week', 'time_slot'),
+        # Расписание одного преподавателя / группы / аудитории (по неделям) и поиск
+        # их конфликтов: GROUP BY (week_id, day_of_week, time_slot, <сущность>) идет
+        # по покрывающему индексу без сортировки
+        db.Index('ix_lesson_schedule_teacher_slot', 'schedule_id', 'teacher_id', 'week_id', 'day_of_week', 'time_slot'),
+        db.Index('ix_lesson_schedule_group_slot', 'schedule_id', 'group_id', 'week_id', 'day_of_week', 'time_slot'),
+        db.Index('ix_lesson_schedule_room_slot', 'schedule_id', 'room_id', 'week_id', 'day_of_week', 'time_slot'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id', ondelete='CASCADE'), nullable=False)
     week_id = db.Column(db.Integer, db.ForeignKey('week.id'), nullable=False)
     
     group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False)
@@ -648,8 +692,163 @@ class Lesson(db.Model):
         return f'<Lesson W{self.week.week_number if self.week else "?"} {self.subject.name}>'
 
 
+class LessonPattern(db.Model):
+    """
+    Повторяющееся занятие компактного расписания.
+    Одна строка заменяет до ~18 строк Lesson: (день, пара) на диапазоне
+    недель week_from..week_to, при необходимости только по четным/нечетным.
+    """
+    __tablename__ = 'lesson_pattern'
+    __table_args__ = (
+        db.Index('ix_lesson_pattern_schedule_weeks', 'schedule_id', 'week_from', 'week_to'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id', ondelete='CASCADE'), nullable=False)
+    semester_id = db.Column(db.Integer, db.ForeignKey('semester.id'), nullable=False)
+    
+    group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teacher.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    lesson_type_id = db.Column(db.Integer, db.ForeignKey('lesson_type.id'), nullable=False)
+    
+    day_of_week = db.Column(db.Integer, nullable=False)
+    time_slot = db.Column(db.Integer, nullable=False)
+    week_from = db.Column(db.Integer, nullable=False)  # номера недель семестра, включительно
+    week_to = db.Column(db.Integer, nullable=False)
+    week_parity = db.Column(db.Integer)  # None — каждую неделю, 1 — нечетные, 0 — четные
+    is_online = db.Column(db.Boolean, default=False)
+    
+    schedule = db.relationship('Schedule', back_populates='patterns')
+    exceptions = db.relationship(
+        'LessonPatternException',
+        back_populates='pattern',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='dynamic'
+    )
+    
+    def week_numbers(self) -> List[int]:
+        step = 1 if self.week_parity is None else 2
+        return list(range(self.week_from, self.week_to + 1, step))
+
+
+class LessonPatternException(db.Model):
+    """Исключение из шаблона на конкретной неделе: отмена или перенос"""
+    __tablename__ = 'lesson_pattern_exception'
+    __table_args__ = (UniqueConstraint('pattern_id', 'week_number', name='unique_pattern_week'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pattern_id = db.Column(db.Integer, db.ForeignKey('lesson_pattern.id', ondelete='CASCADE'), nullable=False)
+    week_number = db.Column(db.Integer, nullable=False)
+    is_cancelled = db.Column(db.Boolean, default=True, nullable=False)
+    
+    # Переопределения для переноса (None — как в шаблоне)
+    day_of_week = db.Column(db.Integer)
+    time_slot = db.Column(db.Integer)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teacher.id'))
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'))
+    
+    pattern = db.relationship('LessonPattern', back_populates='exceptions')
+
+
+class DataVersion(db.Model):
+    """
+    Версии наборов данных для ETag и кэша ответов.
+    scope='reference' — справочники (преподаватели, аудитории, группы, недели...)
+    """
+    __tablename__ = 'data_version'
+    
+    scope = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class TimetableWeek(db.Model):
+    """
+    Готовая сетка недели (read model, см. services/timetable_read_model.py).
+    entity_type: 'schedule' (все занятия, entity_id=0), 'group', 'teacher', 'room'
+    """
+    __tablename__ = 'timetable_week'
+    __table_args__ = (
+        UniqueConstraint('schedule_id', 'week_id', 'entity_type', 'entity_id', name='unique_timetable_week_entity'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id', ondelete='CASCADE'), nullable=False)
+    week_id = db.Column(db.Integer, db.ForeignKey('week.id', ondelete='CASCADE'), nullable=False)
+    week_number = db.Column(db.Integer, nullable=False)
+    entity_type = db.Column(db.String(10), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.Text, nullable=False)  # JSON ответа эндпоинта недели
+    reference_version = db.Column(db.Integer, nullable=False, default=0)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # ========== СОБЫТИЯ ==========
 
+# Изменение этих моделей меняет ответы со справочными данными
+REFERENCE_MODELS = (
+    Teacher, TeacherUnavailableSlot, TeacherPreferredSlot, Room, RoomEquipment,
+    Subject, SubjectEquipment, Group, GroupSubject, LessonTypeLoad, LessonType,
+    LessonTypeConstraint, AcademicYear, Semester, Week,
+)
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_data_versions(session, flush_context, instances):
+    """
+    Увеличить версии данных в той же транзакции, что и изменения (ORM-путь).
+    Core-записи мимо ORM это событие не видит и должны обновлять Schedule сами
+    (как bulk_insert_lessons и move_lesson_series).
+    """
+    reference_changed = False
+    schedule_ids = set()
+    stale_weeks = set()     # (schedule_id, week_id) — устаревшие сетки недель
+    stale_numbers = set()   # (schedule_id, week_number)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, REFERENCE_MODELS):
+            reference_changed = True
+        elif isinstance(obj, Lesson) and obj.schedule_id:
+            schedule_ids.add(obj.schedule_id)
+            history = get_history(obj, 'week_id')
+            for week_id in {obj.week_id, *history.deleted}:
+                if week_id:
+                    stale_weeks.add((obj.schedule_id, week_id))
+        elif isinstance(obj, LessonPattern) and obj.schedule_id:
+            schedule_ids.add(obj.schedule_id)
+            week_from = min([obj.week_from, *get_history(obj, 'week_from').deleted])
+            week_to = max([obj.week_to, *get_history(obj, 'week_to').deleted])
+            stale_numbers.update((obj.schedule_id, n) for n in range(week_from, week_to + 1))
+        elif isinstance(obj, LessonPatternException) and obj.pattern is not None:
+            schedule_ids.add(obj.pattern.schedule_id)
+            stale_numbers.add((obj.pattern.schedule_id, obj.week_number))
+    
+    connection = session.connection()
+    if reference_changed:
+        table = DataVersion.__table__
+        result = connection.execute(
+            table.update().where(table.c.scope == 'reference')
+            .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(scope='reference', version=1, updated_at=datetime.utcnow()))
+    if schedule_ids:
+        table = Schedule.__table__
+        connection.execute(
+            table.update().where(table.c.id.in_(schedule_ids))
+            .values(data_version=table.c.data_version + 1)
+        )
+    # Сетки затронутых недель пересоберутся при следующем чтении
+    table = TimetableWeek.__table__
+    for schedule_id, week_id in stale_weeks:
+        connection.execute(table.delete().where(table.c.schedule_id == schedule_id, table.c.week_id == week_id))
+    for schedule_id, week_number in stale_numbers:
+        connection.execute(table.delete().where(table.c.schedule_id == schedule_id, table.c.week_number == week_number))
+
+
+
 @event.listens_for(Schedule, 'before_update')
 def update_schedule_timestamp(mapper, connection, target):
     target.updated_at = datetime.utcnow()
\ No newline at end of file
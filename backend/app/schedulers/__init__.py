@@ -1,5 +1,5 @@
-from .base import BaseScheduler
+from .base import BaseScheduler, CancellationToken
 from .genetic import GeneticScheduler
 from .csp import CSPScheduler
 
-__all__ = ['BaseScheduler', 'GeneticScheduler', 'CSPScheduler']
\ No newline at end of file
+__all__ = ['BaseScheduler', 'CancellationToken', 'GeneticScheduler', 'CSPScheduler']
\ No newline at end of file
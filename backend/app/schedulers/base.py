@@ -1,20 +1,67 @@
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from collections import defaultdict
 
+class CancellationToken:
+    """
+    Кооперативная отмена генерации.
+    Планировщик периодически вызывает should_stop(); отменить можно из другого
+    потока (DELETE /jobs/<id>) или по истечении дедлайна.
+    """
+    
+    def __init__(self, time_limit: Optional[float] = None):
+        """
+        Args:
+            time_limit: Жесткий лимит по времени в секундах (None — без лимита)
+        """
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + time_limit if time_limit else None
+        self.reason = None  # 'cancelled' | 'timeout'
+    
+    def cancel(self):
+        if not self._event.is_set():
+            self.reason = 'cancelled'
+            self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+    
+    def should_stop(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'timeout'
+            self._event.set()
+            return True
+        return False
+
+
 class BaseScheduler(ABC):
     """
     Абстрактный базовый класс для всех алгоритмов планирования.
     Определяет интерфейс, которому должны следовать CSP и Genetic.
     """
     
-    def __init__(self, teachers: List, rooms: List, groups: List):
+    # Как часто (в итерациях) горячий цикл заглядывает в часы
+    progress_check_interval = 2000
+    # Минимальный интервал между событиями прогресса, сек
+    progress_min_period = 0.5
+    
+    def __init__(self, teachers: List, rooms: List, groups: List,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 cancel_token: Optional[CancellationToken] = None):
         """
         Инициализация общими данными.
         Args:
             teachers: Список объектов Teacher (из БД)
             rooms: Список объектов Room (из БД)
             groups: Список объектов Group (из БД)
+            progress_callback: Получатель событий прогресса (например, GenerationJob.publish)
+            cancel_token: Токен отмены / дедлайна; при срабатывании возвращается лучший
+                найденный результат
         """
         # Создаем словари для быстрого доступа по ID
         self.teachers = {t.id: t for t in teachers}
@@ -24,6 +71,68 @@ class BaseScheduler(ABC):
         # Константы (можно вынести в конфиг)
         self.days_per_week = 5
         self.slots_per_day = 7
+        
+        self.progress_callback = progress_callback
+        self.cancel_token = cancel_token
+        self.stop_reason = None
+        self._start_progress()
+    
+    def _should_stop(self) -> bool:
+        """Проверить токен отмены (звать не на каждой итерации, а раз в progress_check_interval)"""
+        if self.cancel_token is not None and self.cancel_token.should_stop():
+            self.stop_reason = self.cancel_token.reason
+            return True
+        return False
+    
+    def _stop_conflict(self) -> Dict[str, Any]:
+        """Запись для списка conflicts о досрочной остановке"""
+        messages = {
+            'cancelled': 'Генерация отменена, сохранен частичный результат',
+            'timeout': 'Истек лимит времени, сохранен частичный результат',
+        }
+        return {'type': self.stop_reason, 'message': messages.get(self.stop_reason, 'Генерация остановлена')}
+    
+    def _start_progress(self):
+        """Сбросить счетчики прогресса (вызывается в начале generate)"""
+        self._progress_started = time.monotonic()
+        self._progress_last_emit = self._progress_started
+        self._progress_last_iterations = 0
+    
+    def _report_progress(self, iterations: int, total_iterations: Optional[int] = None,
+                         force: bool = False, **stats) -> None:
+        """
+        Отправить событие прогресса подписчику.
+        Не чаще progress_min_period, если не указан force. Сам горячий цикл
+        должен звать этот метод раз в progress_check_interval итераций.
+        Args:
+            iterations: Сколько итераций выполнено
+            total_iterations: Лимит итераций (для оценки ETA)
+            stats: Доп. метрики алгоритма (depth, max_progress; best_fitness — только у генетического)
+        """
+        if self.progress_callback is None:
+            return
+        now = time.monotonic()
+        window = now - self._progress_last_emit
+        if not force and window < self.progress_min_period:
+            return
+        
+        rate = (iterations - self._progress_last_iterations) / window if window > 0 else 0.0
+        # ETA — верхняя граница: время до исчерпания лимита итераций
+        eta = None
+        if total_iterations and rate > 0:
+            eta = max(total_iterations - iterations, 0) / rate
+        
+        self._progress_last_emit = now
+        self._progress_last_iterations = iterations
+        self.progress_callback({
+            'type': 'progress',
+            'scheduler': type(self).__name__,
+            'iterations': iterations,
+            'iterations_per_sec': round(rate, 1),
+            'elapsed': round(now - self._progress_started, 2),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            **stats,
+        })
     
     @abstractmethod
     def generate(self) -> Dict[str, Any]:
@@ -35,6 +144,7 @@ class BaseScheduler(ABC):
                 - fitness: Оценка качества
                 - conflicts: Список найденных конфликтов
                 - time: Время выполнения
+                - stop_reason: 'cancelled' / 'timeout', если поиск остановлен досрочно
         """
         pass
     
@@ -1,10 +1,10 @@
 import random
 import time
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional, Generator
+from typing import List, Dict, Tuple, Optional, Generator, Callable, Any
 from collections import defaultdict
 
-from app.schedulers.base import BaseScheduler
+from app.schedulers.base import BaseScheduler, CancellationToken
 from app.models import Semester, Week, LessonType, Group, Teacher, Room, Subject, LessonTypeConstraint
 
 class TimeSlot:
@@ -29,7 +29,9 @@ class CSPScheduler(BaseScheduler):
     CSP (Constraint Satisfaction Problem) планировщик с бэктрекингом.
     """
     def __init__(self, semester_id: int, max_iterations: int = 500000, 
-                 max_lessons_per_day: int = 5):
+                 max_lessons_per_day: int = 5,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 cancel_token: Optional[CancellationToken] = None):
         
         self.semester_id = semester_id
         self.max_iterations = max_iterations
@@ -38,6 +40,7 @@ class CSPScheduler(BaseScheduler):
         self.iterations = 0
         self.solution = []
         self.max_progress_index = 0
+        self._next_progress_check = 0
         
         self.teacher_busy = defaultdict(set)
         self.room_busy = defaultdict(set)
@@ -50,7 +53,8 @@ class CSPScheduler(BaseScheduler):
 
         self._load_data()
         
-        super().__init__(self.db_teachers, self.db_rooms, self.db_groups)
+        super().__init__(self.db_teachers, self.db_rooms, self.db_groups,
+                         progress_callback=progress_callback, cancel_token=cancel_token)
 
     def _load_data(self):
         """Загрузка данных из БД и подготовка кэшей"""
@@ -88,16 +92,28 @@ class CSPScheduler(BaseScheduler):
         if not self.assignments_to_schedule:
             return {'lessons': [], 'fitness': 1.0, 'conflicts': [], 'time': 0}
 
+        self._start_progress()
+        self._next_progress_check = self.progress_check_interval
         success = self._backtrack(0)
+        stop_reason = self.stop_reason
         duration = time.time() - start_time
+        self._progress_tick(len(self.solution), force=True)
         
-        if success:
+        if success or stop_reason:
             result_lessons = [{'week_id': item['slot'].week_id, 'day_of_week': item['slot'].day, 'time_slot': item['slot'].time,
                                'group_id': item['task'].group_id, 'subject_id': item['task'].subject_id,
                                'teacher_id': item['teacher_id'], 'room_id': item['room_id'],
                                'lesson_type_id': item['task'].lesson_type_id} for item in self.solution]
+        if success:
             print(f"✅ CSP: Успех! За {duration:.2f}с")
             return {'lessons': result_lessons, 'fitness': 1.0, 'conflicts': [], 'time': duration, 'iterations': self.iterations}
+        elif stop_reason:
+            # При отмене/таймауте стек поиска не раскручивается, self.solution —
+            # текущее частичное назначение без конфликтов
+            fitness = len(self.solution) / len(self.assignments_to_schedule)
+            print(f"⏹️ CSP: Остановлено ({stop_reason}) за {duration:.2f}с. Размещено {fitness*100:.1f}% занятий.")
+            return {'lessons': result_lessons, 'fitness': fitness, 'conflicts': [self._stop_conflict()], 'time': duration,
+                    'iterations': self.iterations, 'stop_reason': stop_reason}
         else:
             max_progress = (self.max_progress_index / len(self.assignments_to_schedule)) if self.assignments_to_schedule else 0
             print(f"❌ CSP: Не удалось найти полное решение. Максимальный прогресс: {max_progress*100:.1f}%.")
@@ -190,18 +206,37 @@ class CSPScheduler(BaseScheduler):
         if last['prev_last_day'] is not None: self.group_subject_type_last_day_index[key] = last['prev_last_day']
         elif key in self.group_subject_type_last_day_index: del self.group_subject_type_last_day_index[key]
 
+    def _progress_tick(self, depth: int, force: bool = False) -> bool:
+        """
+        Периодический отчет о ходе поиска (консоль + события прогресса).
+        Returns: True, если поиск нужно остановить (отмена или дедлайн)
+        """
+        self._next_progress_check = self.iterations + self.progress_check_interval
+        total = len(self.assignments_to_schedule)
+        progress = self.max_progress_index / total if total else 0.0
+        if self.iterations % 50000 == 0:
+            print(f"   ... итерация {self.iterations}, макс. прогресс {progress*100:.1f}%")
+        self._report_progress(
+            self.iterations, total_iterations=self.max_iterations, force=force,
+            depth=depth, total_tasks=total,
+            max_progress=round(progress, 4),
+        )
+        return self._should_stop()
+
     def _backtrack(self, idx: int) -> bool:
         self.iterations += 1
-        self.max_progress_index = max(self.max_progress_index, idx)
+        if idx > self.max_progress_index: self.max_progress_index = idx
         if self.iterations > self.max_iterations: return False
         if idx >= len(self.assignments_to_schedule): return True
-        if self.iterations > 0 and self.iterations % 50000 == 0:
-            progress = (self.max_progress_index / len(self.assignments_to_schedule)) * 100
-            print(f"   ... итерация {self.iterations}, макс. прогресс {progress:.1f}%")
+        # Единственная проверка на горячем пути — сравнение двух int;
+        # часы и токен отмены смотрим раз в progress_check_interval итераций
+        if self.iterations >= self._next_progress_check and self._progress_tick(idx): return False
         task = self.assignments_to_schedule[idx]
         for slot, t_id, r_id in self._get_domain(task):
             self._assign(task, slot, t_id, r_id)
             if self._backtrack(idx + 1): return True
+            # Остановка: выходим, не снимая назначений — это лучший результат
+            if self.stop_reason: return False
             self._unassign()
         if idx == self.max_progress_index:
             group = self.groups.get(task.group_id); subject = Subject.query.get(task.subject_id); l_type = self.lesson_types.get(task.lesson_type_id)
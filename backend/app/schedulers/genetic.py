@@ -20,8 +20,10 @@ class GeneticScheduler(BaseScheduler):
     """
     Генетический алгоритм планирования.
     """
-    def __init__(self, teachers, rooms, groups, population_size=100, generations=500, mutation_rate=0.01):
-        super().__init__(teachers, rooms, groups)
+    def __init__(self, teachers, rooms, groups, population_size=100, generations=500, mutation_rate=0.01,
+                 progress_callback=None, cancel_token=None):
+        super().__init__(teachers, rooms, groups, progress_callback=progress_callback,
+                         cancel_token=cancel_token)
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
@@ -54,8 +56,11 @@ class GeneticScheduler(BaseScheduler):
         
         # Важно: это просто пример, реальная генетика сложнее
         db_groups = Group.query.filter_by(is_active=True).all()
+        self._start_progress()
         
-        for group in db_groups:
+        for group_idx, group in enumerate(db_groups, start=1):
+            if self._should_stop():
+                break
             for gs in group.group_subjects:
                 for load in gs.lesson_type_loads:
                     if load.hours_per_week > 0:
@@ -73,14 +78,22 @@ class GeneticScheduler(BaseScheduler):
                             'room_id': room_id,
                             'lesson_type_id': load.lesson_type_id
                         })
+            self._report_progress(group_idx, total_iterations=len(db_groups),
+                                  depth=group_idx, max_progress=round(group_idx / len(db_groups), 4))
         
         # Проверка конфликтов нашим базовым методом
         conflicts = self.check_conflicts(lessons)
         fitness = 1.0 / (len(conflicts) + 1)
+        self._report_progress(len(db_groups), total_iterations=len(db_groups), force=True,
+                              depth=len(db_groups), max_progress=1.0, best_fitness=fitness)
+        
+        if self.stop_reason:
+            conflicts.append(self._stop_conflict())
         
         return {
             'lessons': lessons,
             'fitness': fitness,
             'conflicts': conflicts,
-            'time': 0.1
+            'time': 0.1,
+            'stop_reason': self.stop_reason
         }
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Сервисный слой: логика, которую используют несколько эндпоинтов
+(фоновые задачи генерации, массовая запись занятий и т.п.).
+"""
@@ -0,0 +1,103 @@
+"""
+Колоночный формат расписания.
+Вместо списка словарей (с именами группы, предмета, преподавателя, аудитории
+и полным lesson_type в каждом занятии) — параллельные массивы id по колонкам
+и словари упомянутых сущностей, переданные один раз:
+
+    {
+        "format": "columnar",
+        "count": 3,
+        "columns": {"week_id": [..], "day_of_week": [..], "group_id": [..], ...},
+        "refs": {"groups": {"1": "ИС-21"}, "weeks": {"5": {...}}, ...}
+    }
+
+Выбирается параметром ?format=compact (JSON) / ?format=msgpack или заголовком
+Accept: application/vnd.schedule.columnar+json / application/msgpack.
+MessagePack — опционально, если установлен пакет msgpack.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from flask import request, current_app, Response, jsonify, make_response
+
+from app.services.lesson_serializer import ReferenceMaps
+
+try:
+    import msgpack
+except ImportError:  # бинарный формат недоступен, остается колоночный JSON
+    msgpack = None
+
+COLUMNAR_MIMETYPE = 'application/vnd.schedule.columnar+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+COLUMNS = (
+    'id', 'week_id', 'day_of_week', 'time_slot', 'group_id', 'subject_id',
+    'teacher_id', 'room_id', 'lesson_type_id', 'is_online',
+)
+
+# колонка -> (ключ в refs, атрибут ReferenceMaps)
+REF_COLUMNS = {
+    'group_id': 'groups', 'subject_id': 'subjects', 'teacher_id': 'teachers',
+    'room_id': 'rooms', 'lesson_type_id': 'lesson_types',
+}
+
+
+def _accepts(mimetype: str) -> bool:
+    # Явно перечисленный тип; */* не считается
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def requested_format() -> Optional[str]:
+    """None — обычный JSON, 'json' — колоночный JSON, 'msgpack' — колоночный MessagePack"""
+    fmt = request.args.get('format')
+    if fmt == 'msgpack' or (fmt is None and _accepts(MSGPACK_MIMETYPE)):
+        return 'msgpack'
+    if fmt == 'compact' or (fmt is None and _accepts(COLUMNAR_MIMETYPE)):
+        return 'json'
+    return None
+
+
+def columnar_payload(rows: Iterable[Mapping[str, Any]], refs: ReferenceMaps) -> Dict[str, Any]:
+    """Строки занятий -> колонки + словари только тех сущностей, что встречаются"""
+    columns = {name: [] for name in COLUMNS}
+    used = {name: set() for name in REF_COLUMNS}
+    used_weeks = set()
+    count = 0
+    for row in rows:
+        if row['week_id'] not in refs.weeks:
+            continue
+        for name in COLUMNS:
+            columns[name].append(row.get(name))
+        for name in REF_COLUMNS:
+            if row[name] is not None:
+                used[name].add(row[name])
+        used_weeks.add(row['week_id'])
+        count += 1
+    columns['is_online'] = [1 if value else 0 for value in columns['is_online']]
+
+    result_refs = {}
+    for name, key in REF_COLUMNS.items():
+        source = getattr(refs, key)
+        result_refs[key] = {i: source.get(i) for i in sorted(used[name])}
+    result_refs['weeks'] = {
+        week_id: {
+            'week_number': refs.weeks[week_id].week_number,
+            'start_date': refs.weeks[week_id].start_date.isoformat(),
+            'end_date': refs.weeks[week_id].end_date.isoformat(),
+        }
+        for week_id in sorted(used_weeks)
+    }
+    return {'format': 'columnar', 'count': count, 'columns': columns, 'refs': result_refs}
+
+
+def columnar_response(payload: Dict[str, Any], encoding: str) -> Response:
+    """Ответ в колоночном формате: JSON или MessagePack"""
+    if encoding == 'msgpack':
+        if msgpack is None:
+            response = make_response(jsonify({'error': 'Формат msgpack недоступен на сервере'}), 406)
+        else:
+            response = Response(msgpack.packb(payload), mimetype=MSGPACK_MIMETYPE)
+    else:
+        response = Response(current_app.json.dumps(payload), mimetype=COLUMNAR_MIMETYPE)
+    response.vary.add('Accept')
+    return response
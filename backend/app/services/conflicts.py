@@ -0,0 +1,127 @@
+"""
+Поиск конфликтов сохраненного расписания на стороне БД.
+Для каждого вида сущности — один агрегат
+
+    GROUP BY week_id, day_of_week, time_slot, <teacher_id|room_id|group_id>
+    HAVING count(*) > 1
+
+по занятиям расписания. Компактные расписания разворачиваются в том же
+запросе: шаблон соединяется с неделями своего диапазона (с учетом
+четности), исключения подставляют перенос или отменяют занятие.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, func, literal, union_all, and_, or_
+
+from app import db
+from app.models import (
+    Schedule, Lesson, LessonPattern, LessonPatternException, Week, Teacher, Room, Group,
+)
+
+# вид конфликта -> колонка занятия
+CONFLICT_KINDS = {'teacher': 'teacher_id', 'room': 'room_id', 'group': 'group_id'}
+
+KIND_MODELS = {'teacher': Teacher, 'room': Room, 'group': Group}
+
+MESSAGES = {
+    'teacher': 'Преподаватель {name} ведет {count} занятия одновременно',
+    'room': 'Аудитория {name} занята {count} занятиями одновременно',
+    'group': 'Группа {name} должна быть на {count} занятиях одновременно',
+}
+
+
+def occupied_slots(schedule: Schedule):
+    """Подзапрос (week_id, day_of_week, time_slot, teacher_id, room_id, group_id) занятий расписания"""
+    if not schedule.is_compact:
+        L = Lesson
+        return select(
+            L.week_id, L.day_of_week, L.time_slot, L.teacher_id, L.room_id, L.group_id
+        ).where(L.schedule_id == schedule.id).subquery('slots')
+
+    P, E = LessonPattern, LessonPatternException
+    return (
+        select(
+            Week.id.label('week_id'),
+            func.coalesce(E.day_of_week, P.day_of_week).label('day_of_week'),
+            func.coalesce(E.time_slot, P.time_slot).label('time_slot'),
+            func.coalesce(E.teacher_id, P.teacher_id).label('teacher_id'),
+            func.coalesce(E.room_id, P.room_id).label('room_id'),
+            P.group_id,
+        )
+        .select_from(P)
+        .join(Week, and_(
+            Week.semester_id == P.semester_id,
+            Week.week_number.between(P.week_from, P.week_to),
+            or_(P.week_parity.is_(None), Week.week_number % 2 == P.week_parity),
+        ))
+        .outerjoin(E, and_(E.pattern_id == P.id, E.week_number == Week.week_number))
+        .where(P.schedule_id == schedule.id, or_(E.id.is_(None), E.is_cancelled.is_(False)))
+        .subquery('slots')
+    )
+
+
+def conflicts_subquery(schedule: Schedule):
+    """Все конфликты расписания: (type, week_id, day_of_week, time_slot, entity_id, lessons)"""
+    slots = occupied_slots(schedule)
+    parts = []
+    for kind, column in CONFLICT_KINDS.items():
+        entity = slots.c[column]
+        parts.append(
+            select(
+                literal(kind).label('type'),
+                slots.c.week_id, slots.c.day_of_week, slots.c.time_slot,
+                entity.label('entity_id'),
+                func.count().label('lessons'),
+            )
+            .group_by(slots.c.week_id, slots.c.day_of_week, slots.c.time_slot, entity)
+            .having(func.count() > 1)
+        )
+    return union_all(*parts).subquery('conflicts')
+
+
+def conflict_counts(schedule: Schedule) -> Dict[str, int]:
+    """Число конфликтов по видам (один запрос)"""
+    C = conflicts_subquery(schedule)
+    counts = {kind: 0 for kind in CONFLICT_KINDS}
+    for kind, count in db.session.execute(select(C.c.type, func.count()).group_by(C.c.type)):
+        counts[kind] = count
+    return counts
+
+
+def conflicts_query(schedule: Schedule, kind: Optional[str] = None):
+    """
+    Запрос конфликтов с номером недели и колонки ключа сортировки для keyset-пагинации
+    (вид, неделя, день, пара, сущность).
+    Returns:
+        (query, columns)
+    """
+    C = conflicts_subquery(schedule)
+    query = db.session.query(C, Week.week_number).join(Week, Week.id == C.c.week_id)
+    if kind is not None:
+        query = query.filter(C.c.type == kind)
+    return query, [C.c.type, C.c.week_id, C.c.day_of_week, C.c.time_slot, C.c.entity_id]
+
+
+def describe_conflicts(rows) -> List[Dict[str, Any]]:
+    """Строки conflicts_query -> словари с сообщением; имена только для сущностей из rows"""
+    names = {}
+    for kind, model in KIND_MODELS.items():
+        ids = {r.entity_id for r in rows if r.type == kind}
+        if ids:
+            names[kind] = dict(db.session.query(model.id, model.name).filter(model.id.in_(ids)).all())
+
+    conflicts = []
+    for r in rows:
+        name = names.get(r.type, {}).get(r.entity_id) or f'ID {r.entity_id}'
+        conflicts.append({
+            'type': r.type,
+            'week_id': r.week_id,
+            'week': r.week_number,
+            'day': r.day_of_week,
+            'slot': r.time_slot,
+            f'{r.type}_id': r.entity_id,
+            'lessons': r.lessons,
+            'message': MESSAGES[r.type].format(name=name, count=r.lessons),
+        })
+    return conflicts
@@ -0,0 +1,129 @@
+"""
+Экспорт пакетом: отдельная книга Excel на каждую группу / преподавателя /
+аудиторию в одном ZIP.
+Строки занятий загружаются один раз и раскладываются по сущностям в
+основном процессе; книги собираются в пуле процессов (openpyxl упирается
+в CPU и GIL), готовые файлы по порядку дописываются в ZIP, который
+отдается потоком, не дожидаясь всех книг.
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+from app.exporter import ExcelExporter, GridSheet, load_export_data, render_grid_workbook
+
+# вид -> папка в архиве
+BUNDLE_KINDS = {'group': 'groups', 'teacher': 'teachers', 'room': 'rooms'}
+
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+class ExportPool:
+    """Пул процессов для сборки книг; создается при первом экспорте и переживает запросы"""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        """Пул процессов; при первом вызове читает EXPORT_WORKERS — нужен контекст приложения"""
+        with self._lock:
+            if self._executor is None:
+                workers = current_app.config.get('EXPORT_WORKERS') or os.cpu_count() or 1
+                # spawn: рабочие процессы не наследуют соединения с БД и потоки сервера
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                print(f"⚙️ Пул экспорта: {workers} процессов")
+            return self._executor
+
+    def reset(self) -> None:
+        """Сбросить пул (после падения рабочего процесса создастся заново)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+export_pool = ExportPool()
+
+
+def _file_name(name: str) -> str:
+    return _UNSAFE_CHARS.sub('_', str(name)).strip('_') or 'unnamed'
+
+
+def bundle_tasks(schedule, kinds: Iterable[str], entity_ids: Optional[Dict[str, List[int]]] = None,
+                 week_ids: Optional[Iterable[int]] = None,
+                 date_from: Optional[date] = None, date_to: Optional[date] = None
+                 ) -> List[Tuple[str, str, List[GridSheet]]]:
+    """
+    Файлы пакета: (путь в архиве, вид, [лист]) — один лист на книгу.
+    Args:
+        kinds: Виды из BUNDLE_KINDS
+        entity_ids: вид -> только эти id (нет вида — все сущности этого вида с занятиями)
+    """
+    entity_ids = entity_ids or {}
+    rows, refs = load_export_data(schedule, week_ids, date_from, date_to)
+    exporter = ExcelExporter()
+    tasks = []
+    for kind in kinds:
+        used = set()
+        for sheet in exporter.grid_sheets(schedule, rows, refs, kind, entity_ids.get(kind)):
+            name = _file_name(sheet.name)
+            if name in used:
+                name = f'{name}_{sheet.entity_id}'
+            used.add(name)
+            tasks.append((f'{BUNDLE_KINDS[kind]}/{name}.xlsx', kind, [sheet]))
+    return tasks
+
+
+class _ZipStream:
+    """Файловый объект только на запись: zipfile пишет в него, генератор забирает накопленное"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def stream_bundle(tasks: List[Tuple[str, str, List[GridSheet]]], executor: ProcessPoolExecutor,
+                  chunksize: int = 4) -> Iterator[bytes]:
+    """
+    Собрать книги в пуле процессов и отдавать ZIP по частям по мере готовности.
+    Книги xlsx уже сжаты, поэтому в архив кладутся без повторного сжатия.
+    Генератор работает после выхода из view, без контекста приложения, —
+    пул передается уже созданным (export_pool.get() во view).
+    """
+    stream = _ZipStream()
+    try:
+        workbooks = executor.map(
+            render_grid_workbook,
+            [kind for _, kind, _ in tasks], [sheets for _, _, sheets in tasks],
+            chunksize=chunksize,
+        )
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for (path, _, _), content in zip(tasks, workbooks):
+                archive.writestr(path, content)
+                yield stream.take()
+    except BrokenProcessPool:
+        export_pool.reset()
+        raise
+    yield stream.take()
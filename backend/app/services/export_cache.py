@@ -0,0 +1,182 @@
+"""
+Кэш готовых файлов экспорта на локальном диске.
+Имя файла — хэш ключа (расписание, версия расписания и справочников, вид
+экспорта, параметры), поэтому после правки расписания старые файлы просто
+перестают запрашиваться и вытесняются по LRU (время последнего обращения —
+mtime файла) при превышении EXPORT_CACHE_MAX_BYTES.
+Файл пишется во временный в том же каталоге и переименовывается атомарно:
+параллельный запрос (в том числе из другого процесса) видит либо готовый
+файл, либо никакого.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Optional, Tuple
+
+# Недописанные временные файлы старше этого (упавшая сборка) удаляются при вытеснении, сек
+STALE_TMP_AGE = 60 * 60
+
+
+class ExportCache:
+    """Каталог с файлами экспорта; инициализируется из конфигурации в create_app"""
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self.max_bytes = 0
+        self._lock = threading.Lock()
+        # ключ -> [блокировка, сколько запросов ее держат или ждут]
+        self._key_locks: Dict[str, list] = {}
+
+    def init_app(self, app):
+        self.directory = app.config.get('EXPORT_CACHE_DIR')
+        self.max_bytes = app.config.get('EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def _acquire_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key_lock(self, key: str) -> None:
+        # Запись удаляется последним запросом: пока кто-то ждет, все ждут одну и ту же блокировку
+        with self._lock:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._key_locks[key]
+
+    def open(self, key: str, render: Callable[[str], None], suffix: str = '.xlsx') -> Tuple[BinaryIO, bool]:
+        """
+        Открыть файл по ключу, при промахе собрав его render(путь).
+        Returns:
+            (открытый файл, был ли в кэше). Файл открыт до вытеснения, поэтому
+            удаление при вытеснении не мешает отдаче.
+        """
+        if not self.directory:
+            return self._render_unbuffered(render, suffix), False
+
+        path = os.path.join(self.directory, key + suffix)
+        # Одна сборка на ключ в процессе: остальные запросы ждут ее и берут готовый файл
+        key_lock = self._acquire_key_lock(key)
+        try:
+            with key_lock:
+                handle = self._open_existing(path)
+                if handle is not None:
+                    return handle, True
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                os.close(fd)
+                try:
+                    render(tmp_path)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    _unlink(tmp_path)
+                    raise
+                handle = open(path, 'rb')
+        finally:
+            self._release_key_lock(key)
+        self.evict(keep=path)
+        return handle, False
+
+    @staticmethod
+    def _open_existing(path: str) -> Optional[BinaryIO]:
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # отметка обращения для LRU
+        return handle
+
+    def _render_unbuffered(self, render: Callable[[str], None], suffix: str) -> BinaryIO:
+        """Кэш выключен: собрать во временный файл и сразу удалить его имя (файл живет, пока открыт)"""
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            render(tmp_path)
+            return open(tmp_path, 'rb')
+        finally:
+            _unlink(tmp_path)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Удалить давно не запрошенные файлы сверх max_bytes. Returns: удалено файлов"""
+        if not self.directory:
+            return 0
+        files = []
+        now = time.time()
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith('.tmp'):
+                    if now - stat.st_mtime > STALE_TMP_AGE:
+                        removed += _unlink(entry.path)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            removed += _unlink(path)
+            total -= size
+        if removed:
+            print(f"🧹 Кэш экспорта: удалено файлов {removed}")
+        return removed
+
+    def clear(self):
+        if not self.directory:
+            return
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                _unlink(entry.path)
+
+
+def _unlink(path: str) -> int:
+    try:
+        os.unlink(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+export_cache = ExportCache()
+
+
+def open_schedule_export(schedule, export_type: str = 'group', week_ids: Optional[Iterable[int]] = None,
+                         date_from: Optional[date] = None, date_to: Optional[date] = None) -> Tuple[BinaryIO, str, bool]:
+    """
+    Файл Excel-экспорта расписания: из кэша или собранный ExcelExporter.
+    Returns:
+        (открытый файл, ключ — годится как ETag, был ли в кэше)
+    """
+    from app.exporter import ExcelExporter
+    from app.services.response_cache import schedule_version
+
+    if export_type != 'consolidated' and export_type not in ExcelExporter.GRID_KINDS:
+        export_type = 'group'  # как в ExcelExporter.export_schedule
+    week_ids = None if week_ids is None else sorted(set(week_ids))
+    key = ExportCache.make_key(
+        'xlsx', schedule_version(schedule.id), export_type, week_ids,
+        date_from.isoformat() if date_from else None, date_to.isoformat() if date_to else None,
+    )
+
+    def render(path: str):
+        ExcelExporter().export_schedule(schedule, path, export_type=export_type,
+                                        week_ids=week_ids, date_from=date_from, date_to=date_to)
+
+    handle, hit = export_cache.open(key, render)
+    return handle, key, hit
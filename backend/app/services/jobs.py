@@ -0,0 +1,163 @@
+"""
+Реестр задач генерации расписания.
+Задача живет в памяти процесса: планировщик публикует в нее события
+прогресса, а SSE-эндпоинт /jobs/<id>/events раздает их подписчикам.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from app.schedulers.base import CancellationToken
+
+
+class GenerationJob:
+    """Одна запущенная генерация и ее поток событий"""
+    
+    # Сколько последних событий хранить для поздних подписчиков
+    max_events = 200
+    
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = 'pending'  # pending -> running [-> cancelling] -> completed / cancelled / failed
+        self.created_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self.token = CancellationToken()
+        
+        self._events = deque(maxlen=self.max_events)
+        self._seq = 0
+        self._cond = threading.Condition()
+    
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+    
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Добавить событие (вызывается из потока генерации)"""
+        with self._cond:
+            if self.finished:
+                return  # поздний прогресс после отмены/ошибки не меняет итог
+            self._append(event)
+    
+    def _append(self, event: Dict[str, Any]) -> None:
+        """Записать событие и разбудить подписчиков (под self._cond)"""
+        self._seq += 1
+        self._events.append({**event, 'seq': self._seq})
+        self._cond.notify_all()
+    
+    def cancel(self) -> bool:
+        """Запросить остановку. Планировщик вернет лучший результат на момент отмены."""
+        with self._cond:
+            if self.finished:
+                return False
+            self.token.cancel()
+            if self.status == 'pending':
+                # Генерация еще не запущена (есть только подписчик) — завершать задачу некому
+                self._finish('cancelled')
+                return True
+            self.status = 'cancelling'
+        self.publish({'type': 'cancelling'})
+        return True
+    
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """Завершить задачу и разбудить всех подписчиков"""
+        with self._cond:
+            self._finish(status, result)
+    
+    def _finish(self, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+        # Итоговое событие пишется под той же блокировкой, что и finished_at:
+        # подписчик, увидевший finished, уже получит его в events_since
+        if self.finished:
+            return  # итог фиксируется один раз
+        self.status = status
+        self.result = result or {}
+        self.finished_at = time.time()
+        self._append({'type': status, **self.result})
+    
+    def events_since(self, seq: int, timeout: float = 15.0) -> List[Dict[str, Any]]:
+        """
+        Вернуть события с номером > seq.
+        Если новых нет, ждет до timeout секунд (пустой список = heartbeat).
+        """
+        with self._cond:
+            if self._seq <= seq and not self.finished:
+                self._cond.wait(timeout)
+            return [e for e in self._events if e['seq'] > seq]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        last = self._events[-1] if self._events else None
+        return {
+            'id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'last_event': last,
+        }
+
+
+class JobRegistry:
+    """Потокобезопасный словарь задач с вытеснением завершенных по TTL"""
+    
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+    
+    def create(self, job_id: Optional[str] = None, time_limit: Optional[float] = None) -> GenerationJob:
+        """
+        Зарегистрировать задачу.
+        job_id может прийти от клиента, чтобы он успел подписаться на события
+        до ответа на POST. Повторно использовать id активной задачи нельзя.
+        time_limit — жесткий лимит времени генерации в секундах.
+        """
+        job_id = str(job_id) if job_id else uuid.uuid4().hex
+        if len(job_id) > 64:
+            raise ValueError('Слишком длинный job_id')
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in ('running', 'cancelling'):
+                raise ValueError(f'Задача {job_id} уже выполняется')
+            if job is None or job.status != 'pending':
+                job = GenerationJob(job_id)
+                self._jobs[job_id] = job
+            # Если подписчик пришел раньше POST — переиспользуем его объект.
+            # pending остается только у заготовок подписчиков
+            job.token = CancellationToken(time_limit)
+            job.status = 'running'
+            return job
+    
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def get_or_create(self, job_id: str) -> GenerationJob:
+        """Для подписчика, открывшего поток раньше, чем стартовала задача"""
+        if len(job_id) > 64:
+            raise ValueError('Слишком длинный job_id')
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = GenerationJob(job_id)
+                self._jobs[job_id] = job
+            return job
+    
+    def is_stale(self, job: GenerationJob, now: Optional[float] = None) -> bool:
+        """Завершена дольше TTL или так и не запущена за TTL (подписчик без POST)"""
+        now = now or time.time()
+        return ((job.finished and now - job.finished_at > self.ttl)
+                or (job.status == 'pending' and now - job.created_at > self.ttl))
+    
+    def _purge(self):
+        now = time.time()
+        stale = [jid for jid, job in self._jobs.items() if self.is_stale(job, now)]
+        for jid in stale:
+            del self._jobs[jid]
+
+
+# Глобальный реестр (по аналогии с db в app/__init__.py)
+jobs = JobRegistry()
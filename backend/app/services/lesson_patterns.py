@@ -0,0 +1,299 @@
+"""
+Компактное хранение семестрового расписания: шаблоны + исключения.
+Вместо строки Lesson на каждую неделю хранится LessonPattern —
+(день, пара, диапазон недель или четность) — и редкие исключения
+LessonPatternException. Занятия конкретной недели разворачиваются
+из шаблонов при чтении.
+"""
+
+import time
+from collections import defaultdict, Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from sqlalchemy import func, case, select
+
+from app import db
+from app.models import Lesson, LessonPattern, LessonPatternException, Week
+
+# Поля занятия, которые одинаковы для всех недель одного шаблона
+PATTERN_KEY_FIELDS = (
+    'semester_id', 'group_id', 'subject_id', 'teacher_id', 'room_id',
+    'lesson_type_id', 'day_of_week', 'time_slot', 'is_online',
+)
+
+
+def _plan_weeks(weeks: List[int]) -> List[Tuple[int, int, Optional[int], List[int]]]:
+    """
+    Подобрать самое короткое описание набора недель.
+    Варианты: один диапазон (подряд или по четности) с отменами пропусков,
+    либо несколько диапазонов без исключений. Стоимость = шаблоны + исключения.
+    Returns:
+        Список (week_from, week_to, week_parity, отмененные недели)
+    """
+    weeks = sorted(weeks)
+    present = set(weeks)
+    lo, hi = weeks[0], weeks[-1]
+    
+    candidates = []
+    # Один диапазон подряд, пропуски — отмены
+    cancelled = [w for w in range(lo, hi + 1) if w not in present]
+    candidates.append((1 + len(cancelled), [(lo, hi, None, cancelled)]))
+    # Один диапазон через неделю (все недели одной четности)
+    if len(weeks) > 1 and len({w % 2 for w in weeks}) == 1:
+        cancelled = [w for w in range(lo, hi + 1, 2) if w not in present]
+        candidates.append((1 + len(cancelled), [(lo, hi, lo % 2, cancelled)]))
+    # Несколько непрерывных отрезков
+    runs = []
+    start = prev = weeks[0]
+    for w in weeks[1:]:
+        if w != prev + 1:
+            runs.append((start, prev, None, []))
+            start = w
+        prev = w
+    runs.append((start, prev, None, []))
+    candidates.append((len(runs), runs))
+    
+    return min(candidates, key=lambda c: c[0])[1]
+
+
+def compress_lessons(lessons: Iterable[Dict[str, Any]],
+                     week_index: Dict[int, Tuple[int, int]]) -> List[Tuple[Dict[str, Any], List[int]]]:
+    """
+    Свернуть плоский список занятий в шаблоны.
+    Args:
+        lessons: Словари занятий (week_id, day_of_week, time_slot, group_id, ...)
+        week_index: week_id -> (semester_id, week_number)
+    Returns:
+        Список (поля шаблона, номера отмененных недель)
+    """
+    occurrences = defaultdict(Counter)
+    for lesson in lessons:
+        semester_id, week_number = week_index[lesson['week_id']]
+        key = (
+            semester_id, lesson['group_id'], lesson['subject_id'], lesson['teacher_id'],
+            lesson['room_id'], lesson['lesson_type_id'],
+            lesson.get('day_of_week', lesson.get('day')), lesson['time_slot'],
+            bool(lesson.get('is_online', False)),
+        )
+        occurrences[key][week_number] += 1
+    
+    result = []
+    for key, counter in occurrences.items():
+        base = dict(zip(PATTERN_KEY_FIELDS, key))
+        # Дубли в одной неделе (конфликтное расписание) уходят в следующие «слои»
+        while counter:
+            for week_from, week_to, parity, cancelled in _plan_weeks(list(counter)):
+                result.append(({**base, 'week_from': week_from, 'week_to': week_to,
+                                'week_parity': parity}, cancelled))
+            counter = Counter({w: c - 1 for w, c in counter.items() if c > 1})
+    return result
+
+
+def _week_index(week_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    rows = db.session.query(Week.id, Week.semester_id, Week.week_number) \
+        .filter(Week.id.in_(set(week_ids))).all()
+    return {r.id: (r.semester_id, r.week_number) for r in rows}
+
+
+def store_compact(schedule_id: int, lessons: List[Dict[str, Any]], commit: bool = True) -> Dict[str, Any]:
+    """
+    Записать занятия расписания в компактном виде (одна транзакция).
+    Args:
+        commit: False — оставить транзакцию открытой (вызывающий коммитит вместе со своими изменениями)
+    Returns:
+        Dict в формате bulk_insert_lessons: written, patterns, exceptions, time, lessons_per_sec
+    """
+    start_time = time.time()
+    plan = compress_lessons(lessons, _week_index(l['week_id'] for l in lessons))
+    
+    exceptions = []
+    if plan:
+        pattern_rows = [{**fields, 'schedule_id': schedule_id} for fields, _ in plan]
+        pattern_ids = db.session.execute(
+            LessonPattern.__table__.insert().returning(
+                LessonPattern.__table__.c.id, sort_by_parameter_order=True
+            ),
+            pattern_rows
+        ).scalars().all()
+        exceptions = [
+            {'pattern_id': pattern_id, 'week_number': week, 'is_cancelled': True}
+            for pattern_id, (_, cancelled) in zip(pattern_ids, plan)
+            for week in cancelled
+        ]
+        if exceptions:
+            db.session.execute(LessonPatternException.__table__.insert(), exceptions)
+    if commit:
+        db.session.commit()
+    
+    duration = time.time() - start_time
+    written = len(lessons)
+    rate = written / duration if duration > 0 else float(written)
+    print(f"💾 Компактная запись: {written} занятий -> {len(plan)} шаблонов + "
+          f"{len(exceptions)} исключений за {duration:.2f}с")
+    return {
+        'written': written,
+        'patterns': len(plan),
+        'exceptions': len(exceptions),
+        'method': 'compact',
+        'time': duration,
+        'lessons_per_sec': rate,
+    }
+
+
+def expand_patterns(schedule_id: int, week_numbers: Optional[Iterable[int]] = None) -> Iterable[Dict[str, Any]]:
+    """
+    Развернуть шаблоны расписания в занятия по неделям (лениво, генератором).
+    Args:
+        schedule_id: ID расписания
+        week_numbers: Только эти недели (None — все)
+    Yields:
+        Словари с полями таблицы lesson (id=None, pattern_id — исходный шаблон)
+    """
+    P = LessonPattern
+    query = db.session.query(P).filter(P.schedule_id == schedule_id)
+    wanted = None
+    if week_numbers is not None:
+        wanted = set(week_numbers)
+        if not wanted:
+            return
+        query = query.filter(P.week_from <= max(wanted), P.week_to >= min(wanted))
+    patterns = query.order_by(P.week_from, P.day_of_week, P.time_slot).all()
+    if not patterns:
+        return
+    
+    # Исключения одним запросом
+    E = LessonPatternException
+    exc_query = db.session.query(E).join(P).filter(P.schedule_id == schedule_id)
+    if wanted is not None:
+        exc_query = exc_query.filter(E.week_number.in_(wanted))
+    exceptions = {(e.pattern_id, e.week_number): e for e in exc_query.all()}
+    
+    # week_number -> week_id для каждого семестра шаблонов
+    semester_ids = {p.semester_id for p in patterns}
+    week_ids = {
+        (w.semester_id, w.week_number): w.id
+        for w in db.session.query(Week.id, Week.semester_id, Week.week_number)
+        .filter(Week.semester_id.in_(semester_ids)).all()
+    }
+    
+    for p in patterns:
+        for week_number in p.week_numbers():
+            if wanted is not None and week_number not in wanted:
+                continue
+            week_id = week_ids.get((p.semester_id, week_number))
+            if week_id is None:
+                continue
+            exc = exceptions.get((p.id, week_number))
+            if exc is not None and exc.is_cancelled:
+                continue
+            row = {
+                'id': None,
+                'pattern_id': p.id,
+                'schedule_id': schedule_id,
+                'week_id': week_id,
+                'week_number': week_number,
+                'group_id': p.group_id,
+                'subject_id': p.subject_id,
+                'teacher_id': p.teacher_id,
+                'room_id': p.room_id,
+                'lesson_type_id': p.lesson_type_id,
+                'day_of_week': p.day_of_week,
+                'time_slot': p.time_slot,
+                'is_online': p.is_online,
+            }
+            if exc is not None:
+                # Перенос: переопределенные поля
+                for field in ('day_of_week', 'time_slot', 'teacher_id', 'room_id'):
+                    value = getattr(exc, field)
+                    if value is not None:
+                        row[field] = value
+            yield row
+
+
+def compact_lessons_counts(schedule_ids: Iterable[int]) -> Dict[int, int]:
+    """Количество занятий компактных расписаний — два сгруппированных агрегата в БД"""
+    schedule_ids = list(schedule_ids)
+    if not schedule_ids:
+        return {}
+    P, E = LessonPattern, LessonPatternException
+    span = P.week_to - P.week_from
+    occurrences = db.session.query(
+        P.schedule_id,
+        func.sum(case((P.week_parity.is_(None), span + 1), else_=span // 2 + 1))
+    ).filter(P.schedule_id.in_(schedule_ids)).group_by(P.schedule_id).all()
+    cancelled = dict(db.session.query(P.schedule_id, func.count(E.id)).join(P).filter(
+        P.schedule_id.in_(schedule_ids), E.is_cancelled.is_(True)
+    ).group_by(P.schedule_id).all())
+    counts = dict.fromkeys(schedule_ids, 0)
+    for schedule_id, total in occurrences:
+        counts[schedule_id] = int(total) - int(cancelled.get(schedule_id, 0))
+    return counts
+
+
+def count_compact_lessons(schedule_id: int) -> int:
+    """Количество занятий одного компактного расписания"""
+    return compact_lessons_counts([schedule_id])[schedule_id]
+
+
+def compact_schedule(schedule) -> Dict[str, Any]:
+    """
+    Перевести существующее расписание из строк Lesson в шаблоны.
+    Запись шаблонов, удаление строк и смена storage_mode — одна транзакция.
+    Raises:
+        ValueError: у занятий заполнены duration / location / notes — в шаблонах
+            им нет места, и /materialize не смог бы их вернуть
+    """
+    if schedule.is_compact:
+        return {'written': 0, 'patterns': schedule.patterns.count(), 'method': 'compact'}
+    L = Lesson.__table__.c
+    extra = db.session.execute(
+        select(func.count()).where(
+            L.schedule_id == schedule.id,
+            (func.coalesce(L.duration, 1) != 1)
+            | (func.coalesce(L.location, '') != '')
+            | (func.coalesce(L.notes, '') != '')
+        )
+    ).scalar()
+    if extra:
+        raise ValueError(f'У {extra} занятий заполнены длительность, место или заметки — '
+                         f'компактный формат их не хранит')
+    rows = [dict(r._mapping) for r in db.session.execute(
+        select(L.week_id, L.group_id, L.subject_id, L.teacher_id, L.room_id,
+               L.lesson_type_id, L.day_of_week, L.time_slot, L.is_online)
+        .where(L.schedule_id == schedule.id)
+    )]
+    try:
+        stats = store_compact(schedule.id, rows, commit=False)
+        Lesson.query.filter_by(schedule_id=schedule.id).delete(synchronize_session=False)
+        schedule.storage_mode = 'compact'
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return stats
+
+
+def materialize_schedule(schedule, chunk_size: int = 5000) -> Dict[str, Any]:
+    """
+    Обратное преобразование: развернуть шаблоны в строки Lesson (например, для ручной правки).
+    Запись строк, удаление шаблонов и смена storage_mode — одна транзакция.
+    """
+    from app.services.lesson_writer import bulk_insert_lessons
+    
+    if not schedule.is_compact:
+        return {'written': 0, 'method': 'rows'}
+    rows = list(expand_patterns(schedule.id))
+    try:
+        stats = bulk_insert_lessons(schedule.id, rows, chunk_size=chunk_size, commit=False)
+        LessonPatternException.query.filter(
+            LessonPatternException.pattern_id.in_(
+                select(LessonPattern.id).where(LessonPattern.schedule_id == schedule.id)
+            )
+        ).delete(synchronize_session=False)
+        LessonPattern.query.filter_by(schedule_id=schedule.id).delete(synchronize_session=False)
+        schedule.storage_mode = 'rows'
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return stats
@@ -0,0 +1,172 @@
+"""
+Сериализация занятий без ленивых связей ORM.
+Справочники (группы, предметы, преподаватели, аудитории, типы, недели)
+загружаются одним запросом на таблицу, а каждое занятие собирается
+из плоской строки с id — без запросов на каждую строку.
+"""
+
+from datetime import timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Group, Subject, Teacher, Room, LessonType, Week, Lesson
+
+# Колонки lesson, нужные для ответа (без created_at, notes и т.п.)
+LESSON_ROW_COLUMNS = (
+    'id', 'week_id', 'group_id', 'subject_id', 'teacher_id', 'room_id',
+    'lesson_type_id', 'day_of_week', 'time_slot', 'is_online',
+)
+
+
+class ReferenceMaps:
+    """Словари id -> данные для сборки ответа по занятиям"""
+    
+    def __init__(self, week_ids: Optional[Iterable[int]] = None, semester_id: Optional[int] = None):
+        """
+        Args:
+            week_ids: Какие недели загрузить (по id)
+            semester_id: Либо все недели семестра
+        """
+        session = db.session
+        self.groups = dict(session.query(Group.id, Group.name).all())
+        self.subjects = dict(session.query(Subject.id, Subject.name).all())
+        self.teachers = dict(session.query(Teacher.id, Teacher.name).all())
+        self.rooms = dict(session.query(Room.id, Room.name).all())
+        self.lesson_types = {lt.id: lt.to_dict() for lt in LessonType.query.all()}
+        
+        week_query = session.query(Week.id, Week.week_number, Week.start_date, Week.end_date)
+        if semester_id is not None:
+            week_query = week_query.filter(Week.semester_id == semester_id)
+        elif week_ids is not None:
+            week_query = week_query.filter(Week.id.in_(list(week_ids)))
+        self.weeks = {w.id: w for w in week_query.all()}
+
+
+def lesson_rows(schedule_id: int, week_id: Optional[int] = None,
+                week_ids: Optional[Iterable[int]] = None) -> List[Mapping[str, Any]]:
+    """Плоские строки занятий расписания (один запрос, без объектов ORM)"""
+    L = Lesson.__table__.c
+    stmt = select(*[L[col] for col in LESSON_ROW_COLUMNS]).where(L.schedule_id == schedule_id)
+    if week_id is not None:
+        stmt = stmt.where(L.week_id == week_id)
+    if week_ids is not None:
+        stmt = stmt.where(L.week_id.in_(list(week_ids)))
+    stmt = stmt.order_by(L.week_id, L.day_of_week, L.time_slot)
+    return [row._mapping for row in db.session.execute(stmt)]
+
+
+def entity_lesson_rows(schedule_id: int, column: str, entity_id: int,
+                       week_ids: Optional[Iterable[int]] = None) -> List[Mapping[str, Any]]:
+    """
+    Занятия одной группы / преподавателя / аудитории
+    (индексы ix_lesson_schedule_{group,teacher,room}_slot).
+    Args:
+        column: 'group_id', 'teacher_id' или 'room_id'
+        week_ids: Только эти недели (None — весь семестр)
+    """
+    L = Lesson.__table__.c
+    stmt = select(*[L[col] for col in LESSON_ROW_COLUMNS]).where(
+        L.schedule_id == schedule_id, L[column] == entity_id
+    )
+    if week_ids is not None:
+        stmt = stmt.where(L.week_id.in_(list(week_ids)))
+    stmt = stmt.order_by(L.week_id, L.day_of_week, L.time_slot)
+    return [row._mapping for row in db.session.execute(stmt)]
+
+
+def serialize_lessons(rows: Iterable[Mapping[str, Any]], refs: Optional[ReferenceMaps] = None) -> List[Dict[str, Any]]:
+    """
+    Сериализовать набор строк за постоянное число запросов:
+    1 (строки уже получены) + 6 на справочники, независимо от числа занятий.
+    """
+    rows = list(rows)
+    if refs is None:
+        refs = ReferenceMaps(week_ids={row['week_id'] for row in rows})
+    return [serialize_lesson(row, refs) for row in rows]
+
+
+def serialize_lesson(row: Mapping[str, Any], refs: ReferenceMaps) -> Dict[str, Any]:
+    """Строка занятия (id-шники) -> словарь в формате Lesson.to_dict()"""
+    week = refs.weeks.get(row['week_id'])
+    day = row['day_of_week']
+    lesson_date = week.start_date + timedelta(days=day) if week else None
+    return {
+        'id': row.get('id'),
+        'week_id': row['week_id'],
+        'week_number': week.week_number if week else None,
+        'date': lesson_date.isoformat() if lesson_date else None,
+        'day_of_week': day,
+        'day': day,  # Алиас для совместимости
+        'time_slot': row['time_slot'],
+        'group_id': row['group_id'],
+        'group': refs.groups.get(row['group_id']),
+        'subject_id': row['subject_id'],
+        'subject': refs.subjects.get(row['subject_id']),
+        'teacher_id': row['teacher_id'],
+        'teacher': refs.teachers.get(row['teacher_id']),
+        'room_id': row['room_id'],
+        'room': refs.rooms.get(row['room_id']),
+        'lesson_type': refs.lesson_types.get(row['lesson_type_id']),
+        'is_online': bool(row.get('is_online')),
+    }
+
+
+def iter_lesson_rows(schedule_id: int, batch_size: int = 1000) -> Iterator[Mapping[str, Any]]:
+    """
+    Строки занятий расписания по порядку недель — потоком с серверного курсора
+    (yield_per), без загрузки всего расписания в память.
+    """
+    L = Lesson.__table__.c
+    W = Week.__table__.c
+    stmt = (
+        select(*[L[col] for col in LESSON_ROW_COLUMNS])
+        .join(Week.__table__, W.id == L.week_id)
+        .where(L.schedule_id == schedule_id)
+        .order_by(W.week_number, L.day_of_week, L.time_slot)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.session.execute(stmt):
+        yield row._mapping
+
+
+def stream_weeks_json(header: Dict[str, Any], rows: Iterable[Mapping[str, Any]], refs: ReferenceMaps,
+                      dumps, batch_size: int = 500) -> Iterator[str]:
+    """
+    JSON вида {**header, "weeks": [{..., "lessons": [...]}, ...]} по частям.
+    Строки должны идти по порядку недель; в памяти — не больше batch_size занятий.
+    Args:
+        header: Поля верхнего уровня (schedule.to_dict())
+        rows: Строки занятий, упорядоченные по номеру недели
+        dumps: Функция сериализации (current_app.json.dumps)
+    """
+    head = dumps(header)
+    yield (head[:-1] + ', "weeks": [') if len(head) > 2 else '{"weeks": ['
+
+    current_week = None
+    buffer: List[str] = []
+    for row in rows:
+        week = refs.weeks.get(row['week_id'])
+        if not week:
+            continue
+        if week.id != current_week:
+            if current_week is not None:
+                buffer.append(']}, ')
+            week_head = dumps({
+                'week_number': week.week_number,
+                'start_date': week.start_date.isoformat(),
+                'end_date': week.end_date.isoformat(),
+            })
+            buffer.append(week_head[:-1] + ', "lessons": [')
+            current_week = week.id
+        else:
+            buffer.append(', ')
+        buffer.append(dumps(serialize_lesson(row, refs)))
+        if len(buffer) >= batch_size:
+            yield ''.join(buffer)
+            buffer = []
+    if current_week is not None:
+        buffer.append(']}')
+    buffer.append(']}')
+    yield ''.join(buffer)
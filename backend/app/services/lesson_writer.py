@@ -0,0 +1,155 @@
+"""
+Массовая запись сгенерированных занятий.
+Результат генерации семестра — десятки тысяч строк, и ORM (db.session.add
+на каждое занятие) тратит на unit of work больше времени, чем сам поиск.
+Здесь занятия пишутся чанками через Core insert (executemany), а на
+PostgreSQL — через COPY. Каждый чанк — отдельная транзакция (или все
+чанки в транзакции вызывающего при commit=False).
+"""
+
+import csv
+import io
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional
+
+from app import db
+from app.models import Lesson, Schedule
+
+# Колонки, которые заполняются при записи результата генерации
+LESSON_COLUMNS = (
+    'schedule_id', 'week_id', 'group_id', 'subject_id', 'teacher_id', 'room_id',
+    'lesson_type_id', 'day_of_week', 'time_slot', 'duration', 'is_online', 'created_at',
+)
+
+
+def _lesson_rows(schedule_id: int, lessons: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """Словари планировщика -> строки таблицы lesson (с дефолтами ORM)"""
+    now = datetime.utcnow()
+    for lesson in lessons:
+        yield {
+            'schedule_id': schedule_id,
+            'week_id': lesson['week_id'],
+            'group_id': lesson['group_id'],
+            'subject_id': lesson['subject_id'],
+            'teacher_id': lesson['teacher_id'],
+            'room_id': lesson['room_id'],
+            'lesson_type_id': lesson['lesson_type_id'],
+            'day_of_week': lesson.get('day_of_week', lesson.get('day')),  # Поддержка обоих ключей
+            'time_slot': lesson['time_slot'],
+            'duration': lesson.get('duration', 1),
+            'is_online': lesson.get('is_online', False),
+            'created_at': now,
+        }
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy_supported() -> bool:
+    dialect = db.engine.dialect
+    return dialect.name == 'postgresql' and dialect.driver in ('psycopg2', 'psycopg')
+
+
+def _write_chunk_batch(chunk: List[Dict[str, Any]]) -> None:
+    # Core insert со списком параметров -> executemany / insertmanyvalues
+    db.session.execute(Lesson.__table__.insert(), chunk)
+
+
+def _write_chunk_copy(chunk: List[Dict[str, Any]]) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in chunk:
+        writer.writerow([row[col] for col in LESSON_COLUMNS])
+    buf.seek(0)
+    
+    sql = f"COPY lesson ({', '.join(LESSON_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    # Сырое DBAPI-соединение текущей транзакции сессии
+    raw = db.session.connection().connection
+    cursor = raw.cursor()
+    try:
+        if db.engine.dialect.driver == 'psycopg2':
+            cursor.copy_expert(sql, buf)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+
+def _bump_schedule_version(schedule_id: int) -> None:
+    """Новая версия расписания для кэшей ответов (в текущей транзакции)"""
+    table = Schedule.__table__
+    db.session.execute(
+        table.update().where(table.c.id == schedule_id)
+        .values(data_version=table.c.data_version + 1, updated_at=datetime.utcnow())
+    )
+
+
+def bulk_insert_lessons(schedule_id: int, lessons: List[Dict[str, Any]],
+                        chunk_size: int = 5000, use_copy: Optional[bool] = None,
+                        commit: bool = True) -> Dict[str, Any]:
+    """
+    Записать занятия расписания чанками, каждый чанк — одна транзакция.
+    Рассчитано на только что созданное расписание: при ошибке уже записанные
+    чанки удаляются, чтобы не оставлять половину результата.
+    Запись идет мимо ORM (событие before_flush ее не видит), поэтому
+    data_version и updated_at расписания обновляются здесь же.
+    
+    Args:
+        schedule_id: ID расписания
+        lessons: Словари занятий в формате результата планировщика
+        chunk_size: Размер чанка (строк на транзакцию)
+        use_copy: Использовать COPY (по умолчанию — если БД PostgreSQL)
+        commit: False — все чанки пишутся в текущую транзакцию без коммита;
+            коммит и откат остаются за вызывающим (запись вместе с другими изменениями)
+    Returns:
+        Dict: written, chunks, method, time, lessons_per_sec
+    """
+    if use_copy is None:
+        use_copy = _copy_supported()
+    write_chunk = _write_chunk_copy if use_copy else _write_chunk_batch
+    
+    start_time = time.time()
+    written = chunks = 0
+    if not commit:
+        for chunk in _chunks(_lesson_rows(schedule_id, lessons), chunk_size):
+            write_chunk(chunk)
+            written += len(chunk)
+            chunks += 1
+        _bump_schedule_version(schedule_id)
+    else:
+        try:
+            for chunk in _chunks(_lesson_rows(schedule_id, lessons), chunk_size):
+                write_chunk(chunk)
+                _bump_schedule_version(schedule_id)
+                db.session.commit()
+                written += len(chunk)
+                chunks += 1
+        except Exception:
+            db.session.rollback()
+            if written:
+                Lesson.query.filter_by(schedule_id=schedule_id).delete(synchronize_session=False)
+                _bump_schedule_version(schedule_id)
+                db.session.commit()
+            raise
+    
+    duration = time.time() - start_time
+    rate = written / duration if duration > 0 else float(written)
+    method = 'copy' if use_copy else 'batch'
+    print(f"💾 Записано занятий: {written} за {duration:.2f}с ({rate:.0f} занятий/с, {method}, чанков: {chunks})")
+    return {
+        'written': written,
+        'chunks': chunks,
+        'method': method,
+        'time': duration,
+        'lessons_per_sec': rate,
+    }
@@ -0,0 +1,250 @@
+"""
+Индекс занятости расписания: битовые маски по (неделя, день, пара)
+для каждой аудитории, преподавателя и группы.
+
+Бит слота: (позиция_недели * DAYS + день) * SLOTS + пара; маска — обычный int.
+"Когда свободны преподаватель X и группа Y" — это ~(busy_x | busy_y) & all,
+т.е. несколько побитовых операций вместо запросов к lesson.
+
+Индекс строится лениво при первом запросе и хранится в occupancy_cache
+по ключу (schedule_id, data_version, updated_at): любая правка расписания
+дает новый ключ, старый индекс вытесняется по LRU.
+"""
+
+import threading
+from collections import OrderedDict, Counter
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Any
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Lesson, Week
+
+DAYS = 5
+SLOTS = 7
+
+# вид сущности -> колонка lesson
+KINDS = {'room': 'room_id', 'teacher': 'teacher_id', 'group': 'group_id'}
+
+
+class OccupancyIndex:
+    """Занятость одного расписания"""
+
+    def __init__(self, schedule_id: int, weeks: List[Tuple[int, int]]):
+        """
+        Args:
+            weeks: [(week_id, week_number)] по возрастанию номера
+        """
+        self.schedule_id = schedule_id
+        self.week_ids = [week_id for week_id, _ in weeks]
+        self.week_numbers = [number for _, number in weeks]
+        self.week_pos = {week_id: pos for pos, week_id in enumerate(self.week_ids)}
+        self.pos_by_number = {number: pos for pos, number in enumerate(self.week_numbers)}
+        self.all_bits = (1 << (len(weeks) * DAYS * SLOTS)) - 1
+        self.masks: Dict[str, Dict[int, int]] = {kind: {} for kind in KINDS}
+        # Конфликты: (вид, id, бит) -> сколько занятий сверх первого в этом слоте
+        self.extra: Counter = Counter()
+        self.lock = threading.Lock()
+
+    # ---------- биты ----------
+
+    def bit(self, week_id: int, day: int, slot: int) -> Optional[int]:
+        pos = self.week_pos.get(week_id)
+        if pos is None or not (0 <= day < DAYS) or not (0 <= slot < SLOTS):
+            return None
+        return (pos * DAYS + day) * SLOTS + slot
+
+    def decode(self, bit: int) -> Dict[str, int]:
+        pos, rest = divmod(bit, DAYS * SLOTS)
+        day, slot = divmod(rest, SLOTS)
+        return {'week_id': self.week_ids[pos], 'week_number': self.week_numbers[pos],
+                'day_of_week': day, 'time_slot': slot}
+
+    def window(self, week_numbers: Optional[Iterable[int]] = None,
+               days: Optional[Iterable[int]] = None, slots: Optional[Iterable[int]] = None) -> int:
+        """Маска выбранных недель / дней / пар (None — все)"""
+        positions = range(len(self.week_ids)) if week_numbers is None else \
+            [self.pos_by_number[n] for n in week_numbers if n in self.pos_by_number]
+        days = range(DAYS) if days is None else [d for d in days if 0 <= d < DAYS]
+        slots = range(SLOTS) if slots is None else [s for s in slots if 0 <= s < SLOTS]
+        day_mask = 0
+        for day in days:
+            for slot in slots:
+                day_mask |= 1 << (day * SLOTS + slot)
+        mask = 0
+        for pos in positions:
+            mask |= day_mask << (pos * DAYS * SLOTS)
+        return mask
+
+    @staticmethod
+    def iter_bits(mask: int) -> Iterator[int]:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    # ---------- занятость ----------
+
+    def busy(self, kind: str, entity_id: int) -> int:
+        return self.masks[kind].get(entity_id, 0)
+
+    def is_busy(self, kind: str, entity_id: int, bit: int) -> bool:
+        return bool(self.masks[kind].get(entity_id, 0) >> bit & 1)
+
+    def free_for_all(self, entities: Iterable[Tuple[str, int]], window: Optional[int] = None) -> int:
+        """Маска слотов, где свободны все перечисленные сущности"""
+        busy = 0
+        for kind, entity_id in entities:
+            busy |= self.busy(kind, entity_id)
+        return ~busy & (self.all_bits if window is None else window)
+
+    def add(self, row: Mapping[str, Any]) -> int:
+        """Учесть занятие; возвращает, сколько его сущностей уже были заняты в слоте (0..3)"""
+        bit = self.bit(row['week_id'], row['day_of_week'], row['time_slot'])
+        if bit is None:
+            return 0
+        created = 0
+        for kind, column in KINDS.items():
+            entity_id = row.get(column)
+            if entity_id is None:
+                continue
+            mask = self.masks[kind].get(entity_id, 0)
+            if mask >> bit & 1:
+                self.extra[(kind, entity_id, bit)] += 1
+                created += 1
+            else:
+                self.masks[kind][entity_id] = mask | (1 << bit)
+        return created
+
+    def remove(self, row: Mapping[str, Any]) -> int:
+        """Убрать занятие; возвращает, сколько его сущностей остаются занятыми в слоте (0..3)"""
+        bit = self.bit(row['week_id'], row['day_of_week'], row['time_slot'])
+        if bit is None:
+            return 0
+        resolved = 0
+        for kind, column in KINDS.items():
+            entity_id = row.get(column)
+            if entity_id is None:
+                continue
+            key = (kind, entity_id, bit)
+            if self.extra.get(key):
+                self.extra[key] -= 1
+                if not self.extra[key]:
+                    del self.extra[key]
+                resolved += 1
+            else:
+                self.masks[kind][entity_id] = self.masks[kind].get(entity_id, 0) & ~(1 << bit)
+        return resolved
+
+    @property
+    def conflicts_count(self) -> int:
+        """Число конфликтов: (сущность, слот) с двумя и более занятиями — как в поиске конфликтов в БД"""
+        return len(self.extra)
+
+    def clashes(self, row: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Какие сущности занятия уже заняты в его слоте (до add)"""
+        bit = self.bit(row['week_id'], row['day_of_week'], row['time_slot'])
+        if bit is None:
+            return []
+        result = []
+        for kind, column in KINDS.items():
+            entity_id = row.get(column)
+            if entity_id is not None and self.is_busy(kind, entity_id, bit):
+                result.append({'type': kind, f'{kind}_id': entity_id, **self.decode(bit)})
+        return result
+
+    def move(self, changes: List[Tuple[Mapping[str, Any], Mapping[str, Any]]],
+             force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Переставить занятия: [(старая строка, новая строка)], O(1) на занятие.
+        Сначала убираются все старые положения, затем по очереди ставятся новые —
+        так обмен двух занятий местами не считается конфликтом, а два занятия,
+        поставленные в один слот, — считается.
+        Args:
+            force: Применить и при конфликтах
+        Returns:
+            Конфликты новых положений; если они есть и force=False, индекс не меняется
+        """
+        for old, _ in changes:
+            self.remove(old)
+        found = []
+        for _, new in changes:
+            found.extend(self.clashes(new))
+            self.add(new)
+        if found and not force:
+            for _, new in changes:
+                self.remove(new)
+            for old, _ in changes:
+                self.add(old)
+        return found
+
+
+def _schedule_weeks(schedule) -> List[Tuple[int, int]]:
+    query = db.session.query(Week.id, Week.week_number)
+    if schedule.semester_id:
+        query = query.filter(Week.semester_id == schedule.semester_id)
+    else:
+        query = query.filter(Week.id.in_(
+            select(Lesson.week_id).where(Lesson.schedule_id == schedule.id).distinct()
+        ))
+    return [(w.id, w.week_number) for w in query.order_by(Week.week_number)]
+
+
+def build_occupancy(schedule) -> OccupancyIndex:
+    """Построить индекс по занятиям расписания (один проход по строкам)"""
+    index = OccupancyIndex(schedule.id, _schedule_weeks(schedule))
+    if schedule.is_compact:
+        from app.services.lesson_patterns import expand_patterns
+        rows = expand_patterns(schedule.id)
+    else:
+        L = Lesson.__table__.c
+        rows = (r._mapping for r in db.session.execute(
+            select(L.week_id, L.day_of_week, L.time_slot, L.room_id, L.teacher_id, L.group_id)
+            .where(L.schedule_id == schedule.id)
+        ))
+    for row in rows:
+        index.add(row)
+    return index
+
+
+class OccupancyCache:
+    """LRU индексов занятости по версии расписания"""
+
+    def __init__(self, max_schedules: int = 16):
+        self.max_schedules = max_schedules
+        self._items: 'OrderedDict[tuple, OccupancyIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(schedule) -> tuple:
+        return (schedule.id, schedule.data_version, schedule.updated_at)
+
+    def get(self, schedule) -> OccupancyIndex:
+        key = self.key(schedule)
+        with self._lock:
+            index = self._items.get(key)
+            if index is not None:
+                self._items.move_to_end(key)
+                return index
+        index = build_occupancy(schedule)
+        self.put(schedule, index)
+        return index
+
+    def put(self, schedule, index: OccupancyIndex) -> None:
+        """Сохранить индекс под текущей версией расписания (в т.ч. после правки на месте)"""
+        key = self.key(schedule)
+        with self._lock:
+            # Индексы прошлых версий этого расписания больше не нужны
+            for old in [k for k in self._items if k[0] == schedule.id and k != key]:
+                del self._items[old]
+            self._items[key] = index
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_schedules:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+occupancy_cache = OccupancyCache()
@@ -0,0 +1,111 @@
+"""
+Пакетная загрузка связанных данных для списков справочников.
+Вместо обхода dynamic-связей на каждой записи (teacher.subjects,
+group.group_subjects -> lesson_type_loads -> lesson_type) — по одному
+запросу на связь для всего набора id, склейка по словарям в Python.
+"""
+
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List
+
+from sqlalchemy import select, func
+
+from app import db
+from app.models import teacher_subjects, Subject, GroupSubject, LessonTypeLoad, LessonType, RoomEquipment
+
+
+def teacher_subjects_map(teacher_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """teacher_id -> [{'id', 'name', 'code'}] одним запросом"""
+    teacher_ids = list(teacher_ids)
+    result = {tid: [] for tid in teacher_ids}
+    if not teacher_ids:
+        return result
+
+    rows = db.session.execute(
+        select(teacher_subjects.c.teacher_id, Subject.id, Subject.name, Subject.code)
+        .join(Subject, Subject.id == teacher_subjects.c.subject_id)
+        .where(teacher_subjects.c.teacher_id.in_(teacher_ids))
+        .order_by(teacher_subjects.c.teacher_id, Subject.id)
+    )
+    for teacher_id, subject_id, name, code in rows:
+        result[teacher_id].append({'id': subject_id, 'name': name, 'code': code})
+    return result
+
+
+def group_hours_map(group_ids: Iterable[int]) -> Dict[int, int]:
+    """group_id -> суммарная недельная нагрузка (SUM по lesson_type_load)"""
+    group_ids = list(group_ids)
+    result = dict.fromkeys(group_ids, 0)
+    if not group_ids:
+        return result
+
+    rows = db.session.execute(
+        select(GroupSubject.group_id, func.sum(LessonTypeLoad.hours_per_week))
+        .join(LessonTypeLoad, LessonTypeLoad.group_subject_id == GroupSubject.id)
+        .where(GroupSubject.group_id.in_(group_ids))
+        .group_by(GroupSubject.group_id)
+    )
+    result.update({group_id: int(total or 0) for group_id, total in rows})
+    return result
+
+
+def group_subjects_map(group_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    group_id -> [GroupSubject.to_dict()] двумя запросами:
+    связи группа-предмет с названием предмета и нагрузки с названием типа.
+    """
+    group_ids = list(group_ids)
+    result = {gid: [] for gid in group_ids}
+    if not group_ids:
+        return result
+
+    links = db.session.execute(
+        select(GroupSubject.id, GroupSubject.group_id, GroupSubject.subject_id, Subject.name)
+        .outerjoin(Subject, Subject.id == GroupSubject.subject_id)
+        .where(GroupSubject.group_id.in_(group_ids))
+        .order_by(GroupSubject.group_id, GroupSubject.id)
+    ).all()
+
+    loads = defaultdict(list)
+    load_rows = db.session.execute(
+        select(LessonTypeLoad.id, LessonTypeLoad.group_subject_id, LessonTypeLoad.lesson_type_id,
+               LessonType.name, LessonTypeLoad.hours_per_week)
+        .join(GroupSubject, GroupSubject.id == LessonTypeLoad.group_subject_id)
+        .outerjoin(LessonType, LessonType.id == LessonTypeLoad.lesson_type_id)
+        .where(GroupSubject.group_id.in_(group_ids))
+        .order_by(LessonTypeLoad.id)
+    )
+    for load_id, gs_id, lesson_type_id, lesson_type_name, hours in load_rows:
+        loads[gs_id].append({
+            'id': load_id,
+            'lesson_type_id': lesson_type_id,
+            'lesson_type_name': lesson_type_name,
+            'hours_per_week': hours,
+        })
+
+    for gs_id, group_id, subject_id, subject_name in links:
+        result[group_id].append({
+            'id': gs_id,
+            'group_id': group_id,
+            'subject_id': subject_id,
+            'subject_name': subject_name,
+            'loads': loads.get(gs_id, []),
+        })
+    return result
+
+
+def room_equipment_map(room_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """room_id -> [equipment_type] одним запросом"""
+    room_ids = list(room_ids)
+    result = {rid: [] for rid in room_ids}
+    if not room_ids:
+        return result
+
+    rows = db.session.execute(
+        select(RoomEquipment.room_id, RoomEquipment.equipment_type)
+        .where(RoomEquipment.room_id.in_(room_ids))
+        .order_by(RoomEquipment.room_id, RoomEquipment.id)
+    )
+    for room_id, equipment_type in rows:
+        result[room_id].append(equipment_type)
+    return result
@@ -0,0 +1,255 @@
+"""
+Кэш ответов GET с условными запросами (ETag / If-None-Match -> 304).
+ETag строится из пути, параметров запроса и версии данных (Schedule.updated_at +
+Schedule.data_version, DataVersion 'reference'), поэтому при изменении данных
+старые записи просто перестают запрашиваться и вытесняются — явная
+инвалидация не нужна.
+
+Бэкенды хранения тел ответов:
+    'memory' — LRU в памяти процесса с ограничением по суммарному размеру
+    'redis'  — общий Redis (Config.REDIS_URL)
+    'fake'   — RedisCacheBackend поверх FakeRedis в памяти (для тестов)
+    'none'   — только ETag/304, без хранения тел
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import request, make_response, Response
+from sqlalchemy import select
+
+from app import db
+from app.models import Schedule, DataVersion
+
+
+class LRUCacheBackend:
+    """LRU в памяти процесса; вытесняет старые записи при превышении max_bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        # ttl не нужен: ключи версионные, устаревшие вытесняются по LRU
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class FakeRedis:
+    """Минимальная замена клиента redis (get/set с ex/delete/flushdb) для тестов"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCacheBackend:
+    """Общий для всех воркеров кэш в Redis"""
+
+    prefix = 'resp:'
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisCacheBackend':
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class ResponseCache:
+    """Кэш ответов; инициализируется из конфигурации в create_app"""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl: Optional[int] = None
+
+    def init_app(self, app):
+        kind = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL')
+        if kind == 'memory':
+            self.backend = LRUCacheBackend(app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        elif kind == 'redis':
+            try:
+                self.backend = RedisCacheBackend.from_url(app.config['REDIS_URL'])
+            except ImportError:
+                print("⚠️  Пакет redis не установлен, кэш ответов — в памяти процесса")
+                self.backend = LRUCacheBackend(app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        elif kind == 'fake':
+            self.backend = RedisCacheBackend(FakeRedis())
+        else:
+            self.backend = None
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, Dict[str, str]]]:
+        if self.backend is None:
+            return None
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            # Недоступный кэш не должен ронять чтение
+            print(f"⚠️  Кэш ответов недоступен: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+            return base64.b64decode(entry['body']), entry['mimetype'], entry['headers']
+        except (ValueError, KeyError, TypeError):
+            return None  # запись чужого формата — считаем промахом
+
+    def set(self, key: str, body: bytes, mimetype: str, headers: Dict[str, str]):
+        if self.backend is None:
+            return
+        # JSON, а не pickle: из общего Redis нельзя десериализовать произвольные объекты
+        entry = json.dumps({
+            'body': base64.b64encode(body).decode('ascii'),
+            'mimetype': mimetype,
+            'headers': headers,
+        }).encode()
+        try:
+            self.backend.set(key, entry, ttl=self.ttl)
+        except Exception as e:
+            print(f"⚠️  Кэш ответов недоступен: {e}")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+response_cache = ResponseCache()
+
+# Заголовки, которые сохраняются вместе с телом ответа
+CACHED_HEADERS = ('X-Next-Cursor',)
+
+
+def _reference_version_subquery():
+    return select(DataVersion.version).where(DataVersion.scope == 'reference').scalar_subquery()
+
+
+def reference_version(**kwargs) -> Tuple:
+    """Версия справочных данных (одна выборка по первичному ключу)"""
+    version = db.session.execute(
+        select(DataVersion.version).where(DataVersion.scope == 'reference')
+    ).scalar()
+    return ('reference', version)
+
+
+def schedule_version(schedule_id: int, **kwargs) -> Optional[Tuple]:
+    """Версия расписания и справочников (имена в ответе) одним запросом; None — расписания нет"""
+    row = db.session.execute(
+        select(Schedule.updated_at, Schedule.data_version, _reference_version_subquery())
+        .where(Schedule.id == schedule_id)
+    ).first()
+    if row is None:
+        return None
+    return ('schedule', schedule_id, row[0].isoformat() if row[0] else None, row[1], row[2])
+
+
+def make_etag(version: Any) -> str:
+    # Accept влияет на формат ответа (колоночный JSON / MessagePack)
+    key = f"{request.path}?{request.query_string.decode()}|{request.headers.get('Accept', '')}|{version!r}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def cached_response(version_fn: Callable[..., Any]):
+    """
+    Декоратор GET-эндпоинта: ETag по версии данных, 304 на If-None-Match,
+    тело ответа — из кэша, если уже сериализовано при той же версии.
+    Args:
+        version_fn: (**view_kwargs) -> версия данных; None — не кэшировать
+            (например, объекта нет и view вернет 404)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+
+            etag = make_etag(version)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            cached = response_cache.get(etag)
+            if cached is not None:
+                body, mimetype, headers = cached
+                response = Response(body, mimetype=mimetype, headers=headers)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Потоковые ответы не буферизуем, но ETag/304 для них работает
+                if not response.is_streamed:
+                    headers = {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+                    response_cache.set(etag, response.get_data(), response.mimetype, headers)
+
+            response.set_etag(etag)
+            # Клиент может хранить ответ, но обязан перепроверять его по ETag
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
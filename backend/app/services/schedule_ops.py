@@ -0,0 +1,235 @@
+"""
+Операции над расписанием целиком, выполняемые внутри БД.
+Удаление и копирование расписания на 50k занятий не должны загружать
+строки Lesson в сессию ORM: здесь только set-based DELETE / INSERT ... SELECT.
+"""
+
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+
+from sqlalchemy import select, delete, literal, func
+
+from app import db
+from app.models import Schedule, Lesson, LessonPattern, LessonPatternException, TimetableWeek
+
+
+def lessons_counts(schedules: Iterable[Schedule]) -> Dict[int, int]:
+    """
+    Количество занятий для набора расписаний одним сгруппированным запросом
+    (вместо COUNT на каждое расписание в Schedule.to_dict).
+    """
+    from app.services.lesson_patterns import compact_lessons_counts
+    
+    schedules = list(schedules)
+    row_ids = [s.id for s in schedules if not s.is_compact]
+    counts = dict.fromkeys((s.id for s in schedules), 0)
+    if row_ids:
+        counts.update(db.session.execute(
+            select(Lesson.schedule_id, func.count())
+            .where(Lesson.schedule_id.in_(row_ids))
+            .group_by(Lesson.schedule_id)
+        ).all())
+    counts.update(compact_lessons_counts(s.id for s in schedules if s.is_compact))
+    return counts
+
+
+def _has_fk_cascade() -> bool:
+    # В SQLite внешние ключи по умолчанию не проверяются, ON DELETE CASCADE не сработает
+    return db.engine.dialect.name != 'sqlite'
+
+
+def delete_schedule(schedule_id: int) -> None:
+    """
+    Удалить расписание вместе с занятиями.
+    На PostgreSQL это один DELETE: занятия, шаблоны и сетки недель удаляет ON DELETE CASCADE.
+    """
+    if not _has_fk_cascade():
+        pattern_ids = select(LessonPattern.id).where(LessonPattern.schedule_id == schedule_id)
+        db.session.execute(delete(LessonPatternException).where(LessonPatternException.pattern_id.in_(pattern_ids)))
+        db.session.execute(delete(LessonPattern).where(LessonPattern.schedule_id == schedule_id))
+        db.session.execute(delete(Lesson).where(Lesson.schedule_id == schedule_id))
+        db.session.execute(delete(TimetableWeek).where(TimetableWeek.schedule_id == schedule_id))
+    db.session.execute(delete(Schedule).where(Schedule.id == schedule_id))
+    db.session.commit()
+
+
+# Колонки занятия, копируемые при клонировании (кроме id и schedule_id)
+_LESSON_COPY_COLUMNS = (
+    'week_id', 'group_id', 'subject_id', 'teacher_id', 'room_id', 'lesson_type_id',
+    'day_of_week', 'time_slot', 'duration', 'is_online', 'location', 'notes',
+)
+_PATTERN_COPY_COLUMNS = (
+    'semester_id', 'group_id', 'subject_id', 'teacher_id', 'room_id', 'lesson_type_id',
+    'day_of_week', 'time_slot', 'week_from', 'week_to', 'week_parity', 'is_online',
+)
+_EXCEPTION_COPY_COLUMNS = (
+    'week_number', 'is_cancelled', 'day_of_week', 'time_slot', 'teacher_id', 'room_id',
+)
+
+
+def clone_schedule(source: Schedule, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Скопировать расписание в новый черновик.
+    Занятия копируются одним INSERT ... SELECT внутри БД.
+    Returns:
+        Dict: schedule (новое расписание), lessons_copied, patterns_copied
+    """
+    clone = Schedule(
+        name=name or f'{source.name} (копия)',
+        semester=source.semester,
+        academic_year=source.academic_year,
+        semester_id=source.semester_id,
+        status='draft',
+        storage_mode=source.storage_mode,
+        fitness_score=source.fitness_score,
+        generation_method=source.generation_method,
+        generation_time=source.generation_time,
+        generation_params=source.generation_params,
+        conflicts_count=source.conflicts_count,
+        notes=source.notes,
+    )
+    db.session.add(clone)
+    db.session.flush()
+    
+    lesson = Lesson.__table__
+    now = datetime.utcnow()
+    copied = db.session.execute(
+        lesson.insert().from_select(
+            ['schedule_id', 'created_at', *_LESSON_COPY_COLUMNS],
+            select(
+                literal(clone.id), literal(now),
+                *[lesson.c[col] for col in _LESSON_COPY_COLUMNS]
+            ).where(lesson.c.schedule_id == source.id)
+        )
+    ).rowcount
+    
+    patterns = _clone_patterns(source.id, clone.id) if source.is_compact else 0
+    
+    db.session.commit()
+    return {'schedule': clone, 'lessons_copied': copied, 'patterns_copied': patterns}
+
+
+def _clone_patterns(source_id: int, target_id: int) -> int:
+    """
+    Копирование шаблонов компактного расписания.
+    Шаблонов в ~18 раз меньше, чем занятий, а исключениям нужна карта
+    старый id -> новый id, поэтому они копируются через INSERT ... RETURNING.
+    """
+    pattern = LessonPattern.__table__
+    sources = db.session.execute(
+        select(pattern.c.id, *[pattern.c[col] for col in _PATTERN_COPY_COLUMNS])
+        .where(pattern.c.schedule_id == source_id).order_by(pattern.c.id)
+    ).all()
+    if not sources:
+        return 0
+    
+    new_ids = db.session.execute(
+        pattern.insert().returning(pattern.c.id, sort_by_parameter_order=True),
+        [{'schedule_id': target_id, **{col: row._mapping[col] for col in _PATTERN_COPY_COLUMNS}}
+         for row in sources]
+    ).scalars().all()
+    id_map = {row.id: new_id for row, new_id in zip(sources, new_ids)}
+    
+    exception = LessonPatternException.__table__
+    exceptions = db.session.execute(
+        select(exception.c.pattern_id, *[exception.c[col] for col in _EXCEPTION_COPY_COLUMNS])
+        .where(exception.c.pattern_id.in_(list(id_map)))
+    ).all()
+    if exceptions:
+        db.session.execute(exception.insert(), [
+            {'pattern_id': id_map[row.pattern_id], **{col: row._mapping[col] for col in _EXCEPTION_COPY_COLUMNS}}
+            for row in exceptions
+        ])
+    return len(sources)
+
+
+# Поля, которые можно сменить у серии занятий целиком
+SERIES_TARGET_FIELDS = ('day_of_week', 'time_slot', 'room_id', 'teacher_id')
+
+
+def series_lessons(schedule_id: int, group_id: int, subject_id: int,
+                   lesson_type_id: Optional[int] = None, week_from: Optional[int] = None,
+                   week_to: Optional[int] = None, day_of_week: Optional[int] = None,
+                   time_slot: Optional[int] = None) -> list:
+    """Строки занятий серии (группа + предмет [+ тип, недели, текущие день и пара]) одним запросом"""
+    from app.models import Week
+
+    L = Lesson.__table__.c
+    stmt = (
+        select(L.id, L.week_id, L.day_of_week, L.time_slot, L.room_id, L.teacher_id, L.group_id,
+               Week.week_number)
+        .join(Week, Week.id == L.week_id)
+        .where(L.schedule_id == schedule_id, L.group_id == group_id, L.subject_id == subject_id)
+    )
+    for column, value in ((L.lesson_type_id, lesson_type_id), (L.day_of_week, day_of_week),
+                          (L.time_slot, time_slot)):
+        if value is not None:
+            stmt = stmt.where(column == value)
+    if week_from is not None:
+        stmt = stmt.where(Week.week_number >= week_from)
+    if week_to is not None:
+        stmt = stmt.where(Week.week_number <= week_to)
+    return [dict(row._mapping) for row in db.session.execute(stmt.order_by(Week.week_number, L.id))]
+
+
+def move_lesson_series(schedule: Schedule, rows: list, target: Dict[str, int],
+                       force: bool = False, skip_clashes: bool = False) -> Dict[str, Any]:
+    """
+    Перенести серию занятий одним UPDATE.
+    Все новые положения проверяются по индексу занятости за один проход (O(1) на занятие).
+    Args:
+        rows: Строки series_lessons
+        target: Новые значения из SERIES_TARGET_FIELDS, одинаковые для всей серии
+        force: Перенести и при конфликтах
+        skip_clashes: Перенести только недели без конфликтов
+    Returns:
+        Dict: applied, moved, clashes, skipped_weeks, conflicts_count
+    """
+    from app.services.occupancy import occupancy_cache
+
+    index = occupancy_cache.get(schedule)
+    changes = [(row, {**row, **target}) for row in rows]
+    result = {'applied': False, 'moved': 0, 'clashes': [], 'skipped_weeks': [],
+              'conflicts_count': schedule.conflicts_count}
+    with index.lock:
+        clashes = index.move(changes, force=force)
+        result['clashes'] = clashes
+        if clashes and not force:
+            if not skip_clashes:
+                return result
+            # Неделя занятия при переносе не меняется — отбрасываем недели с конфликтами
+            clash_weeks = {clash['week_id'] for clash in clashes}
+            result['skipped_weeks'] = sorted({clash['week_number'] for clash in clashes})
+            changes = [(old, new) for old, new in changes if old['week_id'] not in clash_weeks]
+            if index.move(changes):
+                return result
+        if not changes:
+            result['applied'] = True
+            return result
+
+        lesson, schedule_table = Lesson.__table__, Schedule.__table__
+        try:
+            db.session.execute(
+                lesson.update().where(lesson.c.id.in_([old['id'] for old, _ in changes])).values(**target)
+            )
+            # Core-запись мимо ORM: версию расписания и сетки недель обновляем сами
+            db.session.execute(
+                schedule_table.update().where(schedule_table.c.id == schedule.id).values(
+                    data_version=schedule_table.c.data_version + 1,
+                    conflicts_count=index.conflicts_count,
+                    updated_at=datetime.utcnow(),
+                )
+            )
+            db.session.execute(delete(TimetableWeek).where(
+                TimetableWeek.schedule_id == schedule.id,
+                TimetableWeek.week_id.in_({old['week_id'] for old, _ in changes}),
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            index.move([(new, old) for old, new in changes], force=True)
+            raise
+        occupancy_cache.put(schedule, index)
+
+    result.update(applied=True, moved=len(changes), conflicts_count=index.conflicts_count)
+    return result
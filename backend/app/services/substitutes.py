@@ -0,0 +1,175 @@
+"""
+Подбор замены для отсутствующего преподавателя.
+Для каждого занятия отсутствующего в диапазоне дат — преподаватели, которые
+ведут этот предмет (teacher_subjects), свободны в слоте и доступны в этот
+день/пару, по возрастанию нагрузки недели относительно max_hours_per_week.
+
+Справочная часть (предмет -> преподаватели, лимиты, недоступные слоты)
+собирается тремя запросами и кэшируется по версии справочников;
+занятость — битовые маски индекса занятости расписания (occupancy).
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Schedule, Semester, Teacher, TeacherUnavailableSlot, Week, teacher_subjects
+from app.services.occupancy import occupancy_cache, DAYS, SLOTS
+from app.services.lesson_serializer import ReferenceMaps, entity_lesson_rows, serialize_lesson
+from app.services.response_cache import reference_version
+
+
+class QualificationIndex:
+    """Предмет -> активные преподаватели, их лимиты и недоступные слоты недели"""
+
+    def __init__(self):
+        self.by_subject: Dict[int, List[int]] = defaultdict(list)
+        self.teachers: Dict[int, Dict[str, Any]] = {}
+        # Недоступность по дням недели: маска бит day * SLOTS + slot
+        self.unavailable: Dict[int, int] = defaultdict(int)
+
+    @classmethod
+    def load(cls) -> 'QualificationIndex':
+        index = cls()
+        for t in db.session.execute(
+            select(Teacher.id, Teacher.name, Teacher.department, Teacher.max_hours_per_week)
+            .where(Teacher.is_active.is_(True))
+        ):
+            index.teachers[t.id] = {
+                'id': t.id, 'name': t.name, 'department': t.department,
+                'max_hours_per_week': t.max_hours_per_week or 0,
+            }
+        for teacher_id, subject_id in db.session.execute(
+            select(teacher_subjects.c.teacher_id, teacher_subjects.c.subject_id)
+            .order_by(teacher_subjects.c.subject_id, teacher_subjects.c.teacher_id)
+        ):
+            if teacher_id in index.teachers:
+                index.by_subject[subject_id].append(teacher_id)
+        U = TeacherUnavailableSlot
+        for teacher_id, day, slot in db.session.execute(select(U.teacher_id, U.day, U.time_slot)):
+            if 0 <= day < DAYS and 0 <= slot < SLOTS:
+                index.unavailable[teacher_id] |= 1 << (day * SLOTS + slot)
+        return index
+
+    def is_available(self, teacher_id: int, day: int, slot: int) -> bool:
+        return not self.unavailable.get(teacher_id, 0) >> (day * SLOTS + slot) & 1
+
+
+class QualificationCache:
+    """Последний QualificationIndex; пересобирается при смене версии справочников"""
+
+    def __init__(self):
+        self._version = None
+        self._index: Optional[QualificationIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> QualificationIndex:
+        version = reference_version()
+        with self._lock:
+            if self._index is not None and self._version == version:
+                return self._index
+        index = QualificationIndex.load()
+        with self._lock:
+            self._version, self._index = version, index
+        return index
+
+
+qualification_cache = QualificationCache()
+
+
+def active_schedule_for(date_from: date, date_to: date) -> Optional[Schedule]:
+    """Активное расписание семестра, пересекающего диапазон дат"""
+    return (
+        Schedule.query.join(Semester, Semester.id == Schedule.semester_id)
+        .filter(Schedule.status == 'active', Semester.start_date <= date_to, Semester.end_date >= date_from)
+        .order_by(Schedule.activated_at.desc(), Schedule.id.desc())
+        .first()
+    )
+
+
+def _absent_lessons(schedule: Schedule, teacher_id: int, week_ids: List[int]) -> list:
+    if schedule.is_compact:
+        from app.services.lesson_patterns import expand_patterns
+        numbers = [n for (n,) in db.session.query(Week.week_number).filter(Week.id.in_(week_ids))]
+        wanted = set(week_ids)
+        return [r for r in expand_patterns(schedule.id, week_numbers=numbers)
+                if r['teacher_id'] == teacher_id and r['week_id'] in wanted]
+    return entity_lesson_rows(schedule.id, 'teacher_id', teacher_id, week_ids=week_ids)
+
+
+def find_substitutes(schedule: Schedule, teacher_id: int, date_from: date, date_to: date,
+                     limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Кандидаты на замену по каждому занятию преподавателя в [date_from, date_to].
+    Args:
+        limit: Не больше N кандидатов на занятие (None — все)
+    Returns:
+        Dict: lessons (занятие + candidates), cover_all (могут заменить во всех занятиях)
+    """
+    week_ids = [w for (w,) in db.session.query(Week.id).filter(
+        Week.semester_id == schedule.semester_id, Week.end_date >= date_from, Week.start_date <= date_to
+    )]
+    refs = ReferenceMaps(week_ids=week_ids)
+    rows = [
+        r for r in _absent_lessons(schedule, teacher_id, week_ids)
+        if r['week_id'] in refs.weeks
+        and date_from <= refs.weeks[r['week_id']].start_date + timedelta(days=r['day_of_week']) <= date_to
+    ]
+
+    occupancy = occupancy_cache.get(schedule)
+    qualified = qualification_cache.get()
+    week_windows: Dict[int, int] = {}
+    week_loads: Dict[tuple, int] = {}
+
+    def weekly_load(candidate_id: int, week_id: int) -> int:
+        key = (candidate_id, week_id)
+        if key not in week_loads:
+            if week_id not in week_windows:
+                number = refs.weeks[week_id].week_number
+                week_windows[week_id] = occupancy.window(week_numbers=[number])
+            week_loads[key] = (occupancy.busy('teacher', candidate_id) & week_windows[week_id]).bit_count()
+        return week_loads[key]
+
+    lessons = []
+    cover_all = None
+    for row in rows:
+        bit = occupancy.bit(row['week_id'], row['day_of_week'], row['time_slot'])
+        candidates = []
+        for candidate_id in qualified.by_subject.get(row['subject_id'], []):
+            if candidate_id == teacher_id:
+                continue
+            if bit is not None and occupancy.is_busy('teacher', candidate_id, bit):
+                continue
+            if not qualified.is_available(candidate_id, row['day_of_week'], row['time_slot']):
+                continue
+            info = qualified.teachers[candidate_id]
+            load = weekly_load(candidate_id, row['week_id'])
+            max_hours = info['max_hours_per_week']
+            candidates.append({
+                **info,
+                'week_load': load,
+                'remaining_hours': max_hours - load,
+                'load_ratio': round(load / max_hours, 3) if max_hours else None,
+                'over_limit': load + 1 > max_hours,
+            })
+        candidates.sort(key=lambda c: (c['over_limit'], c['load_ratio'] or 0, c['week_load'], c['name']))
+        ids = {c['id'] for c in candidates}
+        cover_all = ids if cover_all is None else cover_all & ids
+        lessons.append({
+            **serialize_lesson(row, refs),
+            'candidates': candidates[:limit] if limit else candidates,
+        })
+
+    return {
+        'schedule_id': schedule.id,
+        'teacher_id': teacher_id,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'lessons_count': len(lessons),
+        'lessons': lessons,
+        'cover_all': sorted((qualified.teachers[i] for i in cover_all or ()), key=lambda t: t['name']),
+    }
@@ -0,0 +1,180 @@
+"""
+Материализованные недельные сетки расписания (read model).
+Для каждой пары (расписание, неделя) хранится готовый JSON сетки 5×7:
+общий (entity_type='schedule') и отдельно по каждой группе, преподавателю
+и аудитории. Чтение недели — одна выборка по уникальному индексу.
+
+Заполняется при генерации и активации расписания. При правке занятий через
+ORM строки затронутых недель удаляются в той же транзакции (см. событие
+before_flush в models.py) и пересобираются при следующем чтении —
+только эти недели. Смена справочников (имена в сетке) отслеживается по
+версии DataVersion 'reference'.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select, delete, and_, func
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Schedule, Week, TimetableWeek, DataVersion
+from app.services.lesson_serializer import ReferenceMaps, lesson_rows, serialize_lesson
+
+DAYS_PER_WEEK = 5
+SLOTS_PER_DAY = 7
+
+# entity_type -> поле строки занятия
+ENTITY_FIELDS = {'group': 'group_id', 'teacher': 'teacher_id', 'room': 'room_id'}
+
+
+def _reference_version() -> int:
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.scope == 'reference')
+    ).scalar() or 0
+
+
+def _empty_grid() -> Dict[int, Dict[int, list]]:
+    return {day: {slot: [] for slot in range(SLOTS_PER_DAY)} for day in range(DAYS_PER_WEEK)}
+
+
+def week_payload(week, lessons: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Ответ эндпоинта недели: даты + сетка день -> пара -> занятия"""
+    timetable = _empty_grid()
+    for lesson in lessons:
+        day, slot = lesson['day_of_week'], lesson['time_slot']
+        if day in timetable and slot in timetable[day]:
+            timetable[day][slot].append(lesson)
+    return {
+        'week_number': week.week_number,
+        'start_date': week.start_date.isoformat(),
+        'end_date': week.end_date.isoformat(),
+        'timetable': timetable,
+    }
+
+
+def _schedule_rows(schedule: Schedule, week_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    if schedule.is_compact:
+        from app.services.lesson_patterns import expand_patterns
+        week_numbers = None
+        if week_ids is not None:
+            week_numbers = [n for (n,) in db.session.query(Week.week_number).filter(Week.id.in_(week_ids))]
+        rows = expand_patterns(schedule.id, week_numbers=week_numbers)
+        if week_ids is not None:
+            wanted = set(week_ids)
+            rows = (row for row in rows if row['week_id'] in wanted)
+        return list(rows)
+    if week_ids is not None and len(week_ids) == 1:
+        return lesson_rows(schedule.id, week_id=week_ids[0])
+    rows = lesson_rows(schedule.id)
+    if week_ids is not None:
+        wanted = set(week_ids)
+        rows = [row for row in rows if row['week_id'] in wanted]
+    return rows
+
+
+def rebuild_timetable(schedule: Schedule, week_ids: Optional[Iterable[int]] = None,
+                      commit: bool = True) -> Dict[str, Any]:
+    """
+    Пересобрать недельные сетки расписания.
+    Args:
+        schedule: Расписание
+        week_ids: Только эти недели (None — все недели с занятиями)
+        commit: Зафиксировать транзакцию
+    Returns:
+        {'weeks': int, 'rows': int, 'time': float}
+    """
+    started = datetime.utcnow()
+    week_ids = None if week_ids is None else list(week_ids)
+    rows = _schedule_rows(schedule, week_ids)
+    refs = ReferenceMaps(week_ids=week_ids if week_ids is not None else {r['week_id'] for r in rows})
+    reference_version = _reference_version()
+    dumps = current_app.json.dumps
+
+    # неделя -> сущность -> занятия
+    by_week: Dict[int, Dict[Tuple[str, int], list]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        if row['week_id'] not in refs.weeks:
+            continue
+        lesson = serialize_lesson(row, refs)
+        entities = by_week[row['week_id']]
+        entities[('schedule', 0)].append(lesson)
+        for entity_type, field in ENTITY_FIELDS.items():
+            if row[field] is not None:
+                entities[(entity_type, row[field])].append(lesson)
+    # Недели без занятий — пустая общая сетка, чтобы чтение не пересобирало их повторно
+    for week_id in (week_ids if week_ids is not None else []):
+        if week_id in refs.weeks:
+            by_week[week_id].setdefault(('schedule', 0), [])
+
+    T = TimetableWeek.__table__
+    stmt = delete(T).where(T.c.schedule_id == schedule.id)
+    if week_ids is not None:
+        stmt = stmt.where(T.c.week_id.in_(week_ids))
+    db.session.execute(stmt)
+
+    now = datetime.utcnow()
+    records = []
+    for week_id, entities in by_week.items():
+        week = refs.weeks[week_id]
+        for (entity_type, entity_id), lessons in entities.items():
+            records.append({
+                'schedule_id': schedule.id,
+                'week_id': week_id,
+                'week_number': week.week_number,
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'payload': dumps(week_payload(week, lessons)),
+                'reference_version': reference_version,
+                'built_at': now,
+            })
+    chunk_size = current_app.config.get('LESSON_BULK_CHUNK_SIZE', 5000)
+    for start in range(0, len(records), chunk_size):
+        db.session.execute(T.insert(), records[start:start + chunk_size])
+    if commit:
+        db.session.commit()
+
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    return {'weeks': len(by_week), 'rows': len(records), 'time': elapsed}
+
+
+def get_week_payload(schedule: Schedule, week, entity_type: str = 'schedule',
+                     entity_id: int = 0) -> str:
+    """
+    Готовый JSON сетки недели (строка, без повторной сериализации).
+    Если неделя не собрана или устарела — пересобирается только она.
+    """
+    T = TimetableWeek
+    current_version = func.coalesce(
+        select(DataVersion.version).where(DataVersion.scope == 'reference').scalar_subquery(), 0
+    )
+    key = and_(T.schedule_id == schedule.id, T.week_id == week.id)
+
+    row = db.session.execute(
+        select(T.payload, T.reference_version == current_version)
+        .where(key, T.entity_type == entity_type, T.entity_id == entity_id)
+    ).first()
+    if row is not None and row[1]:
+        return row[0]
+
+    if row is None and entity_type != 'schedule':
+        # Нет строки сущности: либо у нее нет занятий на этой неделе, либо неделя не собрана
+        built = db.session.execute(
+            select(T.reference_version == current_version)
+            .where(key, T.entity_type == 'schedule', T.entity_id == 0)
+        ).first()
+        if built is not None and built[0]:
+            return current_app.json.dumps(week_payload(week, []))
+
+    try:
+        rebuild_timetable(schedule, week_ids=[week.id])
+    except IntegrityError:
+        # Параллельное первое чтение той же недели уже вставило сетки (unique_timetable_week_entity) —
+        # берем записанное им
+        db.session.rollback()
+    payload = db.session.execute(
+        select(T.payload).where(key, T.entity_type == entity_type, T.entity_id == entity_id)
+    ).scalar()
+    return payload if payload is not None else current_app.json.dumps(week_payload(week, []))
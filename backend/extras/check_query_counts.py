@@ -0,0 +1,139 @@
+"""
+Регрессионная проверка числа SQL-запросов горячих эндпоинтов чтения.
+/schedules/<id>/extended и /schedules/<id>/week/<n> должны выполнять
+одинаковое число запросов независимо от числа групп и занятий (без N+1) —
+для хранения строками и шаблонами (compact). Запросы считаются слушателем
+before_cursor_execute на временной SQLite-базе в памяти; рабочая БД не трогается.
+Запускать как модуль: python -m extras.check_query_counts
+"""
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.config import config
+
+config['testing'].SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+from app import create_app, db
+from app.models import (
+    AcademicYear, Semester, SemesterEnum, LessonType, LessonTypeEnum,
+    Group, Subject, Teacher, Room, Schedule, Lesson,
+)
+from app.services.lesson_patterns import compact_schedule
+from app.services.response_cache import response_cache
+
+app = create_app('testing')
+
+WEEKS = 6
+# Размеры расписаний: (групп, занятий в неделю на группу)
+SIZES = [(1, 2), (8, 20)]
+
+# (эндпоинт, хранение) -> максимум запросов на холодный запрос (замер при добавлении проверки):
+# вместе с версией для кэша ответов, сборкой недели read model и, для compact /extended,
+# разворачиванием шаблонов по одной неделе (число недель здесь фиксировано — WEEKS)
+EXPECTED_MAX = {
+    ('extended', 'rows'): 10,
+    ('week', 'rows'): 15,
+    ('extended', 'compact'): 28,
+    ('week', 'compact'): 18,
+}
+
+
+def _seed_references(groups: int):
+    year = AcademicYear(name='2025/2026', start_date=date(2025, 9, 1), end_date=date(2026, 6, 30))
+    db.session.add(year)
+    db.session.commit()
+    semester = Semester(academic_year_id=year.id, type=SemesterEnum.FALL, start_date=date(2025, 9, 1),
+                        end_date=date(2025, 9, 1) + timedelta(days=7 * WEEKS - 1))
+    db.session.add(semester)
+    db.session.commit()
+    semester.generate_weeks()
+    db.session.add(LessonType(code=LessonTypeEnum.LECTURE, name='Лекция'))
+    db.session.add_all([Group(name=f'Группа {i}', course=1, student_count=20) for i in range(groups)])
+    db.session.add_all([Subject(name=f'Предмет {i}', code=f'S{i}') for i in range(5)])
+    db.session.add_all([Teacher(name=f'Преподаватель {i}', email=f't{i}@example.com') for i in range(10)])
+    db.session.add_all([Room(name=f'{100 + i}', capacity=40) for i in range(10)])
+    db.session.commit()
+    return semester
+
+
+def _seed_schedule(semester, groups: int, per_week: int, compact: bool) -> Schedule:
+    schedule = Schedule(name='Проверка числа запросов', semester_id=semester.id, status='draft')
+    db.session.add(schedule)
+    db.session.commit()
+    group_ids = [g.id for g in Group.query.order_by(Group.id).limit(groups)]
+    rows = []
+    for week in semester.weeks:
+        for g, group_id in enumerate(group_ids):
+            for n in range(per_week):
+                slot = n % 35
+                rows.append(dict(
+                    schedule_id=schedule.id, week_id=week.id, group_id=group_id,
+                    subject_id=1 + n % 5, teacher_id=1 + (g + n) % 10, room_id=1 + (g + n) % 10,
+                    lesson_type_id=1, day_of_week=slot // 7, time_slot=slot % 7,
+                ))
+    db.session.execute(Lesson.__table__.insert(), rows)
+    db.session.commit()
+    if compact:
+        compact_schedule(schedule)
+    return schedule
+
+
+def _count_queries(client, url: str) -> int:
+    counter = [0]
+
+    def on_execute(*args):
+        counter[0] += 1
+
+    response_cache.clear()
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        response = client.get(url)
+        response.get_data()  # /extended отдается потоком — дочитываем тело
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: HTTP {response.status_code}')
+    return counter[0]
+
+
+def check_query_counts() -> bool:
+    with app.app_context():
+        print("\n" + "="*70)
+        print("🔍 ПРОВЕРКА ЧИСЛА ЗАПРОСОВ")
+        print("="*70)
+
+        ok = True
+        client = app.test_client()
+        for storage in ('rows', 'compact'):
+            counts = {}
+            for groups, per_week in SIZES:
+                db.drop_all()
+                db.create_all()
+                semester = _seed_references(groups)
+                schedule = _seed_schedule(semester, groups, per_week, compact=(storage == 'compact'))
+                counts.setdefault('extended', []).append(
+                    _count_queries(client, f'/api/schedules/{schedule.id}/extended'))
+                counts.setdefault('week', []).append(
+                    _count_queries(client, f'/api/schedules/{schedule.id}/week/2'))
+
+            for name, values in counts.items():
+                constant = len(set(values)) == 1
+                within = max(values) <= EXPECTED_MAX[name, storage]
+                if constant and within:
+                    print(f"  ✅ {name} ({storage}): {values[0]} запросов")
+                else:
+                    ok = False
+                    print(f"  ❌ {name} ({storage}): {values} по размерам {SIZES}, ожидается не больше "
+                          f"{EXPECTED_MAX[name, storage]} и без роста")
+        db.drop_all()
+
+        print("="*70)
+        print("🎉 Число запросов не зависит от размера расписания!" if ok else "⚠️  Есть рост числа запросов")
+        return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_counts() else 1)
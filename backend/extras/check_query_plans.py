@@ -0,0 +1,118 @@
+"""
+Регрессионная проверка планов запросов к таблице lesson.
+Для горячих запросов (неделя расписания, расширенный вид, подсчет занятий,
+поиск конфликтов, расписание преподавателя/группы/аудитории) смотрит EXPLAIN и падает, если таблица читается полным
+сканированием вместо индекса. Работает на SQLite и PostgreSQL.
+Запускать как модуль: python -m extras.check_query_plans
+"""
+import json
+import sys
+
+from sqlalchemy import select, func, text
+from app import create_app, db
+from app.models import Lesson, Week, Semester
+
+app = create_app()
+
+# (название, таблица, которая должна читаться по индексу, запрос)
+PLAN_CHECKS = [
+    ('Неделя расписания (schedule_id, week_id)', 'lesson',
+     select(Lesson.id).where(Lesson.schedule_id == 1, Lesson.week_id == 1)),
+    ('Расширенный вид (schedule_id)', 'lesson',
+     select(Lesson.id).where(Lesson.schedule_id == 1)),
+    ('Количество занятий (Schedule.lessons_count)', 'lesson',
+     select(func.count(Lesson.id)).where(Lesson.schedule_id == 1)),
+    ('Конфликты: группировка по слоту', 'lesson',
+     select(Lesson.week_id, Lesson.day_of_week, Lesson.time_slot, func.count())
+     .where(Lesson.schedule_id == 1)
+     .group_by(Lesson.week_id, Lesson.day_of_week, Lesson.time_slot)
+     .having(func.count() > 1)),
+    ('Конфликты: преподаватель дважды в слоте', 'lesson',
+     select(Lesson.teacher_id, func.count())
+     .where(Lesson.schedule_id == 1)
+     .group_by(Lesson.week_id, Lesson.day_of_week, Lesson.time_slot, Lesson.teacher_id)
+     .having(func.count() > 1)),
+    ('Конфликты: аудитория дважды в слоте', 'lesson',
+     select(Lesson.room_id, func.count())
+     .where(Lesson.schedule_id == 1)
+     .group_by(Lesson.week_id, Lesson.day_of_week, Lesson.time_slot, Lesson.room_id)
+     .having(func.count() > 1)),
+    ('Конфликты: группа дважды в слоте', 'lesson',
+     select(Lesson.group_id, func.count())
+     .where(Lesson.schedule_id == 1)
+     .group_by(Lesson.week_id, Lesson.day_of_week, Lesson.time_slot, Lesson.group_id)
+     .having(func.count() > 1)),
+    ('Расписание преподавателя (schedule_id, teacher_id, week_id)', 'lesson',
+     select(Lesson.id).where(Lesson.schedule_id == 1, Lesson.teacher_id == 1, Lesson.week_id.in_([1, 2]))),
+    ('Расписание группы (schedule_id, group_id, week_id)', 'lesson',
+     select(Lesson.id).where(Lesson.schedule_id == 1, Lesson.group_id == 1, Lesson.week_id.in_([1, 2]))),
+    ('Расписание аудитории (schedule_id, room_id, week_id)', 'lesson',
+     select(Lesson.id).where(Lesson.schedule_id == 1, Lesson.room_id == 1, Lesson.week_id.in_([1, 2]))),
+    ('Неделя семестра по номеру', 'week',
+     select(Week.id).join(Semester).where(Week.semester_id == 1, Week.week_number == 1)),
+]
+
+
+def _compile(stmt) -> str:
+    return str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _sqlite_full_scans(conn, sql: str, table: str) -> list:
+    rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+    details = [row[-1] for row in rows]
+    # "SCAN lesson" — полный проход; "SEARCH lesson USING INDEX ..." — по индексу
+    return [d for d in details if d.startswith(f'SCAN {table}') and 'USING' not in d]
+
+
+def _postgres_full_scans(conn, sql: str, table: str) -> list:
+    # На маленьких таблицах планировщик PG и так выберет Seq Scan,
+    # поэтому проверяем, что индексный план вообще возможен
+    conn.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found = []
+
+    def walk(node):
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == table:
+            found.append(f"Seq Scan on {table}")
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return found
+
+
+def check_query_plans() -> bool:
+    with app.app_context():
+        print("\n" + "="*70)
+        print(f"🔍 ПРОВЕРКА ПЛАНОВ ЗАПРОСОВ ({db.engine.dialect.name})")
+        print("="*70)
+
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            full_scans = _sqlite_full_scans
+        elif dialect == 'postgresql':
+            full_scans = _postgres_full_scans
+        else:
+            print(f"⚠️  Диалект {dialect} не поддерживается")
+            return False
+
+        ok = True
+        with db.engine.connect() as conn:
+            for name, table, stmt in PLAN_CHECKS:
+                with conn.begin():
+                    problems = full_scans(conn, _compile(stmt), table)
+                if problems:
+                    ok = False
+                    print(f"  ❌ {name}: {'; '.join(problems)}")
+                else:
+                    print(f"  ✅ {name}")
+
+        print("="*70)
+        print("🎉 Все запросы используют индексы!" if ok else "⚠️  Есть запросы с полным сканированием")
+        return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_plans() else 1)
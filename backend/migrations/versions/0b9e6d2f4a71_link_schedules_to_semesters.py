@@ -0,0 +1,69 @@
+"""Link schedules to semesters by foreign key
+
+Revision ID: 0b9e6d2f4a71
+Revises: f5c03b7a9e42
+Create Date: 2026-10-19 18:41:05.772913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e6d2f4a71'
+down_revision = 'f5c03b7a9e42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('semester_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_schedule_semester_id'), ['semester_id'], unique=False)
+        batch_op.create_foreign_key('fk_schedule_semester_id', 'semester', ['semester_id'], ['id'])
+
+    # 1. Семестр по неделям занятий / шаблонов расписания
+    op.execute("""
+        UPDATE schedule SET semester_id = (
+            SELECT w.semester_id FROM lesson l JOIN week w ON w.id = l.week_id
+            WHERE l.schedule_id = schedule.id LIMIT 1
+        )
+        WHERE semester_id IS NULL
+    """)
+    op.execute("""
+        UPDATE schedule SET semester_id = (
+            SELECT p.semester_id FROM lesson_pattern p
+            WHERE p.schedule_id = schedule.id LIMIT 1
+        )
+        WHERE semester_id IS NULL
+    """)
+
+    # 2. Пустые расписания — по строкам учебного года и семестра (как раньше делал эндпоинт недели)
+    bind = op.get_bind()
+    years = dict(bind.execute(sa.text("SELECT name, id FROM academic_year")).fetchall())
+    current_year = bind.execute(sa.text("SELECT id FROM academic_year WHERE is_current")).scalar()
+    semesters = {
+        (row.academic_year_id, row.type): row.id
+        for row in bind.execute(sa.text("SELECT id, academic_year_id, type FROM semester"))
+    }
+    pending = bind.execute(sa.text(
+        "SELECT id, semester, academic_year FROM schedule WHERE semester_id IS NULL"
+    )).fetchall()
+    for schedule_id, label, year_name in pending:
+        year_id = years.get(year_name) or current_year
+        label = (label or '').lower()
+        # Enum хранится по имени члена (FALL/SPRING)
+        semester_type = 'FALL' if ('осенний' in label or 'fall' in label) else 'SPRING'
+        semester_id = semesters.get((year_id, semester_type))
+        if semester_id:
+            bind.execute(
+                sa.text("UPDATE schedule SET semester_id = :semester_id WHERE id = :id"),
+                {'semester_id': semester_id, 'id': schedule_id}
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_schedule_semester_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_schedule_semester_id'))
+        batch_op.drop_column('semester_id')
@@ -0,0 +1,30 @@
+"""Add lesson indexes for teacher, group and room timetables
+
+Revision ID: 3d7f19b2c8e6
+Revises: 0b9e6d2f4a71
+Create Date: 2026-10-19 19:20:44.901257
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7f19b2c8e6'
+down_revision = '0b9e6d2f4a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.create_index('ix_lesson_schedule_teacher_week', ['schedule_id', 'teacher_id', 'week_id'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_group_week', ['schedule_id', 'group_id', 'week_id'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_room_week', ['schedule_id', 'room_id', 'week_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_schedule_room_week')
+        batch_op.drop_index('ix_lesson_schedule_group_week')
+        batch_op.drop_index('ix_lesson_schedule_teacher_week')
@@ -0,0 +1,32 @@
+"""Add composite indexes for lesson and week lookups
+
+Revision ID: 5b7e2c41d9a3
+Revises: 37b548a295aa
+Create Date: 2026-10-19 10:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c41d9a3'
+down_revision = '37b548a295aa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.create_index('ix_lesson_schedule_week_slot', ['schedule_id', 'week_id', 'day_of_week', 'time_slot'], unique=False)
+
+    with op.batch_alter_table('week', schema=None) as batch_op:
+        batch_op.create_index('ix_week_semester_number', ['semester_id', 'week_number'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('week', schema=None) as batch_op:
+        batch_op.drop_index('ix_week_semester_number')
+
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_schedule_week_slot')
@@ -0,0 +1,36 @@
+"""Widen entity lesson indexes with day and slot for conflict detection
+
+Revision ID: 7a2e9c4b1d58
+Revises: 3d7f19b2c8e6
+Create Date: 2026-10-19 21:05:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2e9c4b1d58'
+down_revision = '3d7f19b2c8e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_schedule_teacher_week')
+        batch_op.drop_index('ix_lesson_schedule_group_week')
+        batch_op.drop_index('ix_lesson_schedule_room_week')
+        batch_op.create_index('ix_lesson_schedule_teacher_slot', ['schedule_id', 'teacher_id', 'week_id', 'day_of_week', 'time_slot'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_group_slot', ['schedule_id', 'group_id', 'week_id', 'day_of_week', 'time_slot'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_room_slot', ['schedule_id', 'room_id', 'week_id', 'day_of_week', 'time_slot'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lesson', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_schedule_room_slot')
+        batch_op.drop_index('ix_lesson_schedule_group_slot')
+        batch_op.drop_index('ix_lesson_schedule_teacher_slot')
+        batch_op.create_index('ix_lesson_schedule_teacher_week', ['schedule_id', 'teacher_id', 'week_id'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_group_week', ['schedule_id', 'group_id', 'week_id'], unique=False)
+        batch_op.create_index('ix_lesson_schedule_room_week', ['schedule_id', 'room_id', 'week_id'], unique=False)
@@ -0,0 +1,74 @@
+"""Add compact schedule storage (lesson patterns + exceptions)
+
+Revision ID: 8c3f1a9e6b20
+Revises: 5b7e2c41d9a3
+Create Date: 2026-10-19 11:40:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f1a9e6b20'
+down_revision = '5b7e2c41d9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('storage_mode', sa.String(length=10), nullable=False, server_default='rows'))
+
+    op.create_table('lesson_pattern',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('semester_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('teacher_id', sa.Integer(), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('lesson_type_id', sa.Integer(), nullable=False),
+    sa.Column('day_of_week', sa.Integer(), nullable=False),
+    sa.Column('time_slot', sa.Integer(), nullable=False),
+    sa.Column('week_from', sa.Integer(), nullable=False),
+    sa.Column('week_to', sa.Integer(), nullable=False),
+    sa.Column('week_parity', sa.Integer(), nullable=True),
+    sa.Column('is_online', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['group.id'], ),
+    sa.ForeignKeyConstraint(['lesson_type_id'], ['lesson_type.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ),
+    sa.ForeignKeyConstraint(['schedule_id'], ['schedule.id'], ),
+    sa.ForeignKeyConstraint(['semester_id'], ['semester.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teacher.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('lesson_pattern', schema=None) as batch_op:
+        batch_op.create_index('ix_lesson_pattern_schedule_weeks', ['schedule_id', 'week_from', 'week_to'], unique=False)
+
+    op.create_table('lesson_pattern_exception',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pattern_id', sa.Integer(), nullable=False),
+    sa.Column('week_number', sa.Integer(), nullable=False),
+    sa.Column('is_cancelled', sa.Boolean(), nullable=False),
+    sa.Column('day_of_week', sa.Integer(), nullable=True),
+    sa.Column('time_slot', sa.Integer(), nullable=True),
+    sa.Column('teacher_id', sa.Integer(), nullable=True),
+    sa.Column('room_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['pattern_id'], ['lesson_pattern.id'], ),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['teacher.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('pattern_id', 'week_number', name='unique_pattern_week')
+    )
+
+
+def downgrade():
+    op.drop_table('lesson_pattern_exception')
+    with op.batch_alter_table('lesson_pattern', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_pattern_schedule_weeks')
+
+    op.drop_table('lesson_pattern')
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.drop_column('storage_mode')
@@ -0,0 +1,42 @@
+"""Cascade schedule deletes to lessons and patterns at the DB level
+
+Revision ID: a4d92e7c5f13
+Revises: 8c3f1a9e6b20
+Create Date: 2026-10-19 12:25:47.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d92e7c5f13'
+down_revision = '8c3f1a9e6b20'
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка, ссылка на таблицу) — имена ограничений по умолчанию PostgreSQL
+CASCADE_FKS = [
+    ('lesson', 'schedule_id', 'schedule'),
+    ('lesson_pattern', 'schedule_id', 'schedule'),
+    ('lesson_pattern_exception', 'pattern_id', 'lesson_pattern'),
+]
+
+
+def _recreate_fks(ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        # В SQLite внешние ключи безымянные и по умолчанию не проверяются:
+        # каскад выполняет приложение (app/services/schedule_ops.py)
+        return
+    for table, column, referent in CASCADE_FKS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_fks('CASCADE')
+
+
+def downgrade():
+    _recreate_fks(None)
@@ -0,0 +1,38 @@
+"""Add indexes for list filters and schedule ordering
+
+Revision ID: c7b1e5f20d84
+Revises: a4d92e7c5f13
+Create Date: 2026-10-19 16:40:12.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b1e5f20d84'
+down_revision = 'a4d92e7c5f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('teacher', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_teacher_department'), ['department'], unique=False)
+
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_room_building'), ['building'], unique=False)
+
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_schedule_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_schedule_created_at'))
+
+    with op.batch_alter_table('room', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_room_building'))
+
+    with op.batch_alter_table('teacher', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_teacher_department'))
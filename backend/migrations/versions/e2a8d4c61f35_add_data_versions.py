@@ -0,0 +1,36 @@
+"""Add data versions for response ETags
+
+Revision ID: e2a8d4c61f35
+Revises: c7b1e5f20d84
+Create Date: 2026-10-19 17:25:48.104512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a8d4c61f35'
+down_revision = 'c7b1e5f20d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_version',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('scope')
+    )
+    op.execute("INSERT INTO data_version (scope, version) VALUES ('reference', 1)")
+
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
+
+    op.drop_table('data_version')
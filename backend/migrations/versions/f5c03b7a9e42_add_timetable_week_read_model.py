@@ -0,0 +1,39 @@
+"""Add materialized per-week timetable read model
+
+Revision ID: f5c03b7a9e42
+Revises: e2a8d4c61f35
+Create Date: 2026-10-19 18:02:17.336940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c03b7a9e42'
+down_revision = 'e2a8d4c61f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Сетки заполняются при генерации/активации и лениво при первом чтении недели
+    op.create_table('timetable_week',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('week_id', sa.Integer(), nullable=False),
+    sa.Column('week_number', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('reference_version', sa.Integer(), nullable=False),
+    sa.Column('built_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_id'], ['schedule.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['week_id'], ['week.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('schedule_id', 'week_id', 'entity_type', 'entity_id', name='unique_timetable_week_entity')
+    )
+
+
+def downgrade():
+    op.drop_table('timetable_week')
@@ -1,9 +1,47 @@
-import { useState } from 'react';
+import { useState, useMemo } from 'react';
 
-export default function ScheduleTable({ lessons }) {
+// Колоночный ответ API (?format=compact): параллельные массивы id + словари имен.
+// Имена подставляются по ссылке, без разбора тысяч одинаковых объектов.
+function fromColumnar(table) {
+  const { columns: c, refs } = table;
+  const rows = new Array(table.count);
+  for (let i = 0; i < table.count; i++) {
+    rows[i] = {
+      week_id: c.week_id[i],
+      day: c.day_of_week[i],
+      time_slot: c.time_slot[i],
+      group: refs.groups[c.group_id[i]],
+      subject: refs.subjects[c.subject_id[i]],
+      teacher: refs.teachers[c.teacher_id[i]],
+      room: refs.rooms[c.room_id[i]],
+    };
+  }
+  return rows;
+}
+
+export default function ScheduleTable({ lessons: lessonsProp, table }) {
   const [viewMode, setViewMode] = useState('group'); // group, teacher, room
   const [selectedEntity, setSelectedEntity] = useState(null);
 
+  const allLessons = useMemo(
+    () => (table ? fromColumnar(table) : lessonsProp || []),
+    [table, lessonsProp]
+  );
+
+  // Недели (есть в колоночном ответе) — показываем по одной
+  const weeks = useMemo(
+    () => (table ? Object.entries(table.refs.weeks)
+      .map(([weekId, week]) => ({ id: Number(weekId), ...week }))
+      .sort((a, b) => a.week_number - b.week_number) : []),
+    [table]
+  );
+  const [selectedWeek, setSelectedWeek] = useState(null);
+  const weekId = selectedWeek ?? (weeks.length > 0 ? weeks[0].id : null);
+
+  const lessons = weekId === null
+    ? allLessons
+    : allLessons.filter(l => l.week_id === weekId);
+
   const days = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница'];
   const times = [
     '08:00-09:30', '09:40-11:10', '11:20-12:50',
@@ -30,6 +68,23 @@ export default function ScheduleTable({ lessons }) {
       {/* Фильтры */}
       <div className="p-4 border-b bg-gray-50">
         <div className="flex items-center space-x-4">
+          {weeks.length > 0 && (
+            <>
+              <label className="text-sm font-medium">Неделя:</label>
+              <select
+                value={weekId}
+                onChange={(e) => setSelectedWeek(Number(e.target.value))}
+                className="px-3 py-2 border rounded-lg"
+              >
+                {weeks.map(week => (
+                  <option key={week.id} value={week.id}>
+                    {week.week_number} ({week.start_date} — {week.end_date})
+                  </option>
+                ))}
+              </select>
+            </>
+          )}
+
           <label className="text-sm font-medium">Вид:</label>
           <select
             value={viewMode}
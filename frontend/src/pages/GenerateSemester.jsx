@@ -1,9 +1,10 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { 
   semesterService, 
   academicYearService,
-  semesterScheduleService 
+  semesterScheduleService,
+  jobService
 } from '../services/semesterApi';
 
 export default function GenerateSemester() {
@@ -15,12 +16,14 @@ export default function GenerateSemester() {
   const [generating, setGenerating] = useState(false);
   const [progress, setProgress] = useState(null);
   const [error, setError] = useState(null);
+  const jobIdRef = useRef(null);
 
   // Состояние формы без min_days_between_lessons
   const [formData, setFormData] = useState({
     name: '',
     max_iterations: 500000,
     max_lessons_per_day: 5,
+    time_limit: 600,
   });
   
   useEffect(() => {
@@ -69,6 +72,15 @@ export default function GenerateSemester() {
       return;
     }
     
+    // Подписываемся на прогресс до отправки запроса, чтобы не пропустить события
+    const jobId = crypto.randomUUID();
+    jobIdRef.current = jobId;
+    const events = jobService.subscribe(jobId, {
+      progress: (stats) => setProgress(prev =>
+        prev?.stage === 'generating' ? { ...prev, stats } : prev
+      ),
+    });
+
     try {
       setGenerating(true);
       setError(null);
@@ -79,16 +91,18 @@ export default function GenerateSemester() {
       // Отправляемые данные без min_days_between_lessons
       const data = {
         semester_id: selectedSemester.id,
+        job_id: jobId,
         name: formData.name,
         semester_label: selectedSemester.type === 'fall' ? 'Осенний семестр' : 'Весенний семестр',
         academic_year: year?.name || '2024/2025',
         max_iterations: formData.max_iterations,
         max_lessons_per_day: formData.max_lessons_per_day,
+        time_limit: formData.time_limit,
       };
       
       const result = await semesterScheduleService.generate(data);
       
-      if (result.schedule_id) {
+      if (result.schedule_id && !result.stop_reason) {
         setProgress({ 
           stage: 'complete_success', 
           message: 'Готово!',
@@ -113,10 +127,22 @@ export default function GenerateSemester() {
       setError(errorMessage);
       setProgress(null);
     } finally {
+      events.close();
+      jobIdRef.current = null;
       setGenerating(false);
     }
   };
 
+  const handleCancel = async () => {
+    if (!jobIdRef.current) return;
+    try {
+      await jobService.cancel(jobIdRef.current);
+      setProgress(prev => ({ ...prev, message: 'Останавливаем генерацию...' }));
+    } catch (error) {
+      console.error('Ошибка отмены:', error);
+    }
+  };
+
   const closeProgressModal = () => {
     setProgress(null);
   }
@@ -284,6 +310,23 @@ export default function GenerateSemester() {
                       Ограничение на глубину поиска. Увеличьте, если не находит решение. Рекомендуется: 500,000+.
                     </p>
                   </div>
+                  <div>
+                    <label className="block text-sm font-medium text-gray-700 mb-2">
+                      ⏱️ Лимит времени (сек)
+                    </label>
+                    <input
+                      type="number"
+                      value={formData.time_limit}
+                      onChange={(e) => setFormData({ ...formData, time_limit: parseInt(e.target.value) || 600 })}
+                      className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500"
+                      min="10"
+                      max="7200"
+                      step="30"
+                    />
+                    <p className="text-xs text-gray-600 mt-1">
+                      По истечении лимита сохраняется лучший найденный частичный результат.
+                    </p>
+                  </div>
                 </div>
               </details>
             </div>
@@ -344,9 +387,26 @@ export default function GenerateSemester() {
                   <h3 className="text-xl font-semibold text-gray-900 mb-2">
                     {progress.message}
                   </h3>
-                  <p className="text-gray-600">
-                    Это может занять от нескольких секунд до минуты...
-                  </p>
+                  {progress.stats ? (
+                    <div className="bg-blue-50 border border-blue-200 rounded-lg p-4 space-y-2 text-left mt-4">
+                      <div className="w-full bg-blue-100 rounded-full h-2">
+                        <div className="bg-blue-600 h-2 rounded-full transition-all" style={{ width: `${(progress.stats.max_progress * 100).toFixed(1)}%` }}></div>
+                      </div>
+                      <div className="flex justify-between items-center"><span className="text-sm font-medium text-gray-700">Макс. прогресс:</span><span className="text-sm font-bold text-blue-700">{(progress.stats.max_progress * 100).toFixed(1)}%</span></div>
+                      <div className="flex justify-between items-center"><span className="text-sm font-medium text-gray-700">Глубина:</span><span className="text-sm font-bold text-gray-800">{progress.stats.depth?.toLocaleString()} / {progress.stats.total_tasks?.toLocaleString()}</span></div>
+                      <div className="flex justify-between items-center"><span className="text-sm font-medium text-gray-700">Итераций:</span><span className="text-sm font-bold text-gray-800">{progress.stats.iterations.toLocaleString()} ({Math.round(progress.stats.iterations_per_sec).toLocaleString()}/с)</span></div>
+                      {progress.stats.eta_seconds != null && (
+                        <div className="flex justify-between items-center"><span className="text-sm font-medium text-gray-700">Осталось (не более):</span><span className="text-sm font-bold text-gray-800">{Math.ceil(progress.stats.eta_seconds)}с</span></div>
+                      )}
+                    </div>
+                  ) : (
+                    <p className="text-gray-600">
+                      Это может занять от нескольких секунд до минуты...
+                    </p>
+                  )}
+                  <button onClick={handleCancel} className="mt-6 w-full py-2 px-4 bg-red-600 text-white font-semibold rounded-lg hover:bg-red-700">
+                    Остановить
+                  </button>
                 </>
               )}
 
@@ -383,7 +443,12 @@ export default function GenerateSemester() {
                   <p className="text-sm text-gray-600 mt-4">
                     Попробуйте увеличить "Максимум итераций" или ослабить ограничения.
                   </p>
-                  <button onClick={closeProgressModal} className="mt-6 w-full py-2 px-4 bg-blue-600 text-white font-semibold rounded-lg hover:bg-blue-700">
+                  {progress.result.stop_reason && progress.result.lessons_count > 0 && (
+                    <button onClick={() => navigate(`/schedules/${progress.result.schedule_id}`)} className="mt-6 w-full py-2 px-4 bg-green-600 text-white font-semibold rounded-lg hover:bg-green-700">
+                      Открыть частичное расписание ({progress.result.lessons_count} занятий)
+                    </button>
+                  )}
+                  <button onClick={closeProgressModal} className="mt-3 w-full py-2 px-4 bg-blue-600 text-white font-semibold rounded-lg hover:bg-blue-700">
                     Понятно
                   </button>
                 </>
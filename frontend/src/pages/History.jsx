@@ -3,9 +3,13 @@ import { Link } from 'react-router-dom';
 import { scheduleService } from '../services/api';
 import toast from 'react-hot-toast';
 
+const PAGE_SIZE = 50;
+
 export default function History() {
   const [schedules, setSchedules] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadSchedules();
@@ -13,8 +17,9 @@ export default function History() {
 
   const loadSchedules = async () => {
     try {
-      const data = await scheduleService.getAll();
-      setSchedules(data);
+      const page = await scheduleService.getPage(PAGE_SIZE);
+      setSchedules(page.items);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       toast.error('Ошибка загрузки расписаний');
     } finally {
@@ -22,6 +27,19 @@ export default function History() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await scheduleService.getPage(PAGE_SIZE, nextCursor);
+      setSchedules(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      toast.error('Ошибка загрузки расписаний');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="flex justify-center items-center h-64">
@@ -91,6 +109,18 @@ export default function History() {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="text-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 border border-gray-300 rounded-lg hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -9,12 +9,14 @@ export default function ScheduleView() {
   const { id } = useParams();
   const navigate = useNavigate();
   const [schedule, setSchedule] = useState(null);
+  const [table, setTable] = useState(null);
   const [conflicts, setConflicts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [exporting, setExporting] = useState(false);
 
   useEffect(() => {
     loadSchedule();
+    loadTable();
     loadConflicts();
   }, [id]);
 
@@ -30,6 +32,14 @@ export default function ScheduleView() {
     }
   };
 
+  const loadTable = async () => {
+    try {
+      setTable(await scheduleService.getTable(id));
+    } catch (error) {
+      console.error('Ошибка загрузки занятий:', error);
+    }
+  };
+
   const loadConflicts = async () => {
     try {
       const data = await scheduleService.getConflicts(id);
@@ -205,8 +215,8 @@ export default function ScheduleView() {
       )}
 
       {/* Таблица расписания */}
-      {schedule.lessons && schedule.lessons.length > 0 ? (
-        <ScheduleTable lessons={schedule.lessons} />
+      {table && table.count > 0 ? (
+        <ScheduleTable table={table} />
       ) : (
         <div className="bg-white rounded-lg shadow p-12 text-center">
           <div className="text-6xl mb-4">📭</div>
@@ -59,8 +59,16 @@ export const groupService = {
 export const scheduleService = {
   getAll: () => api.get('/schedules').then(res => res.data),
   
+  // Постраничная загрузка: { items, nextCursor } (nextCursor === null — страниц больше нет)
+  getPage: (limit, cursor = null) => api.get('/schedules', { params: { limit, cursor } })
+    .then(res => ({ items: res.data, nextCursor: res.headers['x-next-cursor'] || null })),
+  
   getById: (id) => api.get(`/schedules/${id}`).then(res => res.data),
   
+  // Все занятия в колоночном формате: { columns: {...массивы id}, refs: {...имена} }
+  getTable: (id) => api.get(`/schedules/${id}/extended`, { params: { format: 'compact' } })
+    .then(res => res.data),
+  
   // Этот метод теперь будет для старого алгоритма
   generate: (data) => api.post('/schedules/generate', data).then(res => res.data),
   
@@ -61,6 +61,27 @@ export const semesterScheduleService = {
     api.get(`/schedules/${scheduleId}/week/${weekNumber}`).then(res => res.data),
 };
 
+// ==================== Задачи генерации ====================
+export const jobService = {
+  getStatus: (jobId) => api.get(`/jobs/${jobId}`).then(res => res.data),
+
+  // Остановить генерацию: сервер сохранит лучший найденный результат
+  cancel: (jobId) => api.delete(`/jobs/${jobId}`).then(res => res.data),
+
+  // Подписка на прогресс генерации (Server-Sent Events).
+  // handlers: { progress, completed, cancelled, failed } — возвращает EventSource для close()
+  subscribe: (jobId, handlers = {}) => {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    ['progress', 'completed', 'cancelled', 'failed'].forEach(type => {
+      source.addEventListener(type, (e) => {
+        handlers[type]?.(JSON.parse(e.data));
+        if (type !== 'progress') source.close();
+      });
+    });
+    return source;
+  },
+};
+
 // ==================== Статистика ====================
 export const statisticsService = {
   getSemesterStats: (semesterId) => 
@@ -73,5 +94,6 @@ export default {
   lessonTypeService,
   constraintService,
   semesterScheduleService,
+  jobService,
   statisticsService,
 };
\ No newline at end of file